@@ -14,7 +14,9 @@ Takeoff is used in this example to decrease complexity
 
 import asyncio
 import random
+import time
 from mavsdk import System
+from mavsdk.manual_control_pump import ManualControlPump
 
 # Test set of manual inputs. Format: [roll, pitch, throttle, yaw]
 manual_inputs = [
@@ -72,26 +74,26 @@ async def manual_controls():
     print("-- Starting manual control")
     await drone.manual_control.start_position_control()
 
-    while True:
-        # grabs a random input from the test list
-        # WARNING - your simulation vehicle may crash if its unlucky enough
-        input_index = random.randint(0, len(manual_inputs) - 1)
-        input_list = manual_inputs[input_index]
-
-        # get current state of roll axis (between -1 and 1)
-        roll = float(input_list[0])
-        # get current state of pitch axis (between -1 and 1)
-        pitch = float(input_list[1])
-        # get current state of throttle axis
-        # (between -1 and 1, but between 0 and 1 is expected)
-        throttle = float(input_list[2])
-        # get current state of yaw axis (between -1 and 1)
-        yaw = float(input_list[3])
-
-        await drone.manual_control.set_manual_control_input(
-            pitch, roll, throttle, yaw)
-
-        await asyncio.sleep(0.1)
+    # Sample the input source and send its input at a fixed 20 Hz rate
+    pump = ManualControlPump(drone.manual_control, random_inputs(), rate_hz=20)
+    await pump.run()
+
+
+def random_inputs():
+    """Input source picking a new random input from the test set every
+    second"""
+    state = {"input": manual_inputs[0], "changed": time.monotonic()}
+
+    def source():
+        if time.monotonic() - state["changed"] >= 1.0:
+            # WARNING - your simulation vehicle may crash if its unlucky
+            # enough
+            state["input"] = random.choice(manual_inputs)
+            state["changed"] = time.monotonic()
+        roll, pitch, throttle, yaw = state["input"]
+        return pitch, roll, throttle, yaw
+
+    return source
 
 
 if __name__ == "__main__":
@@ -78,16 +78,10 @@ Note:
 
 
 import asyncio
-import csv
 from mavsdk import System
-from mavsdk.offboard import PositionNedYaw, VelocityNedYaw
-from mavsdk.offboard import AccelerationNed, OffboardError
+from mavsdk.offboard import PositionNedYaw, OffboardError
 from mavsdk.telemetry import LandedState
-
-
-# Find the current waypoint based on time
-def get_current_waypoint(waypoints, time):
-    return next((wp for wp in waypoints if time <= wp[0]), None)
+from mavsdk.trajectory import Trajectory, TrajectoryPlayer
 
 
 async def run():
@@ -145,61 +139,30 @@ async def run():
         await drone.action.disarm()
         return
 
-    waypoints = []
-
     # Read data from the CSV file
-    with open("active.csv", newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            waypoints.append((float(row["t"]),
-                              float(row["px"]),
-                              float(row["py"]),
-                              float(row["pz"]),
-                              float(row["vx"]),
-                              float(row["vy"]),
-                              float(row["vz"]),
-                              float(row["ax"]),
-                              float(row["ay"]),
-                              float(row["az"]),
-                              int(row["mode"])))
+    trajectory = Trajectory.from_csv("active.csv")
 
-    print("-- Performing trajectory")
-    total_duration = waypoints[-1][0]
-    # Total duration is the time of the last waypoint
-    t = 0  # Initialize time variable
     last_mode = 0
-    while t <= total_duration:
-        current_waypoint = get_current_waypoint(waypoints, t)
-        if current_waypoint is None:
-            # Reached the end of the trajectory
-            break
 
-        position = current_waypoint[1:4]
-        velocity = current_waypoint[4:7]
-        acceleration = current_waypoint[7:10]
-        mode_code = current_waypoint[-1]
-        if last_mode != mode_code:
+    def print_mode(sample):
+        nonlocal last_mode
+        if last_mode != sample.mode:
             # Print the mode number and its description
-            print(" Mode number: " + f"{mode_code}, "
-                  f"Description: {mode_descriptions[mode_code]}")
-            last_mode = mode_code
-        # set_position_velocity_acceleration_ned is not yet available
-        # in the default build for MAVSDK-Python Installation with pip3
-        # If you need to input acceleration,
-        # you should build MAVSDK for yourself.
-        await drone.offboard.set_position_velocity_ned(
-            PositionNedYaw(*position, current_waypoint[10]),
-            VelocityNedYaw(*velocity, current_waypoint[10])
-        )
-        # await drone.offboard.set_position_velocity_acceleration_ned(
-        #     PositionNedYaw(*position, current_waypoint[10]),
-        #     VelocityNedYaw(*velocity, current_waypoint[10]),
-        #     AccelerationNed(*acceleration, current_waypoint[10])
-        # )
-
-        timeStep = 0.1
-        await asyncio.sleep(timeStep)  # Time resolution of 0.1 seconds
-        t += timeStep
+            print(" Mode number: " + f"{sample.mode}, "
+                  f"Description: {mode_descriptions[sample.mode]}")
+            last_mode = sample.mode
+
+    # set_position_velocity_acceleration_ned is not yet available
+    # in the default build for MAVSDK-Python Installation with pip3
+    # If you need to input acceleration,
+    # you should build MAVSDK for yourself and set use_acceleration=True.
+    timeStep = 0.1  # Time resolution of 0.1 seconds
+    player = TrajectoryPlayer(drone.offboard, trajectory,
+                              rate_hz=1 / timeStep,
+                              use_acceleration=False)
+
+    print("-- Performing trajectory")
+    await player.play(on_sample=print_mode)
 
     print("-- Shape completed")
 
@@ -3,7 +3,7 @@
 import asyncio
 import argparse
 from mavsdk import System
-from tqdm import tqdm
+from mavsdk.param_bulk import ParamBulk, read_param_file
 
 
 def main():
@@ -38,24 +38,21 @@ async def set_params(args):
         else:
             break
 
-    with open(args.param_file, "r") as param_file:
-        print("Uploading Parameters... Please do not arm the vehicle!")
-        for line in tqdm(param_file, unit='lines'):
-            if line.startswith("#"):
-                continue
-
-            columns = line.strip().split("\t")
-            vehicle_id = columns[0]
-            component_id = columns[1]
-            name = columns[2]
-            value = columns[3]
-            type = columns[4]
-            if name in int_param_names:
-                await drone.param.set_param_int(name, int(value))
-            elif name in float_param_names:
-                await drone.param.set_param_float(name, float(value))
-            elif name in custom_param_names:
-                await drone.param.set_param_custom(name, value)
+    # Use the types reported by the vehicle, skip unknown parameters
+    values = {}
+    for name, value in read_param_file(args.param_file).items():
+        if name in int_param_names:
+            values[name] = int(value)
+        elif name in float_param_names:
+            values[name] = float(value)
+        elif name in custom_param_names:
+            values[name] = str(value)
+
+    print("Uploading Parameters... Please do not arm the vehicle!")
+    results = await ParamBulk(param_plugin).set_many(values)
+    for result in results.values():
+        if not result.success:
+            print(f"Failed to set {result.name}: {result.result}")
 
     print("Params uploaded!")
 
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import time
+
+from .camera_server import (CameraFeedback, CameraServerError, CaptureInfo,
+                            CaptureStatus, Position, Quaternion,
+                            StorageInformation)
+
+
+def _failed_capture_info(index):
+    return CaptureInfo(Position(0.0, 0.0, 0.0, 0.0),
+                       Quaternion(1.0, 0.0, 0.0, 0.0), 0, False, index, "")
+
+
+def _failed_storage_information(storage_id):
+    return StorageInformation(
+        0.0, 0.0, 0.0, StorageInformation.StorageStatus.NOT_AVAILABLE,
+        storage_id, StorageInformation.StorageType.UNKNOWN, 0.0, 0.0)
+
+
+def _failed_capture_status(_):
+    return CaptureStatus(0.0, 0.0, 0.0, CaptureStatus.ImageStatus.IDLE,
+                         CaptureStatus.VideoStatus.IDLE, 0)
+
+
+# Request name -> respond method, and factory of the data sent along a
+# FAILED feedback (None if the response is a feedback only)
+_REQUESTS = {
+    "take_photo": ("respond_take_photo", _failed_capture_info),
+    "start_video": ("respond_start_video", None),
+    "stop_video": ("respond_stop_video", None),
+    "start_video_streaming": ("respond_start_video_streaming", None),
+    "stop_video_streaming": ("respond_stop_video_streaming", None),
+    "set_mode": ("respond_set_mode", None),
+    "storage_information": ("respond_storage_information",
+                            _failed_storage_information),
+    "capture_status": ("respond_capture_status", _failed_capture_status),
+    "format_storage": ("respond_format_storage", None),
+    "reset_settings": ("respond_reset_settings", None),
+    "zoom_in_start": ("respond_zoom_in_start", None),
+    "zoom_out_start": ("respond_zoom_out_start", None),
+    "zoom_stop": ("respond_zoom_stop", None),
+    "zoom_range": ("respond_zoom_range", None),
+    "tracking_point_command": ("respond_tracking_point_command", None),
+    "tracking_rectangle_command": ("respond_tracking_rectangle_command",
+                                   None),
+    "tracking_off_command": ("respond_tracking_off_command", None),
+}
+
+#: Names of the requests a `CameraServerDispatcher` can handle, which are
+#: also the names of their subscriptions in `CameraServer`
+REQUESTS = tuple(_REQUESTS)
+
+
+class CameraServerRequestStats:
+    """
+     Counters and latencies of one request type of a
+     `CameraServerDispatcher`.
+
+     Latencies run from the reception of a request to the end of its
+     response, including the time spent waiting for a free handler slot.
+
+     """
+
+    def __init__(self):
+        """ Initializes the CameraServerRequestStats object """
+        #: Number of requests received
+        self.received = 0
+        #: Number of requests responded to
+        self.responded = 0
+        #: Number of requests whose handler raised, answered FAILED
+        self.failed = 0
+        #: Number of responses that could not be sent
+        self.respond_errors = 0
+        #: Latency of the last response (in seconds)
+        self.latency_s = None
+        #: Highest latency seen so far (in seconds)
+        self.max_latency_s = 0.0
+        #: Sum of the latencies, see `mean_latency_s` (in seconds)
+        self.total_latency_s = 0.0
+
+    @property
+    def mean_latency_s(self):
+        """ Mean latency of the responses (in seconds), None if none """
+        if self.responded == 0:
+            return None
+        return self.total_latency_s / self.responded
+
+    def __str__(self):
+        """ CameraServerRequestStats in string representation """
+        struct_repr = ", ".join([
+                "received: " + str(self.received),
+                "responded: " + str(self.responded),
+                "failed: " + str(self.failed),
+                "respond_errors: " + str(self.respond_errors),
+                "latency_s: " + str(self.latency_s),
+                "mean_latency_s: " + str(self.mean_latency_s),
+                "max_latency_s: " + str(self.max_latency_s)
+                ])
+
+        return f"CameraServerRequestStats: [{struct_repr}]"
+
+
+class CameraServerDispatcher:
+    """
+     Handler registry serving the requests of a `CameraServer`.
+
+     Every request with a registered handler is subscribed to, and all the
+     requests received are queued and handled by workers: a burst of
+     requests is handled in parallel up to `max_concurrency`, and the rest
+     wait their turn. A handler is called with the request value yielded
+     by the subscription (e.g. the photo index for "take_photo") and
+     returns the response:
+
+     - a `CameraFeedback`, for the requests answered with a feedback only.
+       None stands for `CameraFeedback.OK`.
+     - a (`CameraFeedback`, data) tuple for "take_photo" (`CaptureInfo`),
+       "storage_information" (`StorageInformation`) and "capture_status"
+       (`CaptureStatus`).
+
+     A handler raising an exception is answered with
+     `CameraFeedback.FAILED`. Handlers may be coroutine functions or plain
+     functions; plain functions run on the event loop and must not block.
+
+     Parameters
+     ----------
+     camera_server : CameraServer
+          CameraServer plugin (e.g. `drone.camera_server`)
+
+     max_concurrency : int
+          Most requests handled at the same time
+
+     """
+
+    def __init__(self, camera_server, max_concurrency=4):
+        """ Initializes the CameraServerDispatcher object """
+        self._camera_server = camera_server
+        self._max_concurrency = max_concurrency
+        self._handlers = {}
+        self._exclusive = set()
+        self._queues = {}
+        self._slots = None
+        self._task = None
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+        #: Statistics of every registered request, by name
+        self.stats = {}
+
+    def register(self, request, handler, exclusive=False):
+        """
+         Register the handler of a request, replacing any previous one.
+         Requests registered while running are only subscribed to from the
+         next `run`.
+
+         Parameters
+         ----------
+         request : str
+              Name of the request, one of `REQUESTS`
+
+         handler : callable
+              Function called with the request value, see the class
+              description
+
+         exclusive : bool
+              Handle the requests of this name one at a time, in order of
+              arrival (e.g. for zoom commands)
+
+         Raises
+         ------
+         ValueError
+             If the request name is unknown.
+        """
+        if request not in _REQUESTS:
+            raise ValueError(f"Unknown request '{request}', expected one "
+                             f"of {REQUESTS}")
+        self._handlers[request] = handler
+        if exclusive:
+            self._exclusive.add(request)
+        else:
+            self._exclusive.discard(request)
+        self.stats.setdefault(request, CameraServerRequestStats())
+
+    def handler(self, request, exclusive=False):
+        """
+         Decorator registering the decorated function as the handler of a
+         request, see `register`.
+        """
+        def decorator(function):
+            self.register(request, function, exclusive)
+            return function
+        return decorator
+
+    def start(self):
+        """
+         Start serving in the background.
+
+         Returns
+         -------
+         task : asyncio.Task
+              The background task, running until `stop`
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """ Stop serving, the requests being handled are abandoned """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """
+         Serve the requests of the registered handlers, until a
+         subscription ends.
+
+         Raises
+         ------
+         ValueError
+             If no handler is registered.
+        """
+        if not self._handlers:
+            raise ValueError("No request handler registered")
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        shared = asyncio.Queue()
+        workers = [asyncio.ensure_future(self._work(shared))
+                   for _ in range(self._max_concurrency)]
+        for request in self._handlers:
+            if request in self._exclusive:
+                # A queue and a worker of its own, so that waiting requests
+                # do not hold the shared workers
+                self._queues[request] = asyncio.Queue()
+                workers.append(asyncio.ensure_future(
+                    self._work(self._queues[request])))
+            else:
+                self._queues[request] = shared
+        receivers = [asyncio.ensure_future(self._receive(request))
+                     for request in self._handlers]
+        try:
+            done, _ = await asyncio.wait(
+                receivers, return_when=asyncio.FIRST_COMPLETED)
+            # A subscription ended or failed
+            for task in done:
+                task.result()
+        finally:
+            for task in receivers + workers:
+                task.cancel()
+
+    async def _receive(self, request):
+        subscription = getattr(self._camera_server, request)
+        stats = self.stats[request]
+        queue = self._queues[request]
+        async for value in subscription():
+            stats.received += 1
+            queue.put_nowait((request, value, time.monotonic_ns()))
+
+    async def _work(self, queue):
+        while True:
+            request, value, received_ns = await queue.get()
+            async with self._slots:
+                await self._handle(request, value, received_ns)
+
+    async def _handle(self, request, value, received_ns):
+        respond_name, failed_data = _REQUESTS[request]
+        stats = self.stats[request]
+        try:
+            response = self._handlers[request](value)
+            if asyncio.iscoroutine(response):
+                response = await response
+            if failed_data is None:
+                arguments = (CameraFeedback.OK if response is None
+                             else response,)
+            else:
+                feedback, data = response
+                arguments = (feedback, data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            stats.failed += 1
+            self._logger.warning(
+                f"Handler of '{request}' failed for {value}: {error}")
+            arguments = (CameraFeedback.FAILED,)
+            if failed_data is not None:
+                arguments += (failed_data(value),)
+
+        try:
+            await getattr(self._camera_server, respond_name)(*arguments)
+        except CameraServerError as error:
+            stats.respond_errors += 1
+            self._logger.warning(f"Response to '{request}' failed: {error}")
+            return
+
+        latency = (time.monotonic_ns() - received_ns) * 1e-9
+        stats.responded += 1
+        stats.latency_s = latency
+        stats.total_latency_s += latency
+        stats.max_latency_s = max(stats.max_latency_s, latency)
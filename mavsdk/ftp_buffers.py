@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import os
+import posixpath
+import shutil
+import tempfile
+
+# Memory-backed file system on Linux, the files never reach a disk
+_SHM_DIR = "/dev/shm"
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _scratch_dir():
+    """ Private temporary directory, in memory where possible """
+    parent = _SHM_DIR if os.path.isdir(_SHM_DIR) \
+        and os.access(_SHM_DIR, os.W_OK) else None
+    return tempfile.mkdtemp(prefix="mavsdk-ftp-", dir=parent)
+
+
+async def download_bytes(ftp, remote_file_path, use_burst=False):
+    """
+     Download a remote file into memory.
+
+     `Ftp.download` writes into a local directory of the server, so the
+     file goes through a private temporary directory, memory-backed
+     (`/dev/shm`) where available, and is removed once read. This requires
+     the server to run on this machine, which is the case when it is
+     started by `System`.
+
+     Parameters
+     ----------
+     ftp : Ftp
+          Ftp plugin of the vehicle (e.g. `drone.ftp`)
+
+     remote_file_path : str
+          The path of the remote file to download
+
+     use_burst : bool
+          Use burst for faster downloading
+
+     Returns
+     -------
+     data : bytes
+          Content of the file
+
+     Raises
+     ------
+     FtpError
+         If the request fails. The error contains the reason for the failure.
+    """
+    chunks = []
+    async for chunk in download_chunks(ftp, remote_file_path, use_burst):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def download_chunks(ftp, remote_file_path, use_burst=False,
+                          chunk_size=_CHUNK_SIZE):
+    """
+     Download a remote file as a stream of chunks.
+
+     Without burst, chunks are yielded as the file is received. Burst
+     downloads can receive parts out of order, so their chunks are only
+     yielded once the download is complete. See `download_bytes` for where
+     the file is stored meanwhile.
+
+     Parameters
+     ----------
+     ftp : Ftp
+          Ftp plugin of the vehicle (e.g. `drone.ftp`)
+
+     remote_file_path : str
+          The path of the remote file to download
+
+     use_burst : bool
+          Use burst for faster downloading
+
+     chunk_size : int
+          Maximum size of a chunk (in bytes)
+
+     Yields
+     -------
+     chunk : bytes
+          Next part of the file
+
+     Raises
+     ------
+     FtpError
+         If the request fails. The error contains the reason for the failure.
+    """
+    scratch_dir = _scratch_dir()
+    local_path = os.path.join(scratch_dir,
+                              posixpath.basename(remote_file_path))
+    local_file = None
+    try:
+        async for progress in ftp.download(remote_file_path, scratch_dir,
+                                           use_burst):
+            if use_burst:
+                continue
+            if local_file is None:
+                if not os.path.exists(local_path):
+                    continue
+                local_file = open(local_path, "rb")
+            # Only read up to what the server reports as written
+            available = progress.bytes_transferred - local_file.tell()
+            while available > 0:
+                chunk = local_file.read(min(available, chunk_size))
+                if not chunk:
+                    break
+                available -= len(chunk)
+                yield chunk
+
+        if local_file is None:
+            local_file = open(local_path, "rb")
+        while True:
+            chunk = local_file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        if local_file is not None:
+            local_file.close()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+async def upload_bytes(ftp, data, remote_file_path):
+    """
+     Upload a remote file from memory.
+
+     See `download_bytes` for how the data is handed to the server.
+
+     Parameters
+     ----------
+     ftp : Ftp
+          Ftp plugin of the vehicle (e.g. `drone.ftp`)
+
+     data : bytes-like or file-like
+          Content of the file, or a binary file object to read it from
+
+     remote_file_path : str
+          The path of the remote file to write
+
+     Raises
+     ------
+     FtpError
+         If the request fails. The error contains the reason for the failure.
+    """
+    remote_dir, name = posixpath.split(remote_file_path)
+    if not name:
+        raise ValueError("remote_file_path must name a file")
+
+    scratch_dir = _scratch_dir()
+    local_path = os.path.join(scratch_dir, name)
+    try:
+        with open(local_path, "wb") as local_file:
+            if hasattr(data, "read"):
+                shutil.copyfileobj(data, local_file, _CHUNK_SIZE)
+            else:
+                local_file.write(data)
+
+        async for _ in ftp.upload(local_path, remote_dir or "/"):
+            pass
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
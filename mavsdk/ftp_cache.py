@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import fnmatch
+import posixpath
+import time
+
+from .ftp_sync import parse_directory_listing
+
+
+def _has_magic(name):
+    return any(character in name for character in "*?[")
+
+
+class CachedFtp:
+    """
+     Remote file system view with cached directory listings.
+
+     Listings are kept for `ttl_s` seconds, and concurrent listings of the
+     same directory share a single request. The mutating calls of this
+     class forward to `Ftp` and invalidate the listings they affect, so
+     they must be used instead of the `Ftp` ones to keep the view
+     consistent. Changes made by other clients are only seen once the TTL
+     expires.
+
+     Parameters
+     ----------
+     ftp : Ftp
+          Ftp plugin of the vehicle (e.g. `drone.ftp`)
+
+     ttl_s : float
+          Time a listing is kept (in seconds)
+
+     """
+
+    def __init__(self, ftp, ttl_s=30.0):
+        """ Initializes the CachedFtp object """
+        self._ftp = ftp
+        self._ttl_s = ttl_s
+        # Directory path -> (time of the listing, paths, [RemoteEntry])
+        self._listings = {}
+        self._pending = {}
+        # Incremented by every invalidation, a listing requested before an
+        # invalidation is not cached
+        self._generation = 0
+
+    @staticmethod
+    def _normalize(remote_path):
+        normalized = posixpath.normpath(remote_path)
+        # normpath keeps two leading slashes, as POSIX allows
+        return "/" + normalized.lstrip("/") \
+            if normalized.startswith("/") else normalized
+
+    async def entries(self, remote_dir):
+        """
+         Entries of a remote directory, from the cache if fresh.
+
+         Parameters
+         ----------
+         remote_dir : str
+              The remote directory
+
+         Returns
+         -------
+         entries : [RemoteEntry]
+              Files and directories of the directory
+
+         Raises
+         ------
+         FtpError
+             If the listing fails.
+        """
+        return (await self._listing(remote_dir))[2]
+
+    async def _listing(self, remote_dir):
+        remote_dir = self._normalize(remote_dir)
+        cached = self._listings.get(remote_dir)
+        if cached is not None and time.monotonic() - cached[0] < self._ttl_s:
+            return cached
+
+        key = (remote_dir, self._generation)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._list(remote_dir, key))
+            self._pending[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _list(self, remote_dir, key):
+        try:
+            listed_at = time.monotonic()
+            paths = await self._ftp.list_directory(remote_dir)
+            listing = (listed_at, paths,
+                       parse_directory_listing(remote_dir, paths))
+            if key[1] == self._generation:
+                self._listings[remote_dir] = listing
+            return listing
+        finally:
+            del self._pending[key]
+
+    async def list_directory(self, remote_dir):
+        """
+         Lists items from a remote directory, as `Ftp.list_directory`, from
+         the cache if fresh.
+
+         Parameters
+         ----------
+         remote_dir : str
+              The remote directory to list the contents for
+
+         Returns
+         -------
+         paths : [str]
+              The found directory contents.
+
+         Raises
+         ------
+         FtpError
+             If the request fails. The error contains the reason for the
+             failure.
+        """
+        return list((await self._listing(remote_dir))[1])
+
+    async def stat(self, remote_path):
+        """
+         Entry of a remote file or directory, from the listing of its parent.
+
+         Parameters
+         ----------
+         remote_path : str
+              The remote path
+
+         Returns
+         -------
+         entry : RemoteEntry
+              The entry, None if it does not exist
+        """
+        remote_path = self._normalize(remote_path)
+        for entry in await self.entries(posixpath.dirname(remote_path)):
+            if entry.path == remote_path:
+                return entry
+        return None
+
+    async def glob(self, pattern):
+        """
+         Remote paths matching a glob pattern.
+
+         Only the directories needed by the pattern are listed, e.g.
+         "/fs/microsd/log/*/*.ulg" lists the log directory and each of its
+         subdirectories.
+
+         Parameters
+         ----------
+         pattern : str
+              Absolute glob pattern, with `*`, `?` and `[...]` in any path
+              component
+
+         Returns
+         -------
+         entries : [RemoteEntry]
+              The matching files and directories, sorted by path
+
+         Raises
+         ------
+         FtpError
+             If a listing fails.
+        """
+        if not pattern.startswith("/"):
+            raise ValueError("pattern must be an absolute path")
+        components = [part for part in pattern.split("/") if part]
+
+        # List the directories level by level, concurrently within a level
+        prefix = []
+        while components and not _has_magic(components[0]):
+            prefix.append(components.pop(0))
+        if not components:
+            entry = await self.stat("/" + "/".join(prefix))
+            return [] if entry is None else [entry]
+
+        directories = ["/" + "/".join(prefix)]
+        matches = []
+        for depth, component in enumerate(components):
+            last = depth == len(components) - 1
+            listings = await asyncio.gather(*(
+                self.entries(directory) for directory in directories))
+            matches = [entry for listing in listings for entry in listing
+                       if fnmatch.fnmatchcase(entry.name, component)
+                       and (last or entry.is_dir)]
+            directories = [entry.path for entry in matches]
+        return sorted(matches, key=lambda entry: entry.path)
+
+    def invalidate(self, remote_path=None):
+        """
+         Drop cached listings.
+
+         Parameters
+         ----------
+         remote_path : str
+              Directory whose listing, and the listings below it, are
+              dropped. Everything is dropped if None.
+        """
+        self._generation += 1
+        if remote_path is None:
+            self._listings.clear()
+            return
+        remote_path = self._normalize(remote_path)
+        prefix = remote_path.rstrip("/") + "/"
+        for path in list(self._listings):
+            if path == remote_path or path.startswith(prefix):
+                del self._listings[path]
+
+    def _invalidate_entry(self, remote_path):
+        remote_path = self._normalize(remote_path)
+        self.invalidate(remote_path)
+        self._listings.pop(posixpath.dirname(remote_path), None)
+
+    async def download(self, remote_file_path, local_dir, use_burst):
+        """
+         Downloads a file to local directory, see `Ftp.download`.
+
+         Yields
+         -------
+         progress_data : ProgressData
+              The progress data if result is next
+        """
+        async for progress in self._ftp.download(remote_file_path, local_dir,
+                                                 use_burst):
+            yield progress
+
+    async def upload(self, local_file_path, remote_dir):
+        """
+         Uploads local file to remote directory, see `Ftp.upload`.
+
+         Yields
+         -------
+         progress_data : ProgressData
+              The progress data if result is next
+        """
+        try:
+            async for progress in self._ftp.upload(local_file_path,
+                                                   remote_dir):
+                yield progress
+        finally:
+            self._generation += 1
+            self._listings.pop(self._normalize(remote_dir), None)
+
+    async def create_directory(self, remote_dir):
+        """ Creates a remote directory, see `Ftp.create_directory` """
+        try:
+            await self._ftp.create_directory(remote_dir)
+        finally:
+            self._invalidate_entry(remote_dir)
+
+    async def remove_directory(self, remote_dir):
+        """ Removes a remote directory, see `Ftp.remove_directory` """
+        try:
+            await self._ftp.remove_directory(remote_dir)
+        finally:
+            self._invalidate_entry(remote_dir)
+
+    async def remove_file(self, remote_file_path):
+        """ Removes a remote file, see `Ftp.remove_file` """
+        try:
+            await self._ftp.remove_file(remote_file_path)
+        finally:
+            self._invalidate_entry(remote_file_path)
+
+    async def rename(self, remote_from_path, remote_to_path):
+        """ Renames a remote file or directory, see `Ftp.rename` """
+        try:
+            await self._ftp.rename(remote_from_path, remote_to_path)
+        finally:
+            self._invalidate_entry(remote_from_path)
+            self._invalidate_entry(remote_to_path)
+
+    async def are_files_identical(self, local_file_path, remote_file_path):
+        """ Compares local and remote files, see `Ftp.are_files_identical` """
+        return await self._ftp.are_files_identical(local_file_path,
+                                                   remote_file_path)
+
+    async def set_target_compid(self, compid):
+        """
+         Sets the target component ID, see `Ftp.set_target_compid`.
+
+         All the listings are dropped, as they belong to the previous
+         component.
+        """
+        try:
+            await self._ftp.set_target_compid(compid)
+        finally:
+            self.invalidate()
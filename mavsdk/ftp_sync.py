@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import fnmatch
+import os
+import posixpath
+import time
+
+from .ftp import FtpError, FtpResult
+
+# Failures caused by the link rather than by the file, worth retrying
+_RETRIED_RESULTS = (FtpResult.Result.TIMEOUT,
+                    FtpResult.Result.BUSY,
+                    FtpResult.Result.PROTOCOL_ERROR,
+                    FtpResult.Result.NO_SYSTEM)
+
+
+class RemoteEntry:
+    """
+     File or directory of a remote directory listing.
+
+     Parameters
+     ----------
+     path : str
+          Full remote path
+
+     is_dir : bool
+          True for a directory
+
+     size : int
+          Size of a file in bytes, None if unknown
+
+     """
+
+    def __init__(
+            self,
+            path,
+            is_dir,
+            size=None):
+        """ Initializes the RemoteEntry object """
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+
+    @property
+    def name(self):
+        """ Last component of the path """
+        return posixpath.basename(self.path)
+
+    def __eq__(self, to_compare):
+        """ Checks if two RemoteEntry are the same """
+        try:
+            return \
+                (self.path == to_compare.path) and \
+                (self.is_dir == to_compare.is_dir) and \
+                (self.size == to_compare.size)
+
+        except AttributeError:
+            return False
+
+    def __str__(self):
+        """ RemoteEntry in string representation """
+        struct_repr = ", ".join([
+                "path: " + str(self.path),
+                "is_dir: " + str(self.is_dir),
+                "size: " + str(self.size)
+                ])
+
+        return f"RemoteEntry: [{struct_repr}]"
+
+
+def parse_directory_listing(remote_dir, paths):
+    """
+     Parse the entries returned by `Ftp.list_directory`.
+
+     MAVLink FTP entries are a type character followed by the name: "D"
+     for a directory, "F" for a file followed by a tab and the size, and
+     "S" for an entry to skip. Entries without a type character are taken
+     as files of unknown size.
+
+     Parameters
+     ----------
+     remote_dir : str
+          The listed directory
+
+     paths : [str]
+          Entries returned by `Ftp.list_directory`
+
+     Returns
+     -------
+     entries : [RemoteEntry]
+          Files and directories, without "." and ".."
+    """
+    entries = []
+    for path in paths:
+        kind, name = path[:1], path[1:]
+        if kind == "S" or not path:
+            continue
+        if kind not in ("D", "F"):
+            kind, name = "F", path
+
+        size = None
+        if kind == "F" and "\t" in name:
+            name, size_field = name.split("\t", 1)
+            try:
+                size = int(size_field)
+            except ValueError:
+                pass
+        if name in (".", "..", ""):
+            continue
+        entries.append(RemoteEntry(posixpath.join(remote_dir, name),
+                                   kind == "D", size))
+    return entries
+
+
+class FtpSyncResult:
+    """
+     Outcome and statistics of a transfer run.
+
+     Parameters
+     ----------
+     transferred : [str]
+          Files transferred
+
+     skipped : [str]
+          Files already identical, not transferred
+
+     failed : {str: FtpResult.Result}
+          Files that could not be transferred, with the last error
+
+     bytes_transferred : int
+          Total bytes transferred
+
+     elapsed_s : float
+          Duration of the run (in seconds)
+
+     """
+
+    def __init__(self):
+        """ Initializes the FtpSyncResult object """
+        self.transferred = []
+        self.skipped = []
+        self.failed = {}
+        self.bytes_transferred = 0
+        self.elapsed_s = 0.0
+
+    @property
+    def bytes_per_s(self):
+        """ Average transfer rate of the run (in bytes/second) """
+        if self.elapsed_s <= 0:
+            return 0.0
+        return self.bytes_transferred / self.elapsed_s
+
+    @property
+    def success(self):
+        """ True if no file failed """
+        return not self.failed
+
+    def __str__(self):
+        """ FtpSyncResult in string representation """
+        struct_repr = ", ".join([
+                "transferred: " + str(len(self.transferred)),
+                "skipped: " + str(len(self.skipped)),
+                "failed: " + str(len(self.failed)),
+                "bytes_transferred: " + str(self.bytes_transferred),
+                "bytes_per_s: " + f"{self.bytes_per_s:.0f}"
+                ])
+
+        return f"FtpSyncResult: [{struct_repr}]"
+
+
+class FtpTransferManager:
+    """
+     Incremental, concurrent transfers of directory trees over MAVLink FTP.
+
+     Files are compared before being transferred: first by size, from the
+     directory listing, then with `Ftp.are_files_identical` (CRC32), and
+     only the files that differ are transferred. Files interrupted by a
+     link failure (timeout, busy, protocol error or no system) are retried
+     from the start, MAVLink FTP transfers cannot continue from an offset.
+     Running a sync again after a connection drop resumes it, as the files
+     already transferred compare identical.
+
+     Requests are queued by the server, `concurrency` keeps that queue
+     filled so that listing, comparing and transferring overlap.
+
+     Parameters
+     ----------
+     ftp : Ftp
+          Ftp plugin of the vehicle (e.g. `drone.ftp`)
+
+     concurrency : int
+          Maximum number of files in flight
+
+     use_burst : bool
+          Use burst mode for downloads
+
+     retries : int
+          Number of retries per file
+
+     retry_delay_s : float
+          Delay before the first retry, doubled for every following retry
+          (in seconds)
+
+     on_progress : callable
+          Optional callback, called with the bytes transferred so far in the
+          run, and the elapsed time in seconds
+
+     """
+
+    def __init__(self, ftp, concurrency=4, use_burst=True, retries=3,
+                 retry_delay_s=0.5, on_progress=None):
+        """ Initializes the FtpTransferManager object """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._ftp = ftp
+        self._concurrency = concurrency
+        self._use_burst = use_burst
+        self._retries = retries
+        self._retry_delay_s = retry_delay_s
+        self._on_progress = on_progress
+
+    async def walk(self, remote_dir, pattern=None):
+        """
+         List a remote directory recursively, listing subdirectories
+         concurrently.
+
+         Parameters
+         ----------
+         remote_dir : str
+              The remote directory
+
+         pattern : str
+              Optional glob pattern (e.g. "*.ulg") that file names must
+              match
+
+         Returns
+         -------
+         files : [RemoteEntry]
+              All the files below the directory, sorted by path
+
+         Raises
+         ------
+         FtpError
+             If a listing fails.
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+        files = []
+
+        async def walk_dir(path):
+            async with semaphore:
+                paths = await self._retry(self._ftp.list_directory, path)
+            subdirs = []
+            for entry in parse_directory_listing(path, paths):
+                if entry.is_dir:
+                    subdirs.append(walk_dir(entry.path))
+                elif pattern is None or fnmatch.fnmatch(entry.name, pattern):
+                    files.append(entry)
+            await asyncio.gather(*subdirs)
+
+        await walk_dir(remote_dir)
+        files.sort(key=lambda entry: entry.path)
+        return files
+
+    async def download_dir(self, remote_dir, local_dir, pattern=None):
+        """
+         Mirror a remote directory tree into a local directory.
+
+         Parameters
+         ----------
+         remote_dir : str
+              The remote directory
+
+         local_dir : str
+              The local directory, created if needed
+
+         pattern : str
+              Optional glob pattern (e.g. "*.ulg") that file names must
+              match
+
+         Returns
+         -------
+         result : FtpSyncResult
+              Outcome of every file, and transfer statistics
+        """
+        files = await self.walk(remote_dir, pattern)
+        jobs = []
+        for entry in files:
+            relative = posixpath.relpath(entry.path, remote_dir)
+            local_path = os.path.join(local_dir, *relative.split("/"))
+            jobs.append((entry.path, local_path, entry.size))
+        return await self.download_files(jobs)
+
+    async def download_files(self, files):
+        """
+         Download files that differ from their local copy.
+
+         Parameters
+         ----------
+         files : [(str, str, int)]
+              Remote path, local path, and remote size (None if unknown) of
+              every file
+
+         Returns
+         -------
+         result : FtpSyncResult
+              Outcome of every file, and transfer statistics
+        """
+        return await self._transfer_all(files, self._download)
+
+    async def upload_dir(self, local_dir, remote_dir):
+        """
+         Mirror a local directory tree into a remote directory.
+
+         Parameters
+         ----------
+         local_dir : str
+              The local directory
+
+         remote_dir : str
+              The remote directory, created if needed
+
+         Returns
+         -------
+         result : FtpSyncResult
+              Outcome of every file, and transfer statistics
+        """
+        jobs = []
+        remote_dirs = [remote_dir]
+        for root, dirs, names in os.walk(local_dir):
+            dirs.sort()
+            relative = os.path.relpath(root, local_dir)
+            remote_root = remote_dir if relative == "." else posixpath.join(
+                remote_dir, *relative.split(os.sep))
+            remote_dirs.extend(posixpath.join(remote_root, name)
+                               for name in dirs)
+            jobs.extend((os.path.join(root, name),
+                         posixpath.join(remote_root, name), None)
+                        for name in sorted(names))
+
+        # Parents before children
+        for path in remote_dirs:
+            await self._create_directory(path)
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def list_sizes(path):
+            async with semaphore:
+                paths = await self._retry(self._ftp.list_directory, path)
+            return [(entry.path, entry.size)
+                    for entry in parse_directory_listing(path, paths)
+                    if not entry.is_dir]
+
+        remote_sizes = {}
+        for sizes in await asyncio.gather(*(
+                list_sizes(path) for path in remote_dirs)):
+            remote_sizes.update(sizes)
+
+        jobs = [(local_path, remote_path, remote_sizes.get(remote_path, -1))
+                for local_path, remote_path, _ in jobs]
+        return await self._transfer_all(jobs, self._upload)
+
+    async def _create_directory(self, remote_dir):
+        try:
+            await self._retry(self._ftp.create_directory, remote_dir)
+        except FtpError as error:
+            if error._result.result != FtpResult.Result.FILE_EXISTS:
+                raise
+
+    async def _transfer_all(self, jobs, transfer):
+        result = FtpSyncResult()
+        semaphore = asyncio.Semaphore(self._concurrency)
+        progress = {}
+        start = time.monotonic()
+
+        def report(key, bytes_transferred):
+            progress[key] = bytes_transferred
+            if self._on_progress is not None:
+                self._on_progress(sum(progress.values()),
+                                  time.monotonic() - start)
+
+        async def run(job):
+            async with semaphore:
+                await transfer(job, result, report)
+
+        await asyncio.gather(*(run(job) for job in jobs))
+        result.bytes_transferred = sum(progress.values())
+        result.elapsed_s = time.monotonic() - start
+        return result
+
+    async def _download(self, job, result, report):
+        remote_path, local_path, remote_size = job
+        if await self._is_identical(local_path, remote_path, remote_size):
+            result.skipped.append(remote_path)
+            return
+
+        local_dir = os.path.dirname(local_path) or "."
+        os.makedirs(local_dir, exist_ok=True)
+
+        async def download():
+            try:
+                async for progress in self._ftp.download(
+                        remote_path, local_dir, self._use_burst):
+                    report(remote_path, progress.bytes_transferred)
+            except FtpError as error:
+                if not self._use_burst or error._result.result \
+                        != FtpResult.Result.UNSUPPORTED:
+                    raise
+                # Burst mode is not supported by this vehicle
+                self._use_burst = False
+                await download()
+
+        await self._transfer(download, remote_path, result)
+
+    async def _upload(self, job, result, report):
+        local_path, remote_path, remote_size = job
+        if remote_size != -1 and await self._is_identical(
+                local_path, remote_path, remote_size):
+            result.skipped.append(remote_path)
+            return
+
+        async def upload():
+            async for progress in self._ftp.upload(
+                    local_path, posixpath.dirname(remote_path)):
+                report(remote_path, progress.bytes_transferred)
+
+        await self._transfer(upload, remote_path, result)
+
+    async def _transfer(self, transfer, path, result):
+        try:
+            await self._retry(transfer)
+        except FtpError as error:
+            result.failed[path] = error._result.result
+        else:
+            result.transferred.append(path)
+
+    async def _is_identical(self, local_path, remote_path, remote_size):
+        try:
+            local_size = os.path.getsize(local_path)
+        except OSError:
+            return False
+        if remote_size is not None and remote_size != local_size:
+            return False
+        try:
+            return await self._retry(self._ftp.are_files_identical,
+                                     local_path, remote_path)
+        except FtpError:
+            return False
+
+    async def _retry(self, call, *args):
+        delay = self._retry_delay_s
+        attempt = 0
+        while True:
+            try:
+                return await call(*args)
+            except FtpError as error:
+                attempt += 1
+                if error._result.result not in _RETRIED_RESULTS \
+                        or attempt > self._retries:
+                    raise
+            await asyncio.sleep(delay)
+            delay *= 2
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+import math
+
+from .geofence import FenceType
+
+try:
+    # NumPy is optional, it is only needed for batch queries
+    import numpy as np
+except ImportError:
+    np = None
+
+_EARTH_RADIUS_M = 6371000.0
+
+# Fences spanning more grid cells than this are checked for every query
+# instead of being added to every cell they overlap
+_MAX_CELLS_PER_FENCE = 4096
+
+
+class _Fence:
+    """
+     A polygon or circle in local coordinates, with its bounding box
+    """
+
+    def __init__(self, source, inclusion, edges=None, center=None,
+                 radius=None):
+        self.source = source
+        self.inclusion = inclusion
+        self.edges = edges
+        self.center = center
+        self.radius = radius
+        if edges is not None:
+            xs = [edge[0] for edge in edges]
+            ys = [edge[1] for edge in edges]
+            self.bbox = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self.bbox = (center[0] - radius, center[1] - radius,
+                         center[0] + radius, center[1] + radius)
+
+    def contains(self, x, y):
+        min_x, min_y, max_x, max_y = self.bbox
+        if x < min_x or x > max_x or y < min_y or y > max_y:
+            return False
+
+        if self.edges is None:
+            dx = x - self.center[0]
+            dy = y - self.center[1]
+            return dx * dx + dy * dy <= self.radius * self.radius
+
+        inside = False
+        for x1, y1, x2, y2 in self.edges:
+            if (y1 > y) != (y2 > y) and \
+                    x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+    def contains_many(self, x, y):
+        min_x, min_y, max_x, max_y = self.bbox
+        candidates = np.flatnonzero(
+            (x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))
+        x = x[candidates]
+        y = y[candidates]
+
+        if self.edges is None:
+            inside = (x - self.center[0]) ** 2 + (y - self.center[1]) ** 2 \
+                <= self.radius * self.radius
+        else:
+            inside = np.zeros(len(candidates), dtype=bool)
+            for x1, y1, x2, y2 in self.edges:
+                crossing = (y1 > y) != (y2 > y)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    inside ^= crossing & \
+                        (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+        return candidates, inside
+
+
+class GeofenceEngine:
+    """
+     Local containment checks against geofences.
+
+     Fences are projected once on a local plane, and indexed by bounding box
+     in a uniform grid, so that a query only tests the few fences around the
+     point. A point is allowed if it is inside at least one inclusion fence
+     (when there are any) and outside of every exclusion fence, which is how
+     PX4 evaluates geofences.
+
+     Parameters
+     ----------
+     geofence_data : GeofenceData
+          The fences, as uploaded with `Geofence.upload_geofence`
+
+     cell_size_m : float
+          Size of the index grid cells (in metres). Defaults to the median
+          fence size.
+
+     """
+
+    def __init__(self, geofence_data, cell_size_m=None):
+        """ Initializes the GeofenceEngine object """
+        polygons = geofence_data.polygons or []
+        circles = geofence_data.circles or []
+
+        points = [point for polygon in polygons for point in polygon.points]
+        points += [circle.point for circle in circles]
+        if points:
+            self._lat0 = math.radians(
+                sum(p.latitude_deg for p in points) / len(points))
+            self._lon0 = math.radians(
+                sum(p.longitude_deg for p in points) / len(points))
+        else:
+            self._lat0 = self._lon0 = 0.0
+        self._cos_lat0 = math.cos(self._lat0)
+
+        self._fences = []
+        for polygon in polygons:
+            if len(polygon.points) < 3:
+                raise ValueError("A polygon needs at least three points")
+            vertices = [self._to_local(p.latitude_deg, p.longitude_deg)
+                        for p in polygon.points]
+            edges = [(*vertices[i - 1], *vertices[i])
+                     for i in range(len(vertices))]
+            self._fences.append(_Fence(
+                polygon, polygon.fence_type == FenceType.INCLUSION,
+                edges=edges))
+        for circle in circles:
+            self._fences.append(_Fence(
+                circle, circle.fence_type == FenceType.INCLUSION,
+                center=self._to_local(circle.point.latitude_deg,
+                                      circle.point.longitude_deg),
+                radius=circle.radius))
+
+        self._has_inclusions = any(f.inclusion for f in self._fences)
+        self._build_index(cell_size_m)
+
+    def _to_local(self, latitude_deg, longitude_deg):
+        return ((math.radians(latitude_deg) - self._lat0) * _EARTH_RADIUS_M,
+                (math.radians(longitude_deg) - self._lon0)
+                * self._cos_lat0 * _EARTH_RADIUS_M)
+
+    def _build_index(self, cell_size_m):
+        if cell_size_m is None:
+            sizes = sorted(max(f.bbox[2] - f.bbox[0], f.bbox[3] - f.bbox[1])
+                           for f in self._fences)
+            cell_size_m = sizes[len(sizes) // 2] if sizes else 1.0
+        self._cell_size = max(cell_size_m, 1.0)
+
+        self._grid = {}
+        self._large_fences = []
+        for fence in self._fences:
+            min_i, min_j = self._cell(fence.bbox[0], fence.bbox[1])
+            max_i, max_j = self._cell(fence.bbox[2], fence.bbox[3])
+            if (max_i - min_i + 1) * (max_j - min_j + 1) \
+                    > _MAX_CELLS_PER_FENCE:
+                self._large_fences.append(fence)
+                continue
+            for i in range(min_i, max_i + 1):
+                for j in range(min_j, max_j + 1):
+                    self._grid.setdefault((i, j), []).append(fence)
+
+    def _cell(self, x, y):
+        return (math.floor(x / self._cell_size),
+                math.floor(y / self._cell_size))
+
+    def _candidates(self, x, y):
+        cell_fences = self._grid.get(self._cell(x, y), [])
+        if self._large_fences:
+            return self._large_fences + cell_fences
+        return cell_fences
+
+    def containing_fences(self, latitude_deg, longitude_deg):
+        """
+         Fences containing a point.
+
+         Parameters
+         ----------
+         latitude_deg : double
+              Latitude in degrees (range: -90 to +90)
+
+         longitude_deg : double
+              Longitude in degrees (range: -180 to +180)
+
+         Returns
+         -------
+         fences : list
+              The `Polygon` and `Circle` objects containing the point
+        """
+        x, y = self._to_local(latitude_deg, longitude_deg)
+        return [fence.source for fence in self._candidates(x, y)
+                if fence.contains(x, y)]
+
+    def is_allowed(self, latitude_deg, longitude_deg):
+        """
+         Check if a point is allowed by the geofences.
+
+         Parameters
+         ----------
+         latitude_deg : double
+              Latitude in degrees (range: -90 to +90)
+
+         longitude_deg : double
+              Longitude in degrees (range: -180 to +180)
+
+         Returns
+         -------
+         is_allowed : bool
+              True if the point is inside the inclusion fences and outside
+              the exclusion fences
+        """
+        x, y = self._to_local(latitude_deg, longitude_deg)
+        included = not self._has_inclusions
+        for fence in self._candidates(x, y):
+            if fence.inclusion:
+                if not included and fence.contains(x, y):
+                    included = True
+            elif fence.contains(x, y):
+                return False
+        return included
+
+    def is_allowed_many(self, latitude_deg, longitude_deg):
+        """
+         Check many points at once.
+
+         This method requires NumPy.
+
+         Parameters
+         ----------
+         latitude_deg : array_like
+              Latitudes in degrees (range: -90 to +90), flattened
+
+         longitude_deg : array_like
+              Longitudes in degrees (range: -180 to +180)
+
+         Returns
+         -------
+         is_allowed : numpy.ndarray
+              Boolean array, True for the allowed points
+        """
+        if np is None:
+            raise ImportError("NumPy is required for batch geofence queries")
+
+        latitude_deg = np.asarray(latitude_deg, dtype=float).ravel()
+        longitude_deg = np.asarray(longitude_deg, dtype=float).ravel()
+        x = (np.radians(latitude_deg) - self._lat0) * _EARTH_RADIUS_M
+        y = (np.radians(longitude_deg) - self._lon0) \
+            * self._cos_lat0 * _EARTH_RADIUS_M
+
+        included = np.full(x.shape, not self._has_inclusions)
+        excluded = np.zeros(x.shape, dtype=bool)
+        for fence in self._fences:
+            candidates, inside = fence.contains_many(x, y)
+            if fence.inclusion:
+                included[candidates[inside]] = True
+            else:
+                excluded[candidates[inside]] = True
+        return included & ~excluded
+
+    async def monitor(self, positions):
+        """
+         Check a stream of positions.
+
+         Parameters
+         ----------
+         positions : async iterator
+              Stream of objects with `latitude_deg` and `longitude_deg`,
+              e.g. `drone.telemetry.position()`
+
+         Yields
+         -------
+         position_and_is_allowed : (Position, bool)
+              Every position, and whether it is allowed
+        """
+        async for position in positions:
+            yield position, self.is_allowed(position.latitude_deg,
+                                            position.longitude_deg)
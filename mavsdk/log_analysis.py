@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .ulog import ULog
+
+_SUMMARY_SUFFIX = ".summary.json"
+
+
+def _stats(values):
+    """ Mean, RMS and maximum of the finite values, None if there are none """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    return {
+        "mean": float(values.mean()),
+        "rms": float(np.sqrt(np.mean(values * values))),
+        "max": float(values.max()),
+    }
+
+
+def _topic(ulog, name):
+    """ Data of the first instance of a topic, None if it was not logged """
+    try:
+        data = ulog.data(name)
+    except KeyError:
+        return None
+    return data if len(data) else None
+
+
+def flight_metrics(ulog):
+    """
+     Duration and number of topics of a log.
+
+     Parameters
+     ----------
+     ulog : ULog
+          The log
+
+     Returns
+     -------
+     metrics : dict
+          "duration_s", and the logged "topics" count
+    """
+    return {
+        "duration_s": (ulog.end_timestamp - ulog.start_timestamp) * 1e-6,
+        "topics": len(ulog.topics),
+    }
+
+
+def vibration_metrics(ulog):
+    """
+     Vibration levels, from `vehicle_imu_status` or `sensor_combined`.
+
+     Parameters
+     ----------
+     ulog : ULog
+          The log
+
+     Returns
+     -------
+     metrics : dict
+          Statistics of the accelerometer vibration metric (in m/s^2) and
+          of the gyroscope one (in rad/s) if available, None if neither
+          topic was logged
+    """
+    imu_status = _topic(ulog, "vehicle_imu_status")
+    if imu_status is not None and \
+            "accel_vibration_metric" in imu_status.field_names:
+        return {
+            "accel": _stats(imu_status["accel_vibration_metric"]),
+            "gyro": _stats(imu_status["gyro_vibration_metric"])
+            if "gyro_vibration_metric" in imu_status.field_names else None,
+        }
+
+    sensors = _topic(ulog, "sensor_combined")
+    if sensors is None:
+        return None
+    # Deviation of the acceleration from its moving average
+    accel = np.asarray(sensors["accelerometer_m_s2"], dtype=float)
+    window = min(len(accel), 50)
+    kernel = np.ones(window) / window
+    deviation = np.stack([
+        accel[:, axis] - np.convolve(accel[:, axis], kernel, mode="same")
+        for axis in range(accel.shape[1])], axis=1)
+    return {
+        "accel": _stats(np.linalg.norm(deviation, axis=1)),
+        "gyro": None,
+    }
+
+
+def battery_metrics(ulog):
+    """
+     Battery usage, from `battery_status`.
+
+     Parameters
+     ----------
+     ulog : ULog
+          The log
+
+     Returns
+     -------
+     metrics : dict
+          Start, minimum and end voltage (in volts), discharged charge (in
+          mAh), start and end remaining fraction and current statistics (in
+          amperes), None if the topic was not logged
+    """
+    battery = _topic(ulog, "battery_status")
+    if battery is None:
+        return None
+    names = battery.field_names
+
+    def column(name):
+        if name not in names:
+            return None
+        values = np.asarray(battery[name], dtype=float)
+        values = values[np.isfinite(values)]
+        return values if len(values) else None
+
+    metrics = {}
+    voltage = column("voltage_v")
+    if voltage is not None:
+        metrics.update(voltage_start_v=float(voltage[0]),
+                       voltage_min_v=float(voltage.min()),
+                       voltage_end_v=float(voltage[-1]))
+    discharged = column("discharged_mah")
+    if discharged is not None:
+        metrics["discharged_mah"] = float(discharged[-1])
+    remaining = column("remaining")
+    if remaining is not None:
+        metrics.update(remaining_start=float(remaining[0]),
+                       remaining_end=float(remaining[-1]))
+    current = column("current_a")
+    if current is not None:
+        metrics["current_a"] = _stats(current)
+    return metrics
+
+
+def tracking_metrics(ulog):
+    """
+     Position tracking error, between `vehicle_local_position` and
+     `vehicle_local_position_setpoint`.
+
+     Parameters
+     ----------
+     ulog : ULog
+          The log
+
+     Returns
+     -------
+     metrics : dict
+          Statistics of the horizontal and vertical errors (in metres),
+          None if either topic was not logged
+    """
+    position = _topic(ulog, "vehicle_local_position")
+    setpoint = _topic(ulog, "vehicle_local_position_setpoint")
+    if position is None or setpoint is None:
+        return None
+
+    # Setpoints at the position timestamps, while a setpoint is active
+    timestamp = position.timestamp.astype(float)
+    setpoint_timestamp = setpoint.timestamp.astype(float)
+    active = (timestamp >= setpoint_timestamp[0]) & \
+        (timestamp <= setpoint_timestamp[-1])
+
+    errors = {}
+    for axis in ("x", "y", "z"):
+        values = np.asarray(setpoint[axis], dtype=float)
+        valid = np.isfinite(values)
+        if not valid.any():
+            errors[axis] = np.full(len(timestamp), np.nan)
+            continue
+        # The setpoint holds until the next one
+        index = np.searchsorted(setpoint_timestamp, timestamp, side="right")
+        index = np.clip(index - 1, 0, len(values) - 1)
+        errors[axis] = np.where(
+            active, np.asarray(position[axis], dtype=float) - values[index],
+            np.nan)
+
+    return {
+        "horizontal_m": _stats(np.hypot(errors["x"], errors["y"])),
+        "vertical_m": _stats(np.abs(errors["z"])),
+    }
+
+
+#: Metrics computed by default, by summary key
+DEFAULT_METRICS = {
+    "flight": flight_metrics,
+    "vibration": vibration_metrics,
+    "battery": battery_metrics,
+    "tracking": tracking_metrics,
+}
+
+
+def analyze_log(path, metrics=None):
+    """
+     Compute the metrics of a log.
+
+     A metric failing on a log gives an "error" entry instead of stopping
+     the analysis.
+
+     Parameters
+     ----------
+     path : str
+          Path of the ULog file
+
+     metrics : {str: callable}
+          Functions computing a metric from a `ULog`, by summary key.
+          Defaults to `DEFAULT_METRICS`.
+
+     Returns
+     -------
+     summary : dict
+          "log" (the file name), "path" (the absolute path), "size_bytes",
+          and the result of every metric
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+    """
+    summary = {"log": os.path.basename(path),
+               "path": os.path.abspath(path),
+               "size_bytes": os.path.getsize(path)}
+    with ULog(path) as ulog:
+        for key, metric in (metrics or DEFAULT_METRICS).items():
+            try:
+                summary[key] = metric(ulog)
+            except Exception as error:
+                summary[key] = {"error": f"{type(error).__name__}: {error}"}
+    return summary
+
+
+def _analyze_to_file(path, summary_path, metrics):
+    """ Worker entry point, returns the summary """
+    summary = analyze_log(path, metrics)
+    temporary_path = summary_path + ".tmp"
+    with open(temporary_path, "w") as summary_file:
+        json.dump(summary, summary_file, separators=(",", ":"))
+    os.replace(temporary_path, summary_path)
+    return summary
+
+
+class LogAnalysisPipeline:
+    """
+     Analysis of logs on all the cores, in worker processes.
+
+     Every log is analyzed by `analyze_log` in a `ProcessPoolExecutor`, and
+     its summary is written next to the other summaries, see
+     `summary_path`. Logs whose summary is newer than the log, and was made
+     from the same path, are not analyzed again. Workers only map the log
+     and extract the topics the metrics need; they are restarted after
+     `max_tasks_per_child` logs (Python 3.11 and later) to return their
+     memory, and at most `max_pending` logs are submitted at once.
+
+     Parameters
+     ----------
+     output_dir : str
+          Directory of the summaries, created if needed
+
+     max_workers : int
+          Number of worker processes, the number of cores by default
+
+     metrics : {str: callable}
+          Metrics to compute, see `analyze_log`. Functions must be defined
+          at module level to be sent to the workers.
+
+     max_tasks_per_child : int
+          Logs analyzed by a worker before it is replaced
+
+     max_pending : int
+          Logs submitted to the workers at once, twice the number of workers
+          by default
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+
+     """
+
+    def __init__(self, output_dir, max_workers=None, metrics=None,
+                 max_tasks_per_child=20, max_pending=None):
+        """ Initializes the LogAnalysisPipeline object """
+        if np is None:
+            raise ImportError("NumPy is required for log analysis")
+        self._output_dir = output_dir
+        self._metrics = metrics
+        max_workers = max_workers or os.cpu_count() or 1
+        options = {}
+        if sys.version_info >= (3, 11) and max_tasks_per_child:
+            options["max_tasks_per_child"] = max_tasks_per_child
+        self._executor = ProcessPoolExecutor(max_workers, **options)
+        self._pending = asyncio.Semaphore(max_pending or 2 * max_workers)
+
+    def summary_path(self, path):
+        """
+         Path of the summary of a log: `<log name>.<hash>.summary.json`,
+         where the hash is taken from the absolute path of the log, so that
+         logs of the same name in different directories do not collide.
+
+         Parameters
+         ----------
+         path : str
+              Path of the log
+
+         Returns
+         -------
+         summary_path : str
+              Path of the summary
+        """
+        path = os.path.abspath(path)
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(
+            self._output_dir,
+            f"{os.path.basename(path)}.{digest}{_SUMMARY_SUFFIX}")
+
+    async def analyze(self, path):
+        """
+         Analyze one log in a worker, unless its summary is up to date.
+
+         Parameters
+         ----------
+         path : str
+              Path of the log
+
+         Returns
+         -------
+         summary : dict
+              The summary, see `analyze_log`
+        """
+        summary_path = self.summary_path(path)
+        try:
+            if os.path.getmtime(summary_path) >= os.path.getmtime(path):
+                with open(summary_path, "r") as summary_file:
+                    summary = json.load(summary_file)
+                if summary.get("path") == os.path.abspath(path):
+                    return summary
+        except (AttributeError, OSError, ValueError):
+            pass
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        async with self._pending:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, _analyze_to_file, path, summary_path,
+                self._metrics)
+
+    async def run(self, paths):
+        """
+         Analyze logs as they arrive.
+
+         Parameters
+         ----------
+         paths : iterable or async iterable
+              Paths of the logs, e.g. fed as downloads complete
+
+         Yields
+         -------
+         path_and_summary : (str, dict)
+              Every log and its summary, in completion order. The summary
+              is {"error": ...} if the log could not be analyzed.
+        """
+        done = asyncio.Queue()
+        tasks = []
+
+        async def analyze(path):
+            try:
+                summary = await self.analyze(path)
+            except Exception as error:
+                summary = {"error": f"{type(error).__name__}: {error}"}
+            done.put_nowait((path, summary))
+
+        yielded = 0
+        if hasattr(paths, "__aiter__"):
+            async for path in paths:
+                tasks.append(asyncio.ensure_future(analyze(path)))
+                while not done.empty():
+                    yielded += 1
+                    yield done.get_nowait()
+        else:
+            tasks.extend(asyncio.ensure_future(analyze(path))
+                         for path in paths)
+
+        for _ in range(len(tasks) - yielded):
+            yield await done.get()
+
+    def close(self):
+        """ Stop the worker processes """
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
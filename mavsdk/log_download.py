@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import itertools
+import os
+from datetime import datetime, timezone
+
+from .log_files import LogFilesError, LogFilesResult
+
+# Failures caused by the link rather than by the log, worth retrying
+_RETRIED_RESULTS = (LogFilesResult.Result.TIMEOUT,
+                    LogFilesResult.Result.NO_SYSTEM)
+
+_PARTIAL_SUFFIX = ".part"
+
+
+def entry_timestamp(entry):
+    """
+     Date of a log entry as a POSIX timestamp.
+
+     Parameters
+     ----------
+     entry : Entry
+          The log entry
+
+     Returns
+     -------
+     timestamp : float
+          Seconds since the epoch, 0 if the date cannot be parsed
+    """
+    try:
+        date = datetime.strptime(entry.date, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
+        return 0.0
+    return date.replace(tzinfo=timezone.utc).timestamp()
+
+
+def default_filename(entry):
+    """
+     Local file name of a log entry: `log-<id>-<date>.ulg`.
+
+     Parameters
+     ----------
+     entry : Entry
+          The log entry
+
+     Returns
+     -------
+     filename : str
+          The file name
+    """
+    date = entry.date.replace(":", "-") if entry.date else "unknown"
+    return f"log-{entry.id}-{date}.ulg"
+
+
+# Sort keys of the priorities, lowest first
+_PRIORITIES = {
+    "newest": lambda entry: -entry_timestamp(entry),
+    "oldest": entry_timestamp,
+    "smallest": lambda entry: entry.size_bytes,
+    "largest": lambda entry: -entry.size_bytes,
+}
+
+
+class LogDownloadResult:
+    """
+     Outcome of the download of one log.
+
+     Parameters
+     ----------
+     entry : Entry
+          The log entry
+
+     path : str
+          Local path of the log
+
+     status : str
+          "downloaded", "skipped" if it was already present, or "failed"
+
+     attempts : int
+          Number of downloads attempted
+
+     error : Exception
+          Last error if the download failed, usually a `LogFilesError`,
+          else None
+
+     """
+
+    def __init__(
+            self,
+            entry,
+            path,
+            status,
+            attempts,
+            error=None):
+        """ Initializes the LogDownloadResult object """
+        self.entry = entry
+        self.path = path
+        self.status = status
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def success(self):
+        """ True if the log is present locally """
+        return self.status != "failed"
+
+    def __str__(self):
+        """ LogDownloadResult in string representation """
+        struct_repr = ", ".join([
+                "id: " + str(self.entry.id),
+                "path: " + str(self.path),
+                "status: " + str(self.status),
+                "attempts: " + str(self.attempts),
+                "error: " + str(self.error)
+                ])
+
+        return f"LogDownloadResult: [{struct_repr}]"
+
+
+class LogDownloadQueue:
+    """
+     Background download of the logs of one vehicle, by priority.
+
+     A vehicle sends one log at a time, so logs are downloaded one after
+     the other; harvesting a fleet runs one queue per vehicle concurrently,
+     see `fleet_progress`. Logs already present locally with the size of
+     the entry are skipped. A log is downloaded to a ".part" file which is
+     renamed once its size has been checked, so an interrupted download is
+     never taken for a complete log. Downloads failing because of the link
+     are retried from the start, the log protocol of the server cannot
+     continue from an offset. A log that failed is recorded in `results`
+     and can be queued again.
+
+     Parameters
+     ----------
+     log_files : LogFiles
+          LogFiles plugin of the vehicle (e.g. `drone.log_files`)
+
+     directory : str
+          Local directory of the logs, created if needed
+
+     priority : str or callable
+          "newest", "oldest", "smallest" or "largest" first, or a function
+          returning the sort key of an entry, lowest first
+
+     date_window : (datetime, datetime)
+          Optional start and end (UTC) of the log dates to download, either
+          can be None
+
+     filename : callable
+          Function returning the local file name of an entry, see
+          `default_filename`
+
+     retries : int
+          Number of retries per log
+
+     retry_delay_s : float
+          Delay before the first retry, doubled for every following retry
+          (in seconds)
+
+     """
+
+    def __init__(self, log_files, directory, priority="newest",
+                 date_window=None, filename=default_filename, retries=3,
+                 retry_delay_s=1.0):
+        """ Initializes the LogDownloadQueue object """
+        self._log_files = log_files
+        self._directory = directory
+        self._key = _PRIORITIES[priority] if isinstance(priority, str) \
+            else priority
+        self._window = (None, None)
+        if date_window is not None:
+            self._window = tuple(
+                None if date is None
+                else date.replace(tzinfo=date.tzinfo or timezone.utc)
+                .timestamp()
+                for date in date_window)
+        self._filename = filename
+        self._retries = retries
+        self._retry_delay_s = retry_delay_s
+        self._queue = asyncio.PriorityQueue()
+        self._counter = itertools.count()
+        self._queued_ids = set()
+        self._task = None
+        self._current = None
+        self._current_progress = 0.0
+
+        #: Outcome of every processed log, by id
+        self.results = {}
+        #: Bytes of the queued logs, including the processed ones but not
+        #: the failed ones
+        self.bytes_total = 0
+        #: Bytes of the logs downloaded or skipped
+        self.bytes_done = 0
+
+    @property
+    def progress(self):
+        """ Fraction of the queued bytes processed, between 0 and 1 """
+        if self.bytes_total == 0:
+            return 1.0
+        done = self.bytes_done
+        if self._current is not None:
+            done += self._current_progress * self._current.size_bytes
+        return min(done / self.bytes_total, 1.0)
+
+    def path(self, entry):
+        """
+         Local path of the log of an entry.
+
+         Parameters
+         ----------
+         entry : Entry
+              The log entry
+
+         Returns
+         -------
+         path : str
+              The local path
+        """
+        return os.path.join(self._directory, self._filename(entry))
+
+    def add(self, entries):
+        """
+         Queue log entries. Entries outside the date window, or already
+         queued, are ignored.
+
+         Parameters
+         ----------
+         entries : [Entry]
+              The log entries
+
+         Returns
+         -------
+         count : int
+              Number of entries queued
+        """
+        start, end = self._window
+        count = 0
+        for entry in entries:
+            if entry.id in self._queued_ids:
+                continue
+            if start is not None or end is not None:
+                timestamp = entry_timestamp(entry)
+                if (start is not None and timestamp < start) or \
+                        (end is not None and timestamp > end):
+                    continue
+            self._queued_ids.add(entry.id)
+            self.bytes_total += entry.size_bytes
+            self._queue.put_nowait(
+                (self._key(entry), next(self._counter), entry))
+            count += 1
+        return count
+
+    async def fetch(self):
+        """
+         Queue all the logs of the vehicle.
+
+         Returns
+         -------
+         count : int
+              Number of entries queued
+
+         Raises
+         ------
+         LogFilesError
+             If the entries cannot be retrieved.
+        """
+        try:
+            entries = await self._log_files.get_entries()
+        except LogFilesError as error:
+            if error._result.result == LogFilesResult.Result.NO_LOGFILES:
+                return 0
+            raise
+        return self.add(entries)
+
+    def start(self):
+        """
+         Start downloading in the background. Entries can still be added.
+
+         Returns
+         -------
+         task : asyncio.Task
+              The background task, running until `stop`
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def join(self):
+        """
+         Wait until every queued log is processed.
+
+         Returns
+         -------
+         results : {int: LogDownloadResult}
+              Outcome of every processed log, by id
+        """
+        await self._queue.join()
+        return self.results
+
+    async def stop(self):
+        """ Stop the background downloads, the current one is aborted """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            _, _, entry = await self._queue.get()
+            try:
+                try:
+                    result = await self.download(entry)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    result = LogDownloadResult(entry, self.path(entry),
+                                               "failed", 0, error)
+                self.results[entry.id] = result
+                if result.success:
+                    self.bytes_done += entry.size_bytes
+                else:
+                    # The entry can be queued again
+                    self._queued_ids.discard(entry.id)
+                    self.bytes_total -= entry.size_bytes
+            finally:
+                self._queue.task_done()
+
+    async def download(self, entry):
+        """
+         Download one log now, unless it is already present.
+
+         Parameters
+         ----------
+         entry : Entry
+              The log entry
+
+         Returns
+         -------
+         result : LogDownloadResult
+              The outcome
+        """
+        path = self.path(entry)
+        if _size(path) == entry.size_bytes:
+            return LogDownloadResult(entry, path, "skipped", 0)
+
+        os.makedirs(self._directory, exist_ok=True)
+        partial_path = path + _PARTIAL_SUFFIX
+        delay = self._retry_delay_s
+        attempts = 0
+        self._current = entry
+        try:
+            while True:
+                attempts += 1
+                self._current_progress = 0.0
+                try:
+                    async for progress in self._log_files.download_log_file(
+                            entry, partial_path):
+                        self._current_progress = progress.progress
+                except LogFilesError as error:
+                    if error._result.result not in _RETRIED_RESULTS \
+                            or attempts > self._retries:
+                        return LogDownloadResult(entry, path, "failed",
+                                                 attempts, error)
+                else:
+                    if _size(partial_path) == entry.size_bytes:
+                        os.replace(partial_path, path)
+                        return LogDownloadResult(entry, path, "downloaded",
+                                                 attempts)
+                    if attempts > self._retries:
+                        return LogDownloadResult(entry, path, "failed",
+                                                 attempts)
+
+                await asyncio.sleep(delay)
+                delay *= 2
+        finally:
+            self._current = None
+
+
+def fleet_progress(queues):
+    """
+     Aggregate progress of the queues of several vehicles.
+
+     Parameters
+     ----------
+     queues : [LogDownloadQueue]
+          The queues
+
+     Returns
+     -------
+     progress : float
+          Fraction of all the queued bytes processed, between 0 and 1
+    """
+    total = sum(queue.bytes_total for queue in queues)
+    if total == 0:
+        return 1.0
+    return sum(queue.progress * queue.bytes_total for queue in queues) / total
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
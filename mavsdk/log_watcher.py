@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+
+from .log_files import LogFilesError, LogFilesResult
+
+_INDEX_FORMAT = 1
+
+
+class LogIndex:
+    """
+     Persisted index of the log entries already harvested from a vehicle.
+
+     Entry ids are only unique on one vehicle, use one index per vehicle.
+
+     Parameters
+     ----------
+     path : str
+          Path of the index file, loaded if it exists
+
+     """
+
+    def __init__(self, path):
+        """ Initializes the LogIndex object """
+        self._path = path
+        # Id -> (date, size in bytes)
+        self._entries = {}
+        try:
+            with open(path, "r") as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            return
+        if index.get("format") != _INDEX_FORMAT:
+            raise ValueError(f"'{path}' is not a log index")
+        self._entries = {int(entry_id): (date, size_bytes)
+                         for entry_id, (date, size_bytes)
+                         in index["entries"].items()}
+
+    def __len__(self):
+        """ Number of known entries """
+        return len(self._entries)
+
+    def __contains__(self, entry):
+        """ True if the entry is known with the same date and size """
+        return self._entries.get(entry.id) == (entry.date, entry.size_bytes)
+
+    def new_entries(self, entries):
+        """
+         Entries that are not in the index, or whose date or size changed
+         (a log still being written, or ids reused after an erase).
+
+         Parameters
+         ----------
+         entries : [Entry]
+              Entries returned by `LogFiles.get_entries`
+
+         Returns
+         -------
+         entries : [Entry]
+              The new or changed entries
+        """
+        return [entry for entry in entries if entry not in self]
+
+    def add(self, entries):
+        """
+         Record entries as harvested, and save the index.
+
+         Parameters
+         ----------
+         entries : [Entry]
+              The harvested entries
+        """
+        for entry in entries:
+            self._entries[entry.id] = (entry.date, entry.size_bytes)
+        self.save()
+
+    def save(self):
+        """ Save the index, replacing the file atomically """
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump({
+                "format": _INDEX_FORMAT,
+                "entries": {str(entry_id): list(value)
+                            for entry_id, value in self._entries.items()},
+            }, index_file)
+        os.replace(temporary_path, self._path)
+
+
+class LogWatcher:
+    """
+     Detection of new logs on a vehicle, against a `LogIndex`.
+
+     `LogFiles.get_entries` always lists every log, so the watcher only
+     lists them when a new log can exist: after a reconnection and after a
+     landing, see `watch`. The entries it yields are only added to the
+     index with `mark_harvested`, so that a log that failed to download is
+     yielded again on the next scan.
+
+     Parameters
+     ----------
+     log_files : LogFiles
+          LogFiles plugin of the vehicle (e.g. `drone.log_files`)
+
+     index : LogIndex
+          Index of the harvested logs
+
+     """
+
+    def __init__(self, log_files, index):
+        """ Initializes the LogWatcher object """
+        self._log_files = log_files
+        self.index = index
+
+    async def scan(self):
+        """
+         List the logs of the vehicle, and compare them with the index.
+
+         Returns
+         -------
+         entries : [Entry]
+              The new or changed entries
+
+         Raises
+         ------
+         LogFilesError
+             If the entries cannot be retrieved.
+        """
+        try:
+            entries = await self._log_files.get_entries()
+        except LogFilesError as error:
+            if error._result.result == LogFilesResult.Result.NO_LOGFILES:
+                return []
+            raise
+        return self.index.new_entries(entries)
+
+    def mark_harvested(self, entries):
+        """
+         Record entries as harvested, they are not yielded again.
+
+         Parameters
+         ----------
+         entries : [Entry]
+              The harvested entries
+        """
+        self.index.add(entries)
+
+    async def watch(self, core, telemetry, scan_on_start=True):
+        """
+         Scan on every reconnection and landing.
+
+         Parameters
+         ----------
+         core : Core
+              Core plugin of the vehicle (e.g. `drone.core`)
+
+         telemetry : Telemetry
+              Telemetry plugin of the vehicle (e.g. `drone.telemetry`)
+
+         scan_on_start : bool
+              Scan once before waiting for an event
+
+         Yields
+         -------
+         entries : [Entry]
+              New or changed entries, when there are any
+        """
+        triggers = asyncio.Queue()
+
+        async def reconnections():
+            was_connected = None
+            async for state in core.connection_state():
+                if state.is_connected and was_connected is False:
+                    triggers.put_nowait("reconnected")
+                was_connected = state.is_connected
+
+        async def landings():
+            was_in_air = False
+            async for in_air in telemetry.in_air():
+                if was_in_air and not in_air:
+                    triggers.put_nowait("landed")
+                was_in_air = in_air
+
+        tasks = [asyncio.ensure_future(reconnections()),
+                 asyncio.ensure_future(landings())]
+        if scan_on_start:
+            triggers.put_nowait("start")
+        try:
+            while True:
+                getter = asyncio.ensure_future(triggers.get())
+                done, _ = await asyncio.wait(
+                    tasks + [getter], return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    # A stream ended or failed
+                    for task in done:
+                        task.result()
+                    return
+
+                # Events arriving together trigger a single scan
+                while not triggers.empty():
+                    triggers.get_nowait()
+                entries = await self.scan()
+                if entries:
+                    yield entries
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import math
+import struct
+import threading
+import time
+
+from .manual_control import ManualControlError
+
+#: Wire format of `UdpInputSource`: x, y, z and r as little-endian floats
+UDP_INPUT_FORMAT = struct.Struct("<4f")
+
+
+def _clamp(value):
+    if math.isnan(value):
+        return 0.0
+    return max(-1.0, min(1.0, float(value)))
+
+
+class AxisMapping:
+    """
+     Conversion of raw joystick axes to manual control input.
+
+     Parameters
+     ----------
+     x_axis, y_axis, z_axis, r_axis : int
+          Index of the axis of each input: x (pitch, forwards positive),
+          y (roll, right positive), z (throttle) and r (yaw, clockwise
+          positive)
+
+     inverted : [str]
+          Inputs whose axis is reversed, e.g. ("x", "z") for a stick
+          reporting forwards and up as negative
+
+     deadzone : float
+          Deflections below it around the center are set to 0, the rest of
+          the range is rescaled to stay continuous
+
+     throttle_zero_to_one : bool
+          Map z from -1..1 to 0..1, as expected by multicopters
+
+     """
+
+    def __init__(self, x_axis=1, y_axis=0, z_axis=2, r_axis=3,
+                 inverted=(), deadzone=0.05, throttle_zero_to_one=True):
+        """ Initializes the AxisMapping object """
+        self.axes = (x_axis, y_axis, z_axis, r_axis)
+        self.signs = tuple(-1.0 if name in inverted else 1.0
+                           for name in ("x", "y", "z", "r"))
+        self.deadzone = deadzone
+        self.throttle_zero_to_one = throttle_zero_to_one
+
+    def __call__(self, axes):
+        """
+         Convert raw axes.
+
+         Parameters
+         ----------
+         axes : [float]
+              Axis values between -1 and 1
+
+         Returns
+         -------
+         input : (float, float, float, float)
+              x, y, z and r
+        """
+        deadzone = self.deadzone
+        values = []
+        for index, sign in zip(self.axes, self.signs):
+            value = _clamp(axes[index] * sign)
+            magnitude = abs(value)
+            if magnitude <= deadzone:
+                value = 0.0
+            else:
+                value = math.copysign(
+                    (magnitude - deadzone) / (1.0 - deadzone), value)
+            values.append(value)
+        if self.throttle_zero_to_one:
+            values[2] = (values[2] + 1.0) / 2.0
+        return tuple(values)
+
+
+class ThreadedInputSource:
+    """
+     Input source polling a blocking reader in a thread.
+
+     Device reads (e.g. a joystick through pygame or evdev) run outside of
+     the event loop, so they never delay the sends; the pump only picks up
+     the latest value.
+
+     Parameters
+     ----------
+     read : callable
+          Blocking function returning the next raw input (e.g. the joystick
+          axes), or None if there is none
+
+     mapping : callable
+          Optional conversion of the raw input to (x, y, z, r), e.g. an
+          `AxisMapping`
+
+     timeout_s : float
+          Age after which the latest input is no longer used (in seconds)
+
+     """
+
+    def __init__(self, read, mapping=None, timeout_s=0.5):
+        """ Initializes the ThreadedInputSource object """
+        self._read = read
+        self._mapping = mapping
+        self._timeout_ns = int(timeout_s * 1e9)
+        self._latest = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    def start(self):
+        """ Start the reading thread """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """ Stop the reading thread, after its current read """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            try:
+                raw = self._read()
+            except Exception as error:
+                self._logger.warning(f"Input read failed: {error}")
+                time.sleep(0.1)
+                continue
+            if raw is None:
+                continue
+            value = self._mapping(raw) if self._mapping else tuple(raw)
+            # A single assignment, atomic for the reading side
+            self._latest = (time.monotonic_ns(), value)
+
+    def __call__(self):
+        """ Latest input, None if there is none or it is too old """
+        latest = self._latest
+        if latest is None \
+                or time.monotonic_ns() - latest[0] > self._timeout_ns:
+            return None
+        return latest[1]
+
+
+class _UdpInputProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, source):
+        self._source = source
+
+    def datagram_received(self, data, addr):
+        self._source.feed(data)
+
+
+class UdpInputSource:
+    """
+     Input source receiving datagrams of `UDP_INPUT_FORMAT`.
+
+     Datagrams are decoded when they arrive and only the latest one is
+     kept. Datagrams of another size are rejected.
+
+     Parameters
+     ----------
+     timeout_s : float
+          Age after which the latest input is no longer used (in seconds)
+
+     """
+
+    def __init__(self, timeout_s=0.5):
+        """ Initializes the UdpInputSource object """
+        self._timeout_ns = int(timeout_s * 1e9)
+        self._latest = None
+        self._transport = None
+
+        #: Number of datagrams accepted
+        self.received = 0
+        #: Number of datagrams rejected
+        self.rejected = 0
+
+    async def open(self, host="127.0.0.1", port=5006):
+        """
+         Bind the UDP socket.
+
+         Datagrams are not authenticated: anyone able to send to the
+         socket controls the vehicle. It only listens on the loopback
+         interface by default, pass "0.0.0.0" to accept input from other
+         hosts.
+
+         Parameters
+         ----------
+         host : str
+              Address to listen on
+
+         port : int
+              UDP port to listen on
+        """
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpInputProtocol(self), local_addr=(host, port))
+
+    def close(self):
+        """
+         Close the UDP socket.
+        """
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def feed(self, data):
+        """
+         Hand a datagram to the source, as if received on the socket.
+
+         Parameters
+         ----------
+         data : bytes-like
+              The received datagram
+        """
+        if len(data) != UDP_INPUT_FORMAT.size:
+            self.rejected += 1
+            return
+        self.received += 1
+        self._latest = (time.monotonic_ns(), UDP_INPUT_FORMAT.unpack(data))
+
+    def __call__(self):
+        """ Latest input, None if there is none or it is too old """
+        latest = self._latest
+        if latest is None \
+                or time.monotonic_ns() - latest[0] > self._timeout_ns:
+            return None
+        return latest[1]
+
+
+class ManualControlPumpStats:
+    """
+     Counters and timings of a `ManualControlPump`.
+
+     Lateness is the time between the scheduled start of a period and its
+     actual start: it grows when other tasks hold the event loop.
+
+     """
+
+    def __init__(self):
+        """ Initializes the ManualControlPumpStats object """
+        #: Number of periods run
+        self.ticks = 0
+        #: Number of inputs sent
+        self.sent = 0
+        #: Number of unchanged inputs not sent
+        self.skipped = 0
+        #: Number of periods without input from the source
+        self.no_input = 0
+        #: Number of sends that failed
+        self.failed = 0
+        #: Number of periods missed entirely, because of a late loop or a
+        #: slow send
+        self.missed = 0
+        #: Lateness of the last period (in seconds)
+        self.lateness_s = None
+        #: Highest lateness seen so far (in seconds)
+        self.max_lateness_s = 0.0
+        #: Duration of the last send (in seconds)
+        self.send_latency_s = None
+        #: Longest send seen so far (in seconds)
+        self.max_send_latency_s = 0.0
+
+    def __str__(self):
+        """ ManualControlPumpStats in string representation """
+        struct_repr = ", ".join([
+                "ticks: " + str(self.ticks),
+                "sent: " + str(self.sent),
+                "skipped: " + str(self.skipped),
+                "no_input: " + str(self.no_input),
+                "failed: " + str(self.failed),
+                "missed: " + str(self.missed),
+                "lateness_s: " + str(self.lateness_s),
+                "max_lateness_s: " + str(self.max_lateness_s),
+                "send_latency_s: " + str(self.send_latency_s),
+                "max_send_latency_s: " + str(self.max_send_latency_s)
+                ])
+
+        return f"ManualControlPumpStats: [{struct_repr}]"
+
+
+class ManualControlPump:
+    """
+     Sends manual control input at a fixed rate.
+
+     Every period, the source is sampled and its input is sent with
+     `ManualControl.set_manual_control_input`. Periods are scheduled on
+     absolute deadlines, so the rate does not drift with the send
+     durations; periods that cannot be caught up are skipped rather than
+     sent in a burst.
+
+     A source is a callable returning (x, y, z, r), or None when it has no
+     input: a plain function, or `UdpInputSource` and `ThreadedInputSource`
+     for inputs read outside of the pump. Sources must not block, the pump
+     shares the event loop with the gRPC channel. Nothing is sent while a
+     source has no input, so the vehicle's RC loss failsafe triggers if it
+     lasts.
+
+     Parameters
+     ----------
+     manual_control : ManualControl
+          ManualControl plugin of the vehicle (e.g. `drone.manual_control`)
+
+     source : callable
+          The input source
+
+     rate_hz : float
+          Rate at which the source is sampled
+
+     keepalive_hz : float
+          If set, an input equal to the last sent one is only sent again at
+          this rate. It must stay above the RC loss detection rate of the
+          vehicle (10 Hz is a good minimum).
+
+     """
+
+    def __init__(self, manual_control, source, rate_hz=50.0,
+                 keepalive_hz=None):
+        """ Initializes the ManualControlPump object """
+        self._manual_control = manual_control
+        self._source = source
+        self._period_s = 1.0 / rate_hz
+        self._keepalive_s = None if keepalive_hz is None \
+            else 1.0 / keepalive_hz
+        self._last_input = None
+        self._last_sent = None
+        self._task = None
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+        #: Timing statistics
+        self.stats = ManualControlPumpStats()
+
+    def start(self):
+        """
+         Start sending in the background.
+
+         Returns
+         -------
+         task : asyncio.Task
+              The background task, running until `stop`
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """ Stop sending """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """
+         Sample and send the input, forever.
+        """
+        loop = asyncio.get_running_loop()
+        period = self._period_s
+        stats = self.stats
+        deadline = loop.time()
+        while True:
+            now = loop.time()
+            lateness = max(now - deadline, 0.0)
+            if lateness >= period:
+                missed = int(lateness // period)
+                stats.missed += missed
+                deadline += missed * period
+                lateness -= missed * period
+            stats.ticks += 1
+            stats.lateness_s = lateness
+            stats.max_lateness_s = max(stats.max_lateness_s, lateness)
+
+            await self._tick(loop)
+
+            deadline += period
+            await asyncio.sleep(max(deadline - loop.time(), 0.0))
+
+    async def _tick(self, loop):
+        stats = self.stats
+        value = self._source()
+        if value is None:
+            stats.no_input += 1
+            return
+
+        x, y, z, r = (_clamp(axis) for axis in value)
+        now = loop.time()
+        if self._keepalive_s is not None \
+                and (x, y, z, r) == self._last_input \
+                and now - self._last_sent < self._keepalive_s:
+            stats.skipped += 1
+            return
+
+        try:
+            await self._manual_control.set_manual_control_input(x, y, z, r)
+        except ManualControlError as error:
+            stats.failed += 1
+            self._logger.warning(f"Manual control send failed: {error}")
+            return
+
+        self._last_input = (x, y, z, r)
+        self._last_sent = now
+        stats.sent += 1
+        stats.send_latency_s = loop.time() - now
+        stats.max_send_latency_s = max(stats.max_send_latency_s,
+                                       stats.send_latency_s)
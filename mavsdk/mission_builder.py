@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+from enum import Enum
+
+try:
+    # NumPy is optional for the package, but required by this module
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import mission_pb2
+from .mission import MissionItem, MissionPlan
+
+# Every field of mission_pb2.MissionItem, in field number order, with its
+# wire type and the NumPy type of its encoded value. Encoding every field
+# with a fixed width gives every item the same size, which allows encoding
+# all items at once with a structured array.
+_FIELDS = (
+    ("latitude_deg", 1, "<f8"),
+    ("longitude_deg", 1, "<f8"),
+    ("relative_altitude_m", 5, "<f4"),
+    ("speed_m_s", 5, "<f4"),
+    ("is_fly_through", 0, "u1"),
+    ("gimbal_pitch_deg", 5, "<f4"),
+    ("gimbal_yaw_deg", 5, "<f4"),
+    ("camera_action", 0, "u1"),
+    ("loiter_time_s", 5, "<f4"),
+    ("camera_photo_interval_s", 1, "<f8"),
+    ("acceptance_radius_m", 5, "<f4"),
+    ("yaw_deg", 5, "<f4"),
+    ("camera_photo_distance_m", 5, "<f4"),
+    ("vehicle_action", 0, "u1"),
+)
+
+if np is not None:
+    _ITEM_DTYPE = np.dtype(
+        [("item_tag", "u1"), ("item_length", "u1")]
+        + [field for name, _, value_type in _FIELDS
+           for field in ((name + "_tag", "u1"), (name, value_type))])
+    _ITEM_LENGTH = _ITEM_DTYPE.itemsize - 2
+else:
+    _ITEM_DTYPE = None
+    _ITEM_LENGTH = None
+
+# Number of values of each enum, single byte varints must stay below 128
+_ENUM_SIZES = {
+    "camera_action": len(MissionItem.CameraAction),
+    "vehicle_action": len(MissionItem.VehicleAction),
+}
+
+
+class MissionArrays:
+    """
+     Mission plan stored as columns of NumPy arrays.
+
+     It can be passed to `Mission.upload_mission` in place of a
+     `MissionPlan`: all the items are encoded at once into the protobuf
+     message, without creating a `MissionItem` per waypoint. The uploaded
+     mission is the same as with the equivalent `MissionPlan`.
+
+     Every parameter is either an array with one value per item, or a
+     scalar used for all items. Enum parameters take the SDK enum values or
+     their integer protobuf values.
+
+     This class requires NumPy.
+
+     Parameters
+     ----------
+     latitude_deg : array_like
+          Latitude in degrees (range: -90 to +90)
+
+     longitude_deg : array_like
+          Longitude in degrees (range: -180 to +180)
+
+     relative_altitude_m : array_like
+          Altitude relative to takeoff altitude in metres
+
+     speed_m_s : array_like
+          Speed to use after this mission item (in metres/second)
+
+     is_fly_through : array_like
+          True will make the drone fly through without stopping, while false
+          will make the drone stop on the waypoint
+
+     gimbal_pitch_deg : array_like
+          Gimbal pitch (in degrees)
+
+     gimbal_yaw_deg : array_like
+          Gimbal yaw (in degrees)
+
+     camera_action : array_like
+          Camera action to trigger at this mission item
+
+     loiter_time_s : array_like
+          Loiter time (in seconds)
+
+     camera_photo_interval_s : array_like
+          Camera photo interval to use after this mission item (in seconds)
+
+     acceptance_radius_m : array_like
+          Radius for completing a mission item (in metres)
+
+     yaw_deg : array_like
+          Absolute yaw angle (in degrees)
+
+     camera_photo_distance_m : array_like
+          Camera photo distance to use after this mission item (in meters)
+
+     vehicle_action : array_like
+          Vehicle action to trigger at this mission item.
+
+     """
+
+    def __init__(
+            self,
+            latitude_deg,
+            longitude_deg,
+            relative_altitude_m,
+            speed_m_s=float("nan"),
+            is_fly_through=True,
+            gimbal_pitch_deg=float("nan"),
+            gimbal_yaw_deg=float("nan"),
+            camera_action=0,
+            loiter_time_s=float("nan"),
+            camera_photo_interval_s=float("nan"),
+            acceptance_radius_m=float("nan"),
+            yaw_deg=float("nan"),
+            camera_photo_distance_m=float("nan"),
+            vehicle_action=0):
+        """ Initializes the MissionArrays object """
+        if np is None:
+            raise ImportError("NumPy is required for MissionArrays")
+        values = locals()
+        latitude_deg = np.asarray(latitude_deg)
+        if latitude_deg.ndim != 1:
+            raise ValueError("latitude_deg must be a one-dimensional array")
+        count = len(latitude_deg)
+
+        self._columns = {}
+        for name, _, value_type in _FIELDS:
+            value = values[name]
+            if isinstance(value, Enum):
+                value = value.translate_to_rpc()
+            try:
+                column = np.broadcast_to(
+                    np.asarray(value, dtype=value_type), (count,))
+            except ValueError:
+                raise ValueError(
+                    f"{name} must be a scalar or have {count} values")
+            if name in _ENUM_SIZES and np.any(column >= _ENUM_SIZES[name]):
+                raise ValueError(f"Invalid {name} value")
+            self._columns[name] = column
+
+    def __len__(self):
+        """ Number of mission items """
+        return len(self._columns["latitude_deg"])
+
+    def __getattr__(self, name):
+        """ Column of a MissionItem field, e.g. `latitude_deg` """
+        try:
+            return self.__dict__["_columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def encode(self):
+        """
+         Encode the items as a serialized `mission_pb2.MissionPlan`.
+
+         Returns
+         -------
+         data : bytes
+              The serialized mission plan
+        """
+        items = np.empty(len(self), dtype=_ITEM_DTYPE)
+        # mission_items is field 1 of MissionPlan, length-delimited
+        items["item_tag"] = 0x0a
+        items["item_length"] = _ITEM_LENGTH
+        for number, (name, wire_type, _) in enumerate(_FIELDS, 1):
+            items[name + "_tag"] = number << 3 | wire_type
+            items[name] = self._columns[name]
+        return items.tobytes()
+
+    def translate_to_rpc(self, rpcMissionPlan):
+        """ Translates this object into its gRPC equivalent """
+        rpcMissionPlan.MergeFromString(self.encode())
+
+    def to_upload_request(self):
+        """
+         Build the request sent by `Mission.upload_mission`.
+
+         Returns
+         -------
+         request : mission_pb2.UploadMissionRequest
+              The upload request
+        """
+        request = mission_pb2.UploadMissionRequest()
+        self.translate_to_rpc(request.mission_plan)
+        return request
+
+    def to_mission_plan(self):
+        """
+         Convert to a regular mission plan, one `MissionItem` per item.
+
+         Returns
+         -------
+         mission_plan : MissionPlan
+              The equivalent mission plan
+        """
+        rpc_mission_plan = mission_pb2.MissionPlan()
+        self.translate_to_rpc(rpc_mission_plan)
+        return MissionPlan.translate_from_rpc(rpc_mission_plan)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+
+from . import mission_pb2, mission_raw_pb2
+from .mission import MissionError
+from .mission_raw import MissionRawError
+
+
+def mission_plan_digest(mission_plan):
+    """
+     Content hash of a mission plan.
+
+     Parameters
+     ----------
+     mission_plan : MissionPlan
+          The mission plan
+
+     Returns
+     -------
+     digest : str
+          Hex digest, equal for plans that upload the same items
+    """
+    rpc_mission_plan = mission_pb2.MissionPlan()
+    mission_plan.translate_to_rpc(rpc_mission_plan)
+    return _digest(b"mission", rpc_mission_plan)
+
+
+def mission_raw_digest(mission_items):
+    """
+     Content hash of a list of raw mission items.
+
+     The `current` flag of the items is ignored, as it changes while the
+     mission is flown.
+
+     Parameters
+     ----------
+     mission_items : [MissionItem]
+          The raw mission items
+
+     Returns
+     -------
+     digest : str
+          Hex digest, equal for lists that upload the same items
+    """
+    request = mission_raw_pb2.UploadMissionRequest()
+    for elem in mission_items:
+        rpc_elem = request.mission_items.add()
+        elem.translate_to_rpc(rpc_elem)
+        rpc_elem.current = 0
+    return _digest(b"mission_raw", request)
+
+
+def _digest(kind, message):
+    digest = hashlib.sha256(kind)
+    digest.update(message.SerializeToString(deterministic=True))
+    return digest.hexdigest()
+
+
+class MissionUploadCache:
+    """
+     Skips mission uploads when the vehicle already has the same mission.
+
+     The cache remembers the content hash of the last mission confirmed on
+     the vehicle, either because it was uploaded through the cache or
+     because it was downloaded and compared. Uploading an identical mission
+     again is then a no-op.
+
+     The cache does not know what is on the vehicle after it is created,
+     after a failed upload or after the mission was changed by someone else
+     (see `watch`). In that state, the mission is downloaded and compared
+     first if `verify_with_download` is set, and uploaded otherwise.
+
+     Use one cache per vehicle, and do not mix it with direct uploads.
+
+     Parameters
+     ----------
+     mission : Mission
+          Mission plugin of the vehicle (e.g. `drone.mission`)
+
+     mission_raw : MissionRaw
+          MissionRaw plugin of the vehicle (e.g. `drone.mission_raw`)
+
+     verify_with_download : bool
+          Download the mission to compare it when the vehicle state is
+          unknown, instead of uploading unconditionally
+
+     """
+
+    def __init__(self, mission, mission_raw, verify_with_download=True):
+        """ Initializes the MissionUploadCache object """
+        self._mission = mission
+        self._mission_raw = mission_raw
+        self._verify_with_download = verify_with_download
+        self._digest = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def digest(self):
+        """ Digest of the mission confirmed on the vehicle, or None """
+        return self._digest
+
+    def invalidate(self):
+        """
+         Forget the mission confirmed on the vehicle.
+        """
+        self._digest = None
+
+    async def watch(self):
+        """
+         Invalidate the cache whenever the mission changes on the vehicle.
+
+         Runs forever, and is meant to be run as a background task.
+        """
+        async for mission_changed in self._mission_raw.mission_changed():
+            if mission_changed:
+                self.invalidate()
+
+    async def upload_mission(self, mission_plan):
+        """
+         Upload a mission plan, unless the vehicle already has it.
+
+         Parameters
+         ----------
+         mission_plan : MissionPlan
+              The mission plan
+
+         Returns
+         -------
+         uploaded : bool
+              False if the upload was skipped
+
+         Raises
+         ------
+         MissionError
+             If the upload fails.
+        """
+        digest = mission_plan_digest(mission_plan)
+        async with self._lock:
+            if await self._is_on_vehicle(digest, self._download_digest):
+                return False
+
+            self._digest = None
+            await self._mission.upload_mission(mission_plan)
+            self._digest = digest
+            return True
+
+    async def upload_mission_raw(self, mission_items):
+        """
+         Upload raw mission items, unless the vehicle already has them.
+
+         Parameters
+         ----------
+         mission_items : [MissionItem]
+              The raw mission items
+
+         Returns
+         -------
+         uploaded : bool
+              False if the upload was skipped
+
+         Raises
+         ------
+         MissionRawError
+             If the upload fails.
+        """
+        digest = mission_raw_digest(mission_items)
+        async with self._lock:
+            if await self._is_on_vehicle(digest, self._download_raw_digest):
+                return False
+
+            self._digest = None
+            await self._mission_raw.upload_mission(mission_items)
+            self._digest = digest
+            return True
+
+    async def clear_mission(self):
+        """
+         Clear the mission on the vehicle, and the cache.
+
+         Raises
+         ------
+         MissionRawError
+             If the request fails.
+        """
+        async with self._lock:
+            self._digest = None
+            await self._mission_raw.clear_mission()
+
+    async def _is_on_vehicle(self, digest, download_digest):
+        if self._digest is None and self._verify_with_download:
+            self._digest = await download_digest()
+        return self._digest == digest
+
+    async def _download_digest(self):
+        try:
+            return mission_plan_digest(await self._mission.download_mission())
+        except MissionError:
+            # E.g. the vehicle has items not supported by the Mission API
+            return None
+
+    async def _download_raw_digest(self):
+        try:
+            return mission_raw_digest(
+                await self._mission_raw.download_mission())
+        except MissionRawError:
+            return None
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+import math
+
+from .mission import MissionItem, MissionPlan
+from .mission_raw import MissionItem as RawMissionItem
+
+_EARTH_RADIUS_M = 6371000.0
+
+# MAVLink commands and frames looked at by the raw simplification
+_MAV_CMD_NAV_WAYPOINT = 16
+_MAV_CMD_DO_JUMP = 177
+_MAV_MISSION_TYPE_MISSION = 0
+_GLOBAL_FRAMES = (0, 3, 5, 6, 10, 11)
+
+_NO_POSITION = (math.nan, math.nan, math.nan)
+
+
+def simplify_mission_plan(mission_plan, tolerance_m=1.0):
+    """
+     Remove waypoints that do not change the flown path by more than a
+     tolerance.
+
+     Runs of plain fly-through waypoints are simplified in 3D with the
+     Douglas-Peucker algorithm. Items that trigger a camera or vehicle
+     action, loiter, stop, or change any setting compared to the previous
+     item (speed, gimbal, yaw, photo interval or distance, acceptance
+     radius) are always kept, as are the first and last items.
+
+     Parameters
+     ----------
+     mission_plan : MissionPlan
+          The mission plan to simplify
+
+     tolerance_m : float
+          Maximum distance between a removed waypoint and the simplified
+          path (in metres)
+
+     Returns
+     -------
+     mission_plan : MissionPlan
+          A new mission plan, sharing the kept items with the input
+    """
+    items = mission_plan.mission_items
+    anchors = [_is_mission_anchor(item, items[i - 1] if i else None)
+               for i, item in enumerate(items)]
+    points = _to_local(
+        [(item.latitude_deg, item.longitude_deg, item.relative_altitude_m)
+         for item in items])
+
+    keep = _simplify(points, anchors, tolerance_m)
+    return MissionPlan([item for item, kept in zip(items, keep) if kept])
+
+
+def simplify_mission_raw(mission_items, tolerance_m=1.0):
+    """
+     Remove raw waypoints that do not change the flown path by more than a
+     tolerance.
+
+     Runs of consecutive `MAV_CMD_NAV_WAYPOINT` items in a global frame,
+     without hold time and with the same parameters as the previous
+     waypoint, are simplified in 3D with the Douglas-Peucker algorithm.
+     Every other command is kept, along with the waypoint right before it
+     so that it still triggers at the same place. `DO_JUMP` targets are
+     kept and remapped. The returned items are renumbered.
+
+     Parameters
+     ----------
+     mission_items : [MissionItem]
+          The raw mission items to simplify
+
+     tolerance_m : float
+          Maximum distance between a removed waypoint and the simplified
+          path (in metres)
+
+     Returns
+     -------
+     mission_items : [MissionItem]
+          New raw mission items
+    """
+    items = mission_items
+    jump_targets = {int(item.param1) for item in items
+                    if item.command == _MAV_CMD_DO_JUMP}
+
+    anchors = []
+    for i, item in enumerate(items):
+        previous = items[i - 1] if i else None
+        following = items[i + 1] if i + 1 < len(items) else None
+        anchors.append(
+            item.seq in jump_targets
+            or not _is_raw_waypoint(item)
+            or previous is None or not _is_raw_waypoint(previous)
+            or following is None or not _is_raw_waypoint(following)
+            or item.param1 != 0
+            or not _same(_raw_settings(item), _raw_settings(previous)))
+
+    points = _to_local([(item.x * 1e-7, item.y * 1e-7, item.z)
+                        if _is_raw_waypoint(item) else _NO_POSITION
+                        for item in items])
+
+    keep = _simplify(points, anchors, tolerance_m)
+    kept = [item for item, k in zip(items, keep) if k]
+    new_seq = {item.seq: seq for seq, item in enumerate(kept)}
+
+    simplified = []
+    for seq, item in enumerate(kept):
+        param1 = item.param1
+        if item.command == _MAV_CMD_DO_JUMP:
+            param1 = float(new_seq.get(int(param1), int(param1)))
+        simplified.append(RawMissionItem(
+            seq,
+            item.frame,
+            item.command,
+            item.current,
+            item.autocontinue,
+            param1,
+            item.param2,
+            item.param3,
+            item.param4,
+            item.x,
+            item.y,
+            item.z,
+            item.mission_type))
+    return simplified
+
+
+def _is_mission_anchor(item, previous):
+    if item.camera_action != MissionItem.CameraAction.NONE:
+        return True
+    if item.vehicle_action != MissionItem.VehicleAction.NONE:
+        return True
+    if not item.is_fly_through:
+        return True
+    if item.loiter_time_s > 0:
+        return True
+    return previous is None or not _same(_mission_settings(item),
+                                         _mission_settings(previous))
+
+
+def _mission_settings(item):
+    return (item.speed_m_s,
+            item.gimbal_pitch_deg,
+            item.gimbal_yaw_deg,
+            item.camera_photo_interval_s,
+            item.acceptance_radius_m,
+            item.yaw_deg,
+            item.camera_photo_distance_m)
+
+
+def _is_raw_waypoint(item):
+    return item.command == _MAV_CMD_NAV_WAYPOINT \
+        and item.frame in _GLOBAL_FRAMES \
+        and item.mission_type == _MAV_MISSION_TYPE_MISSION
+
+
+def _raw_settings(item):
+    return (item.frame, item.autocontinue, item.param2, item.param3,
+            item.param4)
+
+
+def _same(values, others):
+    """
+     Compares tuples of settings, NaN (i.e. "unchanged") being equal to NaN
+    """
+    for value, other in zip(values, others):
+        if value != other and not (value != value and other != other):
+            return False
+    return True
+
+
+def _to_local(coordinates):
+    """
+     Projects (latitude, longitude, altitude) on a local tangent plane, in
+     metres
+    """
+    origin = next((c for c in coordinates
+                   if math.isfinite(c[0]) and math.isfinite(c[1])), None)
+    if origin is None:
+        return [_NO_POSITION] * len(coordinates)
+
+    lat0 = math.radians(origin[0])
+    lon0 = math.radians(origin[1])
+    cos_lat0 = math.cos(lat0)
+    return [((math.radians(lat) - lat0) * _EARTH_RADIUS_M,
+             (math.radians(lon) - lon0) * cos_lat0 * _EARTH_RADIUS_M,
+             alt if alt == alt else 0.0)
+            for lat, lon, alt in coordinates]
+
+
+def _simplify(points, anchors, tolerance_m):
+    """
+     Douglas-Peucker on every run of points between two anchors.
+
+     Points without a position, and their neighbours, are anchors as well,
+     so that actions without a position still trigger at the same place.
+     Returns a list of booleans telling which points to keep.
+    """
+    count = len(points)
+    keep = [True] * count
+    positioned = [math.isfinite(p[0]) and math.isfinite(p[1])
+                  for p in points]
+    anchors = [anchor or not positioned[i]
+               or (i > 0 and not positioned[i - 1])
+               or (i + 1 < count and not positioned[i + 1])
+               for i, anchor in enumerate(anchors)]
+
+    start = 0
+    while start < count - 1:
+        end = start + 1
+        while end < count - 1 and not anchors[end]:
+            end += 1
+        if end - start > 1:
+            _douglas_peucker(points, start, end, tolerance_m, keep)
+        start = end
+    return keep
+
+
+def _douglas_peucker(points, first, last, tolerance_m, keep):
+    for i in range(first + 1, last):
+        keep[i] = False
+
+    stack = [(first, last)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        a = points[first]
+        b = points[last]
+        farthest = first
+        max_distance = -1.0
+        for i in range(first + 1, last):
+            distance = _segment_distance(points[i], a, b)
+            if distance > max_distance:
+                farthest = i
+                max_distance = distance
+
+        if max_distance > tolerance_m:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+
+def _segment_distance(p, a, b):
+    ab = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    ap = (p[0] - a[0], p[1] - a[1], p[2] - a[2])
+    length2 = ab[0] * ab[0] + ab[1] * ab[1] + ab[2] * ab[2]
+    if length2 == 0.0:
+        ratio = 0.0
+    else:
+        ratio = (ap[0] * ab[0] + ap[1] * ab[1] + ap[2] * ab[2]) / length2
+        ratio = min(1.0, max(0.0, ratio))
+    dx = ap[0] - ab[0] * ratio
+    dy = ap[1] - ab[1] * ratio
+    dz = ap[2] - ab[2] * ratio
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
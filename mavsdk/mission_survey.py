@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+import math
+
+try:
+    # NumPy is optional for the package, but required by this module
+    import numpy as np
+except ImportError:
+    np = None
+
+from .mission import MissionItem
+from .mission_builder import MissionArrays
+
+_EARTH_RADIUS_M = 6371000.0
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for mission generation")
+
+
+def survey_grid(polygon, altitude_m, spacing_m, angle_deg=0.0,
+                speed_m_s=float("nan"), trigger_distance_m=None,
+                overshoot_m=0.0, trigger_in_turns=False):
+    """
+     Lawnmower survey covering a polygon.
+
+     Parallel lanes `spacing_m` apart are clipped against the polygon, and
+     flown back and forth. Lanes crossing a concave polygon several times
+     give several segments, flown in order along the lane.
+
+     Parameters
+     ----------
+     polygon : Polygon
+          Area to survey (the fence type is ignored)
+
+     altitude_m : float
+          Altitude relative to takeoff altitude in metres
+
+     spacing_m : float
+          Distance between two lanes (in metres)
+
+     angle_deg : float
+          Direction of the lanes (in degrees, clockwise from north)
+
+     speed_m_s : float
+          Speed to use for the survey (in metres/second)
+
+     trigger_distance_m : float
+          Distance between two photos (in metres). No camera action is
+          added if None.
+
+     overshoot_m : float
+          Distance to extend every lane by at both ends, leaving room to
+          turn outside of the area (in metres)
+
+     trigger_in_turns : bool
+          Keep triggering the camera between lanes. If False, distance
+          triggering is started and stopped on every lane.
+
+     Returns
+     -------
+     mission : MissionArrays
+          The survey mission, which can be uploaded as is
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+    """
+    _require_numpy()
+    if spacing_m <= 0:
+        raise ValueError("spacing_m must be positive")
+
+    projection = _Projection.around(polygon.points)
+    x, y = projection.to_local(polygon.points)
+
+    # Rotate so that lanes run along the u axis
+    angle = math.radians(angle_deg)
+    u = x * math.cos(angle) + y * math.sin(angle)
+    v = -x * math.sin(angle) + y * math.cos(angle)
+
+    # One lane in the middle of every strip of the polygon
+    lane_count = max(1, int(math.ceil((v.max() - v.min()) / spacing_m)))
+    margin = (v.max() - v.min() - (lane_count - 1) * spacing_m) / 2
+    lanes = v.min() + margin + np.arange(lane_count) * spacing_m
+
+    # Intersect every lane with every edge
+    u1, v1 = u, v
+    u2, v2 = np.roll(u, -1), np.roll(v, -1)
+    crossing = (v1[None, :] <= lanes[:, None]) != \
+        (v2[None, :] <= lanes[:, None])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (lanes[:, None] - v1[None, :]) / (v2 - v1)[None, :]
+    crossings = np.where(crossing, u1[None, :] + ratio * (u2 - u1)[None, :],
+                         np.inf)
+    crossings.sort(axis=1)
+    counts = crossing.sum(axis=1)
+
+    # Fly every other lane backwards: reverse its valid crossings
+    columns = np.arange(crossings.shape[1])[None, :]
+    valid = columns < counts[:, None]
+    backwards = (np.arange(lane_count) % 2 == 1)[:, None]
+    reversed_columns = np.where(valid & backwards,
+                                counts[:, None] - 1 - columns, columns)
+    crossings = np.take_along_axis(crossings, reversed_columns, axis=1)
+
+    lane_u = crossings[valid]
+    lane_v = np.broadcast_to(lanes[:, None], crossings.shape)[valid]
+    if len(lane_u) == 0:
+        raise ValueError("Polygon does not contain any lane")
+
+    # Entry and exit of every segment alternate
+    entry = np.arange(len(lane_u)) % 2 == 0
+    direction = np.broadcast_to(np.where(backwards, -1.0, 1.0),
+                                crossings.shape)[valid]
+    lane_u = lane_u + np.where(entry, -overshoot_m, overshoot_m) * direction
+
+    x = lane_u * math.cos(angle) - lane_v * math.sin(angle)
+    y = lane_u * math.sin(angle) + lane_v * math.cos(angle)
+    camera_action, photo_distance = _distance_triggers(
+        len(x), trigger_distance_m, 1 if trigger_in_turns else 2)
+
+    latitude_deg, longitude_deg = projection.to_global(x, y)
+    return MissionArrays(latitude_deg, longitude_deg, altitude_m,
+                         speed_m_s=speed_m_s,
+                         camera_action=camera_action,
+                         camera_photo_distance_m=photo_distance)
+
+
+def corridor_scan(path, altitude_m, width_m, spacing_m,
+                  speed_m_s=float("nan"), trigger_distance_m=None):
+    """
+     Corridor scan along a path.
+
+     Lanes parallel to the path, `spacing_m` apart, cover a corridor of
+     `width_m` centered on the path, and are flown back and forth.
+
+     Parameters
+     ----------
+     path : [Point]
+          Center line of the corridor, at least two points
+
+     altitude_m : float
+          Altitude relative to takeoff altitude in metres
+
+     width_m : float
+          Width of the corridor (in metres)
+
+     spacing_m : float
+          Distance between two lanes (in metres)
+
+     speed_m_s : float
+          Speed to use for the scan (in metres/second)
+
+     trigger_distance_m : float
+          Distance between two photos (in metres). No camera action is
+          added if None.
+
+     Returns
+     -------
+     mission : MissionArrays
+          The corridor mission, which can be uploaded as is
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+    """
+    _require_numpy()
+    if len(path) < 2:
+        raise ValueError("A corridor needs at least two path points")
+    if spacing_m <= 0:
+        raise ValueError("spacing_m must be positive")
+
+    projection = _Projection.around(path)
+    points = np.stack(projection.to_local(path), axis=1)
+
+    # Unit normals of the segments, and miter vectors at the vertices
+    segments = np.diff(points, axis=0)
+    lengths = np.hypot(segments[:, 0], segments[:, 1])
+    if np.any(lengths == 0):
+        raise ValueError("Corridor path has duplicate consecutive points")
+    normals = np.stack([-segments[:, 1], segments[:, 0]], axis=1) \
+        / lengths[:, None]
+    vertex_normals = np.concatenate(
+        [normals[:1], normals[:-1] + normals[1:], normals[-1:]])
+    vertex_normals /= np.hypot(vertex_normals[:, 0],
+                               vertex_normals[:, 1])[:, None]
+    cos_half_angle = np.einsum("ij,ij->i", vertex_normals,
+                               np.concatenate([normals[:1], normals]))
+    miters = vertex_normals / np.maximum(cos_half_angle, 0.1)[:, None]
+
+    lane_count = max(1, int(math.ceil(width_m / spacing_m)) + 1)
+    offsets = np.linspace(-width_m / 2, width_m / 2, lane_count) \
+        if lane_count > 1 else np.zeros(1)
+
+    lanes = points[None, :, :] + offsets[:, None, None] * miters[None, :, :]
+    lanes[1::2] = lanes[1::2, ::-1]
+    lanes = lanes.reshape(-1, 2)
+
+    camera_action, photo_distance = _distance_triggers(
+        len(lanes), trigger_distance_m, 1)
+
+    latitude_deg, longitude_deg = projection.to_global(lanes[:, 0],
+                                                       lanes[:, 1])
+    return MissionArrays(latitude_deg, longitude_deg, altitude_m,
+                         speed_m_s=speed_m_s,
+                         camera_action=camera_action,
+                         camera_photo_distance_m=photo_distance)
+
+
+def perimeter_orbit(polygon, altitude_m, laps=1, speed_m_s=float("nan"),
+                    trigger_distance_m=None):
+    """
+     Flight along the edges of a polygon.
+
+     Parameters
+     ----------
+     polygon : Polygon
+          Polygon to fly around (the fence type is ignored)
+
+     altitude_m : float
+          Altitude relative to takeoff altitude in metres
+
+     laps : int
+          Number of times to fly around the polygon
+
+     speed_m_s : float
+          Speed to use for the orbit (in metres/second)
+
+     trigger_distance_m : float
+          Distance between two photos (in metres). No camera action is
+          added if None.
+
+     Returns
+     -------
+     mission : MissionArrays
+          The perimeter mission, which can be uploaded as is
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+    """
+    _require_numpy()
+    if laps < 1:
+        raise ValueError("laps must be at least 1")
+
+    latitude_deg = np.array([p.latitude_deg for p in polygon.points])
+    longitude_deg = np.array([p.longitude_deg for p in polygon.points])
+    latitude_deg = np.append(np.tile(latitude_deg, laps), latitude_deg[0])
+    longitude_deg = np.append(np.tile(longitude_deg, laps),
+                              longitude_deg[0])
+
+    camera_action, photo_distance = _distance_triggers(
+        len(latitude_deg), trigger_distance_m, 1)
+
+    return MissionArrays(latitude_deg, longitude_deg, altitude_m,
+                         speed_m_s=speed_m_s,
+                         camera_action=camera_action,
+                         camera_photo_distance_m=photo_distance)
+
+
+def _distance_triggers(count, trigger_distance_m, period):
+    """
+     Camera actions starting distance triggering on the first item of every
+     group of `period` items, and stopping it on the last one
+    """
+    camera_action = np.full(
+        count, MissionItem.CameraAction.NONE.translate_to_rpc())
+    photo_distance = np.full(count, float("nan"))
+    if trigger_distance_m is None:
+        return camera_action, photo_distance
+
+    if period == 1:
+        starts, stops = np.array([0]), np.array([count - 1])
+    else:
+        starts = np.arange(0, count, period)
+        stops = np.arange(period - 1, count, period)
+
+    camera_action[starts] = MissionItem.CameraAction.START_PHOTO_DISTANCE \
+        .translate_to_rpc()
+    photo_distance[starts] = trigger_distance_m
+    camera_action[stops] = MissionItem.CameraAction.STOP_PHOTO_DISTANCE \
+        .translate_to_rpc()
+    return camera_action, photo_distance
+
+
+class _Projection:
+    """
+     Equirectangular projection on a local plane, in metres (x north,
+     y east)
+    """
+
+    def __init__(self, latitude_deg, longitude_deg):
+        self._lat0 = math.radians(latitude_deg)
+        self._lon0 = math.radians(longitude_deg)
+        self._cos_lat0 = math.cos(self._lat0)
+
+    @classmethod
+    def around(cls, points):
+        if not points:
+            raise ValueError("At least one point is required")
+        return cls(sum(p.latitude_deg for p in points) / len(points),
+                   sum(p.longitude_deg for p in points) / len(points))
+
+    def to_local(self, points):
+        latitude = np.radians([p.latitude_deg for p in points])
+        longitude = np.radians([p.longitude_deg for p in points])
+        return ((latitude - self._lat0) * _EARTH_RADIUS_M,
+                (longitude - self._lon0) * self._cos_lat0 * _EARTH_RADIUS_M)
+
+    def to_global(self, x, y):
+        return (np.degrees(self._lat0 + x / _EARTH_RADIUS_M),
+                np.degrees(self._lon0
+                           + y / (self._cos_lat0 * _EARTH_RADIUS_M)))
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from .param import ParamError, ParamResult
+
+# MAV_PARAM_TYPE values of the .params file format
+_MAV_PARAM_TYPE_REAL32 = 9
+_MAV_PARAM_TYPE_REAL64 = 10
+
+_RETRIED_RESULTS = (ParamResult.Result.TIMEOUT,
+                    ParamResult.Result.CONNECTION_ERROR)
+
+
+class ParamItemResult:
+    """
+     Outcome of one parameter of a bulk request.
+
+     Parameters
+     ----------
+     name : str
+          Name of the parameter
+
+     value : int, float or str
+          Value read or written, None if the request failed
+
+     result : ParamResult.Result
+          Result of the last attempt
+
+     attempts : int
+          Number of requests sent for this parameter
+
+     """
+
+    def __init__(
+            self,
+            name,
+            value,
+            result,
+            attempts):
+        """ Initializes the ParamItemResult object """
+        self.name = name
+        self.value = value
+        self.result = result
+        self.attempts = attempts
+
+    @property
+    def success(self):
+        """ True if the request succeeded """
+        return self.result == ParamResult.Result.SUCCESS
+
+    def __str__(self):
+        """ ParamItemResult in string representation """
+        struct_repr = ", ".join([
+                "name: " + str(self.name),
+                "value: " + str(self.value),
+                "result: " + str(self.result),
+                "attempts: " + str(self.attempts)
+                ])
+
+        return f"ParamItemResult: [{struct_repr}]"
+
+
+class ParamBulk:
+    """
+     Gets and sets many parameters with requests in flight concurrently.
+
+     Every parameter is retried on its own when it fails with `TIMEOUT` or
+     `CONNECTION_ERROR`. Other failures are reported immediately. Failures
+     never abort the other parameters: the outcome of every parameter is
+     returned in a table.
+
+     Parameters
+     ----------
+     param : Param
+          Param plugin of the vehicle (e.g. `drone.param`)
+
+     concurrency : int
+          Maximum number of requests in flight
+
+     retries : int
+          Number of retries per parameter
+
+     retry_delay_s : float
+          Delay before the first retry, doubled for every following retry
+          (in seconds)
+
+     """
+
+    def __init__(self, param, concurrency=8, retries=3, retry_delay_s=0.1):
+        """ Initializes the ParamBulk object """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._param = param
+        self._concurrency = concurrency
+        self._retries = retries
+        self._retry_delay_s = retry_delay_s
+
+    async def get_many(self, names, param_type=float):
+        """
+         Get many parameters.
+
+         Parameters
+         ----------
+         names : [str] or {str: type}
+              Names of the parameters, or a mapping from names to their type
+              (`int`, `float` or `str` for custom parameters)
+
+         param_type : type
+              Type of the parameters when `names` is not a mapping
+
+         Returns
+         -------
+         results : {str: ParamItemResult}
+              Outcome of every parameter, in the order of `names`
+        """
+        if not isinstance(names, dict):
+            names = {name: param_type for name in names}
+
+        getters = {
+            int: self._param.get_param_int,
+            float: self._param.get_param_float,
+            str: self._param.get_param_custom,
+        }
+        return await self._run(
+            (name, None, getters[value_type])
+            for name, value_type in names.items())
+
+    async def set_many(self, values):
+        """
+         Set many parameters.
+
+         The type of every value selects the request: `int` for
+         `set_param_int`, `float` for `set_param_float` and `str` for
+         `set_param_custom`.
+
+         Parameters
+         ----------
+         values : {str: int, float or str}
+              Values of the parameters, by name
+
+         Returns
+         -------
+         results : {str: ParamItemResult}
+              Outcome of every parameter, in the order of `values`
+        """
+        return await self._run(
+            (name, value, self._setter(value))
+            for name, value in values.items())
+
+    def _setter(self, value):
+        if isinstance(value, str):
+            return self._param.set_param_custom
+        if isinstance(value, float):
+            return self._param.set_param_float
+        if isinstance(value, int):
+            return self._param.set_param_int
+        raise TypeError(f"Unsupported parameter value type: {type(value)}")
+
+    async def _run(self, requests):
+        semaphore = asyncio.Semaphore(self._concurrency)
+        requests = list(requests)
+        results = await asyncio.gather(*(
+            self._request(semaphore, name, value, call)
+            for name, value, call in requests))
+        return {result.name: result for result in results}
+
+    async def _request(self, semaphore, name, value, call):
+        args = (name,) if value is None else (name, value)
+        delay = self._retry_delay_s
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                async with semaphore:
+                    response = await call(*args)
+            except ParamError as error:
+                result = error._result.result
+                if result not in _RETRIED_RESULTS \
+                        or attempts > self._retries:
+                    return ParamItemResult(name, None, result, attempts)
+            else:
+                return ParamItemResult(
+                    name, value if value is not None else response,
+                    ParamResult.Result.SUCCESS, attempts)
+
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+def read_param_file(path):
+    """
+     Read a QGroundControl .params file.
+
+     Lines are tab-separated: vehicle id, component id, name, value and
+     MAVLink parameter type. Lines starting with "#" are ignored.
+
+     Parameters
+     ----------
+     path : str
+          Path to the file
+
+     Returns
+     -------
+     values : {str: int or float}
+          Parameter values, typed according to the file, as accepted by
+          `ParamBulk.set_many`
+
+     Raises
+     ------
+     ValueError
+         If a line is invalid.
+    """
+    values = {}
+    with open(path, "r") as param_file:
+        for number, line in enumerate(param_file, 1):
+            if line.startswith("#") or not line.strip():
+                continue
+            columns = line.strip().split("\t")
+            if len(columns) < 5:
+                raise ValueError(
+                    f"Invalid line {number} in '{path}': expected 5 columns")
+            name, value, param_type = columns[2], columns[3], int(columns[4])
+            if param_type in (_MAV_PARAM_TYPE_REAL32, _MAV_PARAM_TYPE_REAL64):
+                values[name] = float(value)
+            else:
+                values[name] = int(float(value))
+    return values
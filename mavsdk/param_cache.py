@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from .param import AllParams, CustomParam, FloatParam, IntParam, ParamError
+from .param_bulk import ParamBulk
+
+# Parameter answered by PX4 with a hash of all parameter values
+_HASH_CHECK = "_HASH_CHECK"
+
+_CACHE_FORMAT = 1
+
+
+def default_cache_dir():
+    """
+     Directory used by `ParamCache` when no directory is given.
+
+     Returns
+     -------
+     path : str
+          `$XDG_CACHE_HOME/mavsdk/params`, or `~/.cache/mavsdk/params`
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mavsdk", "params")
+
+
+class ParamCache:
+    """
+     On-disk cache of all the parameters of a vehicle.
+
+     Entries are keyed by hardware UID, flight software version and
+     component id, so that a firmware update never reuses stale values.
+     `load` returns the cached parameters immediately, and revalidates them
+     against the vehicle in the background.
+
+     Revalidation compares the parameter hash (`_HASH_CHECK`, answered by
+     PX4) with the cached one, which costs a single parameter read. If the
+     hash differs, or cannot be read, all the parameters are downloaded
+     again with `Param.get_all_params`: the Param plugin reports neither the
+     parameter count nor which parameters changed, so there is no cheaper
+     check, and no way to fetch only the changed ones. The download is then
+     compared with the cache to report the changed parameters. Parameters
+     known to have changed, e.g. after setting them, are read one by one
+     with `refresh` instead.
+
+     Parameters
+     ----------
+     param : Param
+          Param plugin of the vehicle (e.g. `drone.param`)
+
+     info : Info
+          Info plugin of the vehicle (e.g. `drone.info`)
+
+     component_id : int
+          MAVLink component id of the parameters, as selected with
+          `Param.select_component`
+
+     cache_dir : str
+          Directory of the cache files, see `default_cache_dir`
+
+     """
+
+    def __init__(self, param, info, component_id=1, cache_dir=None):
+        """ Initializes the ParamCache object """
+        self._param = param
+        self._info = info
+        self._component_id = component_id
+        self._cache_dir = cache_dir or default_cache_dir()
+        self._path = None
+        self._hash = None
+        self._values = {int: {}, float: {}, str: {}}
+        self._revalidation = None
+        self.is_stale = None
+        self.changed_names = []
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    async def key(self):
+        """
+         Cache key of the connected vehicle.
+
+         Returns
+         -------
+         key : str
+              Hex digest of the hardware UID, flight software version and
+              component id
+        """
+        identification = await self._info.get_identification()
+        version = await self._info.get_version()
+        identity = "/".join(str(value) for value in (
+            identification.hardware_uid,
+            version.flight_sw_major,
+            version.flight_sw_minor,
+            version.flight_sw_patch,
+            version.flight_sw_git_hash,
+            self._component_id))
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    @property
+    def params(self):
+        """ Cached parameters, as returned by `Param.get_all_params` """
+        return AllParams(
+            [IntParam(name, value)
+             for name, value in self._values[int].items()],
+            [FloatParam(name, value)
+             for name, value in self._values[float].items()],
+            [CustomParam(name, value)
+             for name, value in self._values[str].items()])
+
+    async def load(self, revalidate=True):
+        """
+         Load the parameters of the connected vehicle.
+
+         Cached parameters are returned without waiting for the vehicle.
+         If there is no cache entry, all the parameters are downloaded and
+         stored.
+
+         Parameters
+         ----------
+         revalidate : bool
+              Revalidate the cached parameters in the background, see
+              `wait_revalidated`
+
+         Returns
+         -------
+         params : AllParams
+              All the parameters
+        """
+        self._path = os.path.join(self._cache_dir, await self.key() + ".json")
+        if self._read():
+            if revalidate:
+                self._revalidation = asyncio.ensure_future(self.revalidate())
+                self._revalidation.add_done_callback(self._revalidated)
+        else:
+            await self._download()
+            self.is_stale = False
+        return self.params
+
+    async def wait_revalidated(self):
+        """
+         Wait for the background revalidation started by `load`.
+
+         If the revalidation failed, its error is raised here, and the
+         cache stays marked as stale.
+
+         Returns
+         -------
+         changed_names : [str]
+              Names of the parameters that changed on the vehicle
+        """
+        if self._revalidation is None:
+            return []
+        return await self._revalidation
+
+    async def revalidate(self):
+        """
+         Check the cached parameters against the vehicle.
+
+         Nothing is downloaded if the parameter hash matches the cached one,
+         otherwise all the parameters are downloaded again, see the class
+         description.
+
+         Returns
+         -------
+         changed_names : [str]
+              Names of the parameters that were added, removed or changed on
+              the vehicle
+        """
+        if self._hash is not None and await self._read_hash() == self._hash:
+            self.is_stale = False
+            self.changed_names = []
+            return self.changed_names
+
+        self.is_stale = True
+        previous = {value_type: dict(values)
+                    for value_type, values in self._values.items()}
+        await self._download()
+
+        changed = set()
+        for value_type, values in self._values.items():
+            old = previous[value_type]
+            changed.update(name for name, value in values.items()
+                           if name not in old or old[name] != value)
+            changed.update(name for name in old if name not in values)
+        self.is_stale = False
+        self.changed_names = sorted(changed)
+        return self.changed_names
+
+    async def refresh(self, names):
+        """
+         Read some parameters again, e.g. after setting them.
+
+         Parameters
+         ----------
+         names : [str]
+              Names of cached parameters
+
+         Returns
+         -------
+         results : {str: ParamItemResult}
+              Outcome of every parameter, see `ParamBulk.get_many`
+        """
+        types = {}
+        for name in names:
+            for value_type, values in self._values.items():
+                if name in values:
+                    types[name] = value_type
+                    break
+            else:
+                raise KeyError(name)
+
+        results = await ParamBulk(self._param).get_many(types)
+        for name, result in results.items():
+            if result.success:
+                self._values[types[name]][name] = result.value
+        if all(result.success for result in results.values()):
+            self._hash = await self._read_hash()
+        else:
+            # Some values are unknown, force a full revalidation next time
+            self._hash = None
+        self._write()
+        return results
+
+    def invalidate(self):
+        """ Delete the cache entry of the vehicle """
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+        self._hash = None
+        self.is_stale = True
+
+    def _revalidated(self, task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.is_stale = True
+            self._logger.error(f"Parameter revalidation failed: {error!r}")
+
+    async def _download(self):
+        params = await self._param.get_all_params()
+        self._values = {
+            int: {p.name: p.value for p in params.int_params},
+            float: {p.name: p.value for p in params.float_params},
+            str: {p.name: p.value for p in params.custom_params},
+        }
+        self._hash = await self._read_hash()
+        self._write()
+
+    async def _read_hash(self):
+        try:
+            return await self._param.get_param_int(_HASH_CHECK)
+        except ParamError:
+            # Not supported by this autopilot, compare all the values
+            return None
+
+    def _read(self):
+        try:
+            with open(self._path, "r") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return False
+        if entry.get("format") != _CACHE_FORMAT:
+            return False
+
+        self._hash = entry["hash"]
+        self._values = {
+            int: entry["int_params"],
+            float: entry["float_params"],
+            str: entry["custom_params"],
+        }
+        return True
+
+    def _write(self):
+        os.makedirs(self._cache_dir, exist_ok=True)
+        entry = {
+            "format": _CACHE_FORMAT,
+            "hash": self._hash,
+            "int_params": self._values[int],
+            "float_params": self._values[float],
+            "custom_params": self._values[str],
+        }
+        # Write a temporary file first, a reader never sees a partial entry
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temporary_path, self._path)
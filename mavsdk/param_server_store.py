@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+from collections import deque
+
+from .param_bulk import read_param_file
+from .param_server import ParamServerError, ParamServerResult
+
+
+class ParamChange:
+    """
+     Entry of the change log of a `ParamServerStore`.
+
+     Parameters
+     ----------
+     sequence : int
+          Position in the change log, increasing by one per change
+
+     name : str
+          Name of the parameter
+
+     value : int, float or str
+          New value of the parameter
+
+     remote : bool
+          True if the change was made by a ground station, False if it was
+          made locally
+
+     """
+
+    def __init__(
+            self,
+            sequence,
+            name,
+            value,
+            remote):
+        """ Initializes the ParamChange object """
+        self.sequence = sequence
+        self.name = name
+        self.value = value
+        self.remote = remote
+
+    def __str__(self):
+        """ ParamChange in string representation """
+        struct_repr = ", ".join([
+                "sequence: " + str(self.sequence),
+                "name: " + str(self.name),
+                "value: " + str(self.value),
+                "remote: " + str(self.remote)
+                ])
+
+        return f"ParamChange: [{struct_repr}]"
+
+
+class ParamServerStore:
+    """
+     Local store of the parameters provided by a `ParamServer`.
+
+     Parameters are loaded and changed locally, in bulk, and `push` only
+     provides the ones whose value changed since the last push. Changes
+     made by ground stations are merged into the store by `changes`. Every
+     change is recorded in a bounded change log.
+
+     The type of a value selects the parameter type: `int` (or `bool`),
+     `float` or `str` for custom parameters. The type of a parameter cannot
+     change once it is in the store.
+
+     Parameters
+     ----------
+     param_server : ParamServer
+          ParamServer plugin (e.g. `drone.param_server`)
+
+     concurrency : int
+          Maximum number of provide requests in flight
+
+     log_size : int
+          Number of changes kept in the change log
+
+     """
+
+    def __init__(self, param_server, concurrency=8, log_size=1024):
+        """ Initializes the ParamServerStore object """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._param_server = param_server
+        self._concurrency = concurrency
+        self._values = {}
+        self._pending = set()
+        self._log = deque(maxlen=log_size)
+        self._sequence = 0
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    def __len__(self):
+        """ Number of parameters """
+        return len(self._values)
+
+    def __contains__(self, name):
+        """ True if the parameter is in the store """
+        return name in self._values
+
+    def __getitem__(self, name):
+        """ Value of a parameter """
+        return self._values[name]
+
+    def get(self, name, default=None):
+        """
+         Value of a parameter.
+
+         Parameters
+         ----------
+         name : str
+              Name of the parameter
+
+         default : any
+              Value returned if the parameter is not in the store
+
+         Returns
+         -------
+         value : int, float or str
+              Value of the parameter
+        """
+        return self._values.get(name, default)
+
+    def names(self):
+        """
+         Names of the parameters, in load order.
+
+         Returns
+         -------
+         names : [str]
+              Names of the parameters
+        """
+        return list(self._values)
+
+    @property
+    def pending(self):
+        """ Names of the parameters changed since the last push """
+        return sorted(self._pending)
+
+    @property
+    def sequence(self):
+        """ Sequence number of the last change """
+        return self._sequence
+
+    def set(self, name, value):
+        """
+         Set a parameter locally, it is provided on the next push.
+
+         Parameters
+         ----------
+         name : str
+              Name of the parameter
+
+         value : int, float or str
+              Value of the parameter
+
+         Raises
+         ------
+         TypeError
+             If the parameter already has another type.
+        """
+        if self._update(name, value, remote=False):
+            self._pending.add(name)
+
+    def load(self, values):
+        """
+         Set many parameters locally.
+
+         Parameters
+         ----------
+         values : {str: int, float or str}
+              Values of the parameters, by name
+        """
+        for name, value in values.items():
+            self.set(name, value)
+
+    def load_file(self, path):
+        """
+         Set parameters from a QGroundControl .params file, see
+         `read_param_file`.
+
+         Parameters
+         ----------
+         path : str
+              Path to the file
+        """
+        self.load(read_param_file(path))
+
+    def changes_since(self, sequence):
+        """
+         Changes after a sequence number.
+
+         Parameters
+         ----------
+         sequence : int
+              Sequence number of the last known change, 0 for all changes
+
+         Returns
+         -------
+         changes : [ParamChange]
+              The changes, oldest first
+
+         Raises
+         ------
+         ValueError
+             If changes after `sequence` were dropped from the log.
+        """
+        if self._log and sequence < self._log[0].sequence - 1:
+            raise ValueError(
+                f"Changes after {sequence} are no longer in the change log")
+        start = len(self._log) - (self._sequence - sequence)
+        return list(self._log)[max(start, 0):]
+
+    async def push(self):
+        """
+         Provide the parameters changed since the last push.
+
+         Returns
+         -------
+         results : {str: ParamServerResult.Result}
+              Result for every provided parameter. Failed parameters stay
+              pending.
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+        names = self.pending
+        results = await asyncio.gather(*(
+            self._provide(semaphore, name) for name in names))
+        return dict(zip(names, results))
+
+    async def _provide(self, semaphore, name):
+        value = self._values[name]
+        if isinstance(value, str):
+            provide = self._param_server.provide_param_custom
+        elif isinstance(value, float):
+            provide = self._param_server.provide_param_float
+        else:
+            provide = self._param_server.provide_param_int
+
+        try:
+            async with semaphore:
+                await provide(name, value)
+        except ParamServerError as error:
+            return error._result.result
+
+        # The value may have changed again while it was being provided
+        if self._values[name] is value:
+            self._pending.discard(name)
+        return ParamServerResult.Result.SUCCESS
+
+    async def changes(self, coalesce_s=0.0):
+        """
+         Merged feed of the parameters changed by ground stations.
+
+         The `changed_param_int`, `changed_param_float` and
+         `changed_param_custom` streams are merged, and every change is
+         applied to the store. Changes arriving together are coalesced into
+         one batch, keeping the latest value of every parameter. A change
+         whose type does not match the parameter in the store is logged and
+         ignored.
+
+         Parameters
+         ----------
+         coalesce_s : float
+              Time to wait for more changes before yielding a batch (in
+              seconds)
+
+         Yields
+         -------
+         changes : {str: int, float or str}
+              New values, by name
+        """
+        batch = {}
+        event = asyncio.Event()
+
+        async def consume(stream):
+            async for param in stream:
+                try:
+                    updated = self._update(param.name, param.value,
+                                           remote=True)
+                except TypeError as error:
+                    self._logger.warning(
+                        f"Ignored change of parameter {param.name}: {error}")
+                    continue
+                if updated:
+                    # The ground station value replaces any local change
+                    self._pending.discard(param.name)
+                    batch[param.name] = param.value
+                    event.set()
+
+        server = self._param_server
+        tasks = [asyncio.ensure_future(consume(stream)) for stream in (
+            server.changed_param_int(),
+            server.changed_param_float(),
+            server.changed_param_custom())]
+        try:
+            while True:
+                waiter = asyncio.ensure_future(event.wait())
+                done, _ = await asyncio.wait(
+                    tasks + [waiter], return_when=asyncio.FIRST_COMPLETED)
+                if waiter not in done:
+                    waiter.cancel()
+                    # A stream ended or failed
+                    for task in done:
+                        task.result()
+                    return
+
+                if coalesce_s > 0:
+                    await asyncio.sleep(coalesce_s)
+                event.clear()
+                changes, batch = batch, {}
+                if changes:
+                    yield changes
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _update(self, name, value, remote):
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float, str)):
+            raise TypeError(
+                f"Unsupported parameter value type: {type(value)}")
+
+        current = self._values.get(name)
+        if current is not None and type(current) is not type(value):
+            raise TypeError(f"Parameter {name} is of type {type(current)}")
+        if current == value:
+            return False
+
+        self._values[name] = value
+        self._sequence += 1
+        self._log.append(ParamChange(self._sequence, name, value, remote))
+        return True
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import struct
+
+from .param import (AllParams, CustomParam, FloatParam, IntParam,
+                    ParamResult)
+from .param_bulk import ParamBulk, ParamItemResult
+
+_FLOAT32 = struct.Struct("<f")
+
+_SNAPSHOT_FORMAT = 1
+
+
+def _as_float32(value):
+    """ Value as stored by the vehicle, parameters are 32-bit floats """
+    return _FLOAT32.unpack(_FLOAT32.pack(value))[0]
+
+
+def _float32_equal(value, to_compare):
+    """ True if two float values are the same on the vehicle """
+    try:
+        value, to_compare = _as_float32(value), _as_float32(to_compare)
+    except OverflowError:
+        # Out of the 32-bit range, compare the values as they are
+        pass
+    return value == to_compare or (value != value and to_compare != to_compare)
+
+
+def _convert(value_type, value):
+    """ Value converted to the type of a vehicle parameter, without loss """
+    if value_type is int and isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"{value} is not an integer")
+        return int(value)
+    return value_type(value)
+
+
+class ParamDiff:
+    """
+     Differences between two sets of parameters, keyed by name.
+
+     Parameters
+     ----------
+     added : {str: int, float or str}
+          Parameters only in the new set, with their value
+
+     removed : {str: int, float or str}
+          Parameters only in the old set, with their value
+
+     changed : {str: (old, new)}
+          Parameters in both sets with a different value or type
+
+     """
+
+    def __init__(
+            self,
+            added,
+            removed,
+            changed):
+        """ Initializes the ParamDiff object """
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        """ True if there is any difference """
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        """ ParamDiff in string representation """
+        struct_repr = ", ".join([
+                "added: " + str(self.added),
+                "removed: " + str(self.removed),
+                "changed: " + str(self.changed)
+                ])
+
+        return f"ParamDiff: [{struct_repr}]"
+
+
+class ParamSnapshot:
+    """
+     Values of all the parameters of a vehicle at some point.
+
+     Values are kept by name and type, so that two snapshots compare in a
+     single pass. Float values are compared as 32-bit floats, the precision
+     of the vehicle, so values read from a file match the values read back.
+     NaN values compare equal.
+
+     Parameters
+     ----------
+     int_params : {str: int}
+          Integer parameters, by name
+
+     float_params : {str: float}
+          Float parameters, by name
+
+     custom_params : {str: str}
+          Custom parameters, by name
+
+     """
+
+    def __init__(self, int_params=None, float_params=None,
+                 custom_params=None):
+        """ Initializes the ParamSnapshot object """
+        self.int_params = dict(int_params or {})
+        self.float_params = dict(float_params or {})
+        self.custom_params = dict(custom_params or {})
+
+    def __len__(self):
+        """ Number of parameters """
+        return len(self.int_params) + len(self.float_params) \
+            + len(self.custom_params)
+
+    def __eq__(self, to_compare):
+        """ Checks if two ParamSnapshot are the same """
+        try:
+            return not self.diff(to_compare)
+        except AttributeError:
+            return False
+
+    @classmethod
+    def from_all_params(cls, all_params):
+        """
+         Snapshot of parameters returned by `Param.get_all_params`.
+
+         Parameters
+         ----------
+         all_params : AllParams
+              The parameters
+
+         Returns
+         -------
+         snapshot : ParamSnapshot
+              The snapshot
+        """
+        return cls({p.name: p.value for p in all_params.int_params},
+                   {p.name: p.value for p in all_params.float_params},
+                   {p.name: p.value for p in all_params.custom_params})
+
+    @classmethod
+    async def capture(cls, param):
+        """
+         Snapshot of the current parameters of a vehicle.
+
+         Parameters
+         ----------
+         param : Param
+              Param plugin of the vehicle (e.g. `drone.param`)
+
+         Returns
+         -------
+         snapshot : ParamSnapshot
+              The snapshot
+        """
+        return cls.from_all_params(await param.get_all_params())
+
+    def to_all_params(self):
+        """
+         Convert to the type returned by `Param.get_all_params`.
+
+         Returns
+         -------
+         all_params : AllParams
+              The parameters
+        """
+        return AllParams(
+            [IntParam(name, value)
+             for name, value in self.int_params.items()],
+            [FloatParam(name, value)
+             for name, value in self.float_params.items()],
+            [CustomParam(name, value)
+             for name, value in self.custom_params.items()])
+
+    def values(self):
+        """
+         All the values, typed, as accepted by `ParamBulk.set_many`.
+
+         Returns
+         -------
+         values : {str: int, float or str}
+              Values of the parameters, by name
+        """
+        values = dict(self.int_params)
+        values.update(self.float_params)
+        values.update(self.custom_params)
+        return values
+
+    def save(self, path):
+        """
+         Save the snapshot as compact JSON, gzip-compressed if `path` ends
+         with ".gz".
+
+         Parameters
+         ----------
+         path : str
+              Path of the file
+        """
+        data = json.dumps({
+            "format": _SNAPSHOT_FORMAT,
+            "int_params": self.int_params,
+            "float_params": self.float_params,
+            "custom_params": self.custom_params,
+        }, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+        if path.endswith(".gz"):
+            with gzip.open(path, "wb") as snapshot_file:
+                snapshot_file.write(data)
+        else:
+            with open(path, "wb") as snapshot_file:
+                snapshot_file.write(data)
+
+    @classmethod
+    def load(cls, path):
+        """
+         Load a snapshot saved with `save`.
+
+         Parameters
+         ----------
+         path : str
+              Path of the file
+
+         Returns
+         -------
+         snapshot : ParamSnapshot
+              The snapshot
+
+         Raises
+         ------
+         ValueError
+             If the file is not a snapshot.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as snapshot_file:
+            entry = json.loads(snapshot_file.read().decode("utf-8"))
+        if not isinstance(entry, dict) \
+                or entry.get("format") != _SNAPSHOT_FORMAT:
+            raise ValueError(f"'{path}' is not a parameter snapshot")
+        return cls(entry["int_params"], entry["float_params"],
+                   entry["custom_params"])
+
+    def diff(self, other):
+        """
+         Differences from this snapshot to another one.
+
+         Parameters
+         ----------
+         other : ParamSnapshot
+              The new parameters
+
+         Returns
+         -------
+         diff : ParamDiff
+              What changed from this snapshot to `other`
+        """
+        old = self._typed()
+        new = other._typed()
+        added = {name: new[name][1] for name in new.keys() - old.keys()}
+        removed = {name: old[name][1] for name in old.keys() - new.keys()}
+        changed = {}
+        for name in old.keys() & new.keys():
+            (old_type, old_value), (new_type, new_value) = old[name], new[name]
+            if old_type != new_type or (
+                    not _float32_equal(old_value, new_value)
+                    if old_type is float else old_value != new_value):
+                changed[name] = (old_value, new_value)
+        return ParamDiff(added, removed, changed)
+
+    async def diff_vehicle(self, param):
+        """
+         Differences from the parameters of a vehicle to this snapshot.
+
+         Parameters
+         ----------
+         param : Param
+              Param plugin of the vehicle (e.g. `drone.param`)
+
+         Returns
+         -------
+         diff : ParamDiff
+              What must change on the vehicle to match this snapshot
+        """
+        return (await ParamSnapshot.capture(param)).diff(self)
+
+    async def apply(self, param, current=None, concurrency=8):
+        """
+         Write the parameters of this snapshot that differ on a vehicle.
+
+         Parameters missing on the vehicle are not written, and parameters
+         missing in the snapshot are left as is. A value that cannot be
+         converted to the type of the vehicle parameter without loss, such
+         as 1.7 for an integer parameter, is not written and is reported
+         with `WRONG_TYPE`.
+
+         Parameters
+         ----------
+         param : Param
+              Param plugin of the vehicle (e.g. `drone.param`)
+
+         current : ParamSnapshot
+              Current parameters of the vehicle, captured if None
+
+         concurrency : int
+              Maximum number of requests in flight, see `ParamBulk`
+
+         Returns
+         -------
+         results : {str: ParamItemResult}
+              Outcome of every written or rejected parameter
+        """
+        if current is None:
+            current = await ParamSnapshot.capture(param)
+        changed = current.diff(self).changed
+        typed = current._typed()
+
+        # Write with the type of the vehicle parameter, which can make a
+        # value of another type equal to the current one
+        values = {}
+        rejected = {}
+        for name, (old_value, new_value) in changed.items():
+            value_type = typed[name][0]
+            try:
+                new_value = _convert(value_type, new_value)
+            except (TypeError, ValueError):
+                rejected[name] = ParamItemResult(
+                    name, None, ParamResult.Result.WRONG_TYPE, 0)
+                continue
+            if value_type is float:
+                if not _float32_equal(new_value, old_value):
+                    values[name] = new_value
+            elif new_value != old_value:
+                values[name] = new_value
+        results = await ParamBulk(param, concurrency=concurrency) \
+            .set_many(values)
+        results.update(rejected)
+        return results
+
+    def _typed(self):
+        typed = {name: (int, value)
+                 for name, value in self.int_params.items()}
+        typed.update((name, (float, value))
+                     for name, value in self.float_params.items())
+        typed.update((name, (str, value))
+                     for name, value in self.custom_params.items())
+        return typed
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+
+from .mocap import (AngleBody, AngularVelocityBody, AttitudePositionMocap,
+                    Covariance, MocapError, Odometry, PositionBody,
+                    Quaternion, SpeedBody, VisionPositionEstimate)
+
+#: Messages a `PoseFeeder` can send, by name
+MESSAGES = ("odometry", "mocap", "vision")
+
+_UNKNOWN_COVARIANCE = [float("nan")]
+_NAN3 = (float("nan"),) * 3
+
+
+def quaternion_to_euler(w, x, y, z):
+    """
+     Roll, pitch and yaw of a quaternion.
+
+     Parameters
+     ----------
+     w, x, y, z : float
+          The quaternion (Hamilton convention, w first)
+
+     Returns
+     -------
+     roll_rad, pitch_rad, yaw_rad : float
+          The ZYX Euler angles (in radians)
+    """
+    roll = math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = math.asin(max(-1.0, min(1.0, 2.0 * (w * y - z * x))))
+    yaw = math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return roll, pitch, yaw
+
+
+class _ClockOffset:
+    """
+     Offset from a source clock to the UNIX time, as the smallest offset
+     between sample and reception times over a sliding window: the sample
+     with the least transport delay gives the best estimate, and the window
+     follows the drift between the clocks.
+    """
+
+    def __init__(self, window_s):
+        self._window_us = int(window_s * 1e6)
+        # (reception time, offset), with increasing offsets
+        self._samples = deque()
+
+    def update(self, sample_us, received_us):
+        offset = received_us - sample_us
+        samples = self._samples
+        while samples and samples[-1][1] >= offset:
+            samples.pop()
+        samples.append((received_us, offset))
+        while samples[0][0] < received_us - self._window_us:
+            samples.popleft()
+        return samples[0][1]
+
+
+class PoseFeederStats:
+    """
+     Counters and latencies of one vehicle of a `PoseFeeder`.
+
+     """
+
+    def __init__(self):
+        """ Initializes the PoseFeederStats object """
+        #: Number of poses received
+        self.received = 0
+        #: Number of poses replaced by a newer one before being sent
+        self.superseded = 0
+        #: Number of poses dropped because they were not newer than the
+        #: last sent one
+        self.stale = 0
+        #: Number of poses sent
+        self.sent = 0
+        #: Number of sends that failed
+        self.failed = 0
+        #: Time between reception and the end of the send of the last sent
+        #: pose (in seconds)
+        self.latency_s = None
+        #: Time between capture and the end of the send of the last sent pose
+        #: (in seconds), only meaningful if the poses are timestamped
+        self.age_s = None
+        #: Highest latency seen so far (in seconds)
+        self.max_latency_s = 0.0
+
+    def __str__(self):
+        """ PoseFeederStats in string representation """
+        struct_repr = ", ".join([
+                "received: " + str(self.received),
+                "superseded: " + str(self.superseded),
+                "stale: " + str(self.stale),
+                "sent: " + str(self.sent),
+                "failed: " + str(self.failed),
+                "latency_s: " + str(self.latency_s),
+                "age_s: " + str(self.age_s),
+                "max_latency_s: " + str(self.max_latency_s)
+                ])
+
+        return f"PoseFeederStats: [{struct_repr}]"
+
+
+class _Vehicle:
+    """
+     Mocap plugin, latest pose and reusable message of one vehicle
+    """
+
+    def __init__(self, mocap, message, pose_covariance, velocity_covariance):
+        self.mocap = mocap
+        self.latest = None
+        self.last_time_usec = 0
+        self.stats = PoseFeederStats()
+        self.position = PositionBody(0.0, 0.0, 0.0)
+        self.q = Quaternion(1.0, 0.0, 0.0, 0.0)
+        self.angle = AngleBody(0.0, 0.0, 0.0)
+        self.speed = SpeedBody(*_NAN3)
+        self.angular_velocity = AngularVelocityBody(*_NAN3)
+
+        if message == "odometry":
+            self.message = Odometry(
+                0, Odometry.MavFrame.MOCAP_NED, self.position, self.q,
+                self.speed, self.angular_velocity, pose_covariance,
+                velocity_covariance)
+            self.send = mocap.set_odometry
+        elif message == "mocap":
+            self.message = AttitudePositionMocap(
+                0, self.q, self.position, pose_covariance)
+            self.send = mocap.set_attitude_position_mocap
+        else:
+            self.message = VisionPositionEstimate(
+                0, self.position, self.angle, pose_covariance)
+            self.send = mocap.set_vision_position_estimate
+
+
+class PoseFeeder:
+    """
+     Sends the latest pose of many vehicles at a fixed rate.
+
+     Poses are handed over with `update` (e.g. from the callback of a
+     motion capture client) or `update_batch` (a NumPy batch of rigid
+     bodies), which only store them: each vehicle keeps its most recent
+     pose, and `run` sends it at `rate_hz` to the vehicle's mocap plugin,
+     so a capture rate higher than the link rate drops poses instead of
+     queuing them up. Vehicles are sent to independently, a slow one does
+     not delay the others.
+
+     Poses are timestamped in the clock of the capture system. Their
+     `time_usec` is the capture time mapped to the UNIX time, with the
+     offset between both clocks estimated from the reception times; poses
+     without a timestamp use their reception time. A pose that is not newer
+     than the last one sent to its vehicle is dropped.
+
+     The messages are built once per vehicle and updated in place, and the
+     covariances are shared by all the sends.
+
+     Parameters
+     ----------
+     rate_hz : float
+          Rate at which the poses are sent to each vehicle
+
+     message : str
+          "odometry" (`Mocap.set_odometry`, frame MOCAP_NED), "mocap"
+          (`set_attitude_position_mocap`) or "vision"
+          (`set_vision_position_estimate`)
+
+     pose_covariance : [float]
+          Upper right triangle of the pose covariance (21 entries), unknown
+          by default
+
+     velocity_covariance : [float]
+          Upper right triangle of the velocity covariance, for odometry
+
+     clock_window_s : float
+          Window of the clock offset estimation (in seconds)
+
+     """
+
+    def __init__(self, rate_hz=50.0, message="odometry",
+                 pose_covariance=None, velocity_covariance=None,
+                 clock_window_s=10.0):
+        """ Initializes the PoseFeeder object """
+        if message not in MESSAGES:
+            raise ValueError(f"Unknown message '{message}', expected one "
+                             f"of {MESSAGES}")
+        self._period_s = 1.0 / rate_hz
+        self._message = message
+        self._pose_covariance = Covariance(
+            list(pose_covariance or _UNKNOWN_COVARIANCE))
+        self._velocity_covariance = Covariance(
+            list(velocity_covariance or _UNKNOWN_COVARIANCE))
+        self._clock = _ClockOffset(clock_window_s)
+        self._vehicles = {}
+        # Send task of every vehicle, and outcome of `run`, while running
+        self._tasks = {}
+        self._done = None
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    def add_vehicle(self, vehicle_id, mocap):
+        """
+         Register a vehicle, replacing any vehicle with the same id. While
+         `run` is running, sending to it starts at once.
+
+         Parameters
+         ----------
+         vehicle_id : hashable
+              Identifier of the vehicle in the poses, e.g. its rigid body id
+
+         mocap : Mocap
+              Mocap plugin of the vehicle (e.g. `drone.mocap`)
+        """
+        vehicle = _Vehicle(
+            mocap, self._message, self._pose_covariance,
+            self._velocity_covariance)
+        self._vehicles[vehicle_id] = vehicle
+        if self._done is not None:
+            previous = self._tasks.pop(vehicle_id, None)
+            if previous is not None:
+                previous.cancel()
+            self._start(vehicle_id, vehicle)
+
+    def stats(self, vehicle_id):
+        """
+         Statistics of a vehicle.
+
+         Parameters
+         ----------
+         vehicle_id : hashable
+              Identifier of the vehicle
+
+         Returns
+         -------
+         stats : PoseFeederStats
+              The statistics
+        """
+        return self._vehicles[vehicle_id].stats
+
+    def update(self, vehicle_id, position, q, timestamp_s=None,
+               velocity=None, angular_velocity=None):
+        """
+         Hand over the pose of a vehicle. Poses of unknown vehicles are
+         ignored.
+
+         Parameters
+         ----------
+         vehicle_id : hashable
+              Identifier of the vehicle
+
+         position : (float, float, float)
+              NED position (in metres)
+
+         q : (float, float, float, float)
+              Attitude quaternion, w first
+
+         timestamp_s : float
+              Capture time, in the clock of the capture system (in seconds)
+
+         velocity : (float, float, float)
+              Linear speed, for odometry (in m/s)
+
+         angular_velocity : (float, float, float)
+              Roll, pitch and yaw speed, for odometry (in rad/s)
+        """
+        vehicle = self._vehicles.get(vehicle_id)
+        if vehicle is None:
+            return
+        received_ns = time.monotonic_ns()
+        received_us = time.time_ns() // 1000
+        if timestamp_s is None:
+            time_usec = received_us
+        else:
+            sample_us = int(timestamp_s * 1e6)
+            time_usec = sample_us + self._clock.update(sample_us, received_us)
+
+        stats = vehicle.stats
+        stats.received += 1
+        if vehicle.latest is not None:
+            stats.superseded += 1
+        vehicle.latest = (time_usec, received_ns, position, q, velocity,
+                          angular_velocity)
+
+    def update_batch(self, vehicle_ids, positions, quaternions,
+                     timestamps_s=None):
+        """
+         Hand over the poses of several vehicles.
+
+         Parameters
+         ----------
+         vehicle_ids : sequence
+              Identifiers of the vehicles
+
+         positions : array-like
+              NED positions, N x 3 (in metres)
+
+         quaternions : array-like
+              Attitude quaternions, N x 4, w first
+
+         timestamps_s : float or array-like
+              Capture time of all the poses, or of each one, in the clock of
+              the capture system (in seconds)
+        """
+        # Convert NumPy arrays to lists at once rather than per element
+        positions = positions.tolist() if hasattr(positions, "tolist") \
+            else positions
+        quaternions = quaternions.tolist() \
+            if hasattr(quaternions, "tolist") else quaternions
+        if timestamps_s is None or isinstance(timestamps_s, (int, float)):
+            timestamps_s = [timestamps_s] * len(positions)
+        elif hasattr(timestamps_s, "tolist"):
+            timestamps_s = timestamps_s.tolist()
+        if hasattr(vehicle_ids, "tolist"):
+            vehicle_ids = vehicle_ids.tolist()
+        for vehicle_id, position, q, timestamp_s in zip(
+                vehicle_ids, positions, quaternions, timestamps_s):
+            self.update(vehicle_id, position, q, timestamp_s)
+
+    async def run(self):
+        """
+         Send the latest poses of all the vehicles, forever, including the
+         vehicles added while running.
+        """
+        self._done = asyncio.get_running_loop().create_future()
+        for vehicle_id, vehicle in self._vehicles.items():
+            self._start(vehicle_id, vehicle)
+        try:
+            await self._done
+        finally:
+            self._done = None
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+
+    def _start(self, vehicle_id, vehicle):
+        task = asyncio.ensure_future(self._run_vehicle(vehicle))
+        task.add_done_callback(self._vehicle_done)
+        self._tasks[vehicle_id] = task
+
+    def _vehicle_done(self, task):
+        # A send loop only ends by being cancelled, or on an unexpected error
+        if task.cancelled() or self._done is None or self._done.done():
+            return
+        self._done.set_exception(task.exception())
+
+    async def _run_vehicle(self, vehicle):
+        loop = asyncio.get_running_loop()
+        period = self._period_s
+        deadline = loop.time()
+        while True:
+            pose = vehicle.latest
+            vehicle.latest = None
+            if pose is not None:
+                await self._send(vehicle, pose)
+
+            # Fixed rate, skipping the periods a slow send overran
+            deadline += period
+            now = loop.time()
+            if deadline < now:
+                deadline = now
+            await asyncio.sleep(deadline - now)
+
+    async def _send(self, vehicle, pose):
+        time_usec, received_ns, position, q, velocity, angular_velocity = pose
+        stats = vehicle.stats
+        if time_usec <= vehicle.last_time_usec:
+            stats.stale += 1
+            return
+
+        message = vehicle.message
+        message.time_usec = time_usec
+        body = vehicle.position
+        body.x_m, body.y_m, body.z_m = position
+        if self._message == "vision":
+            angle = vehicle.angle
+            angle.roll_rad, angle.pitch_rad, angle.yaw_rad = \
+                quaternion_to_euler(*q)
+        else:
+            quaternion = vehicle.q
+            quaternion.w, quaternion.x, quaternion.y, quaternion.z = q
+        if self._message == "odometry":
+            speed = vehicle.speed
+            speed.x_m_s, speed.y_m_s, speed.z_m_s = velocity or _NAN3
+            rate = vehicle.angular_velocity
+            rate.roll_rad_s, rate.pitch_rad_s, rate.yaw_rad_s = \
+                angular_velocity or _NAN3
+
+        try:
+            await vehicle.send(message)
+        except MocapError as error:
+            stats.failed += 1
+            self._logger.warning(f"Pose send failed: {error}")
+            return
+
+        vehicle.last_time_usec = time_usec
+        stats.sent += 1
+        stats.latency_s = (time.monotonic_ns() - received_ns) * 1e-9
+        stats.age_s = (time.time_ns() // 1000 - time_usec) * 1e-6
+        stats.max_latency_s = max(stats.max_latency_s, stats.latency_s)
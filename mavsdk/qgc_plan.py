@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+import collections
+import hashlib
+import json
+import math
+import os
+import threading
+
+from .mission_raw import MissionImportData, MissionItem
+
+# MAVLink values used in plan files
+_MAV_CMD_NAV_FENCE_POLYGON_VERTEX_INCLUSION = 5001
+_MAV_CMD_NAV_FENCE_POLYGON_VERTEX_EXCLUSION = 5002
+_MAV_CMD_NAV_FENCE_CIRCLE_INCLUSION = 5003
+_MAV_CMD_NAV_FENCE_CIRCLE_EXCLUSION = 5004
+_MAV_CMD_NAV_RALLY_POINT = 5100
+
+_MAV_FRAME_MISSION = 2
+_MAV_FRAME_GLOBAL_INT = 5
+_MAV_FRAME_GLOBAL_RELATIVE_ALT = 3
+_GLOBAL_FRAMES = (0, 3, 5, 6, 10, 11)
+
+_MAV_MISSION_TYPE_MISSION = 0
+_MAV_MISSION_TYPE_FENCE = 1
+_MAV_MISSION_TYPE_RALLY = 2
+
+_WAYPOINTS_HEADER = "QGC WPL 110"
+
+
+def import_qgc_plan(path, cache=True):
+    """
+     Import a QGroundControl mission in JSON .plan format, from a file.
+
+     Unlike `MissionRaw.import_qgroundcontrol_mission`, the file is parsed
+     locally and no connection to mavsdk_server is needed. The whole file
+     is decoded at once with the standard `json` module, which is fast for
+     plans of any practical size, and repeated imports hit the cache.
+
+     Supported:
+     - Waypoints and other simple items
+     - Survey and corridor scan (using the items generated by QGC)
+     - Geofence polygons and circles
+     - Rally points
+     Not supported:
+     - Structure Scan
+
+     Parameters
+     ----------
+     path : str
+          File path of the QGC plan
+
+     cache : bool
+          Reuse the result of a previous import of the same file if its
+          modification time and size, or content hash, did not change
+
+     Returns
+     -------
+     mission_import_data : MissionImportData
+          The imported mission data
+
+     Raises
+     ------
+     ValueError
+         If the plan is invalid or uses unsupported items.
+    """
+    if not cache:
+        with open(path, "rb") as plan_file:
+            return _to_import_data(_parse_plan(plan_file.read()))
+    return _to_import_data(_default_cache.get(path, _parse_plan))
+
+
+def import_qgc_plan_from_string(qgc_plan):
+    """
+     Import a QGroundControl mission in JSON .plan format, from a string.
+
+     See `import_qgc_plan`. Results are cached by content hash.
+
+     Parameters
+     ----------
+     qgc_plan : str
+          QGC plan as string
+
+     Returns
+     -------
+     mission_import_data : MissionImportData
+          The imported mission data
+
+     Raises
+     ------
+     ValueError
+         If the plan is invalid or uses unsupported items.
+    """
+    data = qgc_plan.encode("utf-8")
+    return _to_import_data(_default_cache.get_content(data, _parse_plan))
+
+
+def import_waypoints(path, cache=True):
+    """
+     Import mission items from a legacy QGC WPL 110 .waypoints file.
+
+     The items are imported as they are in the file, including the home
+     position on the first line for ArduPilot files.
+
+     Parameters
+     ----------
+     path : str
+          File path of the waypoints file
+
+     cache : bool
+          Reuse the result of a previous import of the same file if its
+          modification time and size, or content hash, did not change
+
+     Returns
+     -------
+     mission_items : [MissionItem]
+          The imported mission items
+
+     Raises
+     ------
+     ValueError
+         If the file is not a valid waypoints file.
+    """
+    if not cache:
+        with open(path, "rb") as waypoints_file:
+            items = _parse_waypoints(waypoints_file.read())
+    else:
+        items = _default_cache.get(path, _parse_waypoints)
+    return [MissionItem(*item) for item in items]
+
+
+def export_qgc_plan(mission_import_data, planned_home_position=None):
+    """
+     Export mission data to the QGroundControl JSON .plan format.
+
+     Mission items are exported as simple items. Fence and rally items
+     must use the commands produced by `import_qgc_plan`.
+
+     Parameters
+     ----------
+     mission_import_data : MissionImportData
+          The mission data to export
+
+     planned_home_position : (float, float, float)
+          Latitude, longitude (in degrees) and altitude (in metres) of the
+          planned home position. Defaults to the first positioned mission
+          item.
+
+     Returns
+     -------
+     qgc_plan : str
+          The QGC plan, as a JSON string
+    """
+    mission_items = mission_import_data.mission_items
+
+    if planned_home_position is None:
+        planned_home_position = next(
+            ([_decode_xy(item.frame, item.x), _decode_xy(item.frame, item.y),
+              item.z]
+             for item in mission_items if item.frame in _GLOBAL_FRAMES),
+            [0, 0, 0])
+
+    plan = {
+        "fileType": "Plan",
+        "geoFence": _export_geofence(mission_import_data.geofence_items),
+        "groundStation": "QGroundControl",
+        "mission": {
+            "cruiseSpeed": 15,
+            "firmwareType": 12,
+            "hoverSpeed": 5,
+            "items": [_export_simple_item(item, jump_id)
+                      for jump_id, item in enumerate(mission_items, 1)],
+            "plannedHomePosition": [_json_number(value)
+                                    for value in planned_home_position],
+            "vehicleType": 2,
+            "version": 2
+        },
+        "rallyPoints": {
+            "points": [[_decode_xy(item.frame, item.x),
+                        _decode_xy(item.frame, item.y),
+                        _json_number(item.z)]
+                       for item in mission_import_data.rally_items],
+            "version": 2
+        },
+        "version": 1
+    }
+    return json.dumps(plan, indent=4)
+
+
+def export_waypoints(mission_items):
+    """
+     Export mission items to the legacy QGC WPL 110 .waypoints format.
+
+     Parameters
+     ----------
+     mission_items : [MissionItem]
+          The mission items to export
+
+     Returns
+     -------
+     waypoints : str
+          The waypoints file content
+    """
+    lines = [_WAYPOINTS_HEADER]
+    for item in mission_items:
+        values = [item.seq, item.current, item.frame, item.command,
+                  item.param1, item.param2, item.param3, item.param4,
+                  _decode_xy(item.frame, item.x),
+                  _decode_xy(item.frame, item.y),
+                  item.z, item.autocontinue]
+        lines.append("\t".join(_format_number(value) for value in values))
+    return "\n".join(lines) + "\n"
+
+
+def clear_cache():
+    """
+     Forget every cached import.
+    """
+    _default_cache.clear()
+
+
+class _ImportCache:
+    """
+     Caches parse results by file path and content hash.
+
+     A file whose modification time and size did not change is not read
+     again. A file that changed on disk is read and hashed, and only parsed
+     if its content is new. Results are stored as tuples, so they can be
+     shared safely.
+    """
+
+    def __init__(self, max_entries=256):
+        self._max_entries = max_entries
+        self._files = {}
+        self._contents = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, parse):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size, parse)
+
+        with self._lock:
+            cached = self._files.get(path)
+            # The content may have been evicted since, then read it again
+            if cached is not None and cached[0] == signature \
+                    and cached[1] in self._contents:
+                self._contents.move_to_end(cached[1])
+                return self._contents[cached[1]]
+
+        with open(path, "rb") as file:
+            data = file.read()
+        key, result = self._lookup(data, parse)
+
+        with self._lock:
+            self._files[path] = (signature, key)
+            if len(self._files) > self._max_entries:
+                del self._files[next(iter(self._files))]
+        return result
+
+    def get_content(self, data, parse):
+        return self._lookup(data, parse)[1]
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._contents.clear()
+
+    def _lookup(self, data, parse):
+        key = (hashlib.sha256(data).digest(), parse)
+        with self._lock:
+            if key in self._contents:
+                self._contents.move_to_end(key)
+                return key, self._contents[key]
+
+        result = parse(data)
+
+        with self._lock:
+            self._contents[key] = result
+            if len(self._contents) > self._max_entries:
+                self._contents.popitem(last=False)
+        return key, result
+
+
+_default_cache = _ImportCache()
+
+
+def _to_import_data(parsed):
+    mission_items, geofence_items, rally_items = parsed
+    return MissionImportData(
+        [MissionItem(*item) for item in mission_items],
+        [MissionItem(*item) for item in geofence_items],
+        [MissionItem(*item) for item in rally_items])
+
+
+def _parse_plan(data):
+    try:
+        plan = json.loads(data)
+        if plan.get("fileType") != "Plan":
+            raise ValueError("Not a QGC plan file")
+
+        simple_items = []
+        for item in plan.get("mission", {}).get("items", []):
+            simple_items.extend(_flatten_item(item))
+
+        mission_items = tuple(
+            _import_simple_item(seq, item)
+            for seq, item in enumerate(simple_items))
+        geofence_items = _import_geofence(plan.get("geoFence", {}))
+        rally_items = tuple(
+            _rally_item(seq, point)
+            for seq, point in enumerate(
+                plan.get("rallyPoints", {}).get("points", [])))
+    except (AttributeError, IndexError, KeyError, TypeError) as error:
+        raise ValueError(f"Invalid QGC plan: {error!r}") from error
+
+    return mission_items, geofence_items, rally_items
+
+
+def _flatten_item(item):
+    item_type = item.get("type")
+    if item_type == "SimpleItem":
+        return [item]
+    if item_type == "ComplexItem":
+        transect = item.get("TransectStyleComplexItem")
+        if transect is None:
+            raise ValueError(
+                f"Unsupported complex item: {item.get('complexItemType')}")
+        return [simple for nested in transect["Items"]
+                for simple in _flatten_item(nested)]
+    raise ValueError(f"Unsupported item type: {item_type}")
+
+
+def _import_simple_item(seq, item):
+    params = item["params"]
+    frame = item["frame"]
+    return (
+        seq,
+        frame,
+        item["command"],
+        1 if seq == 0 else 0,
+        1 if item.get("autoContinue", True) else 0,
+        _param(params[0]),
+        _param(params[1]),
+        _param(params[2]),
+        _param(params[3]),
+        _encode_xy(frame, params[4]),
+        _encode_xy(frame, params[5]),
+        _param(params[6]),
+        _MAV_MISSION_TYPE_MISSION)
+
+
+def _import_geofence(geofence):
+    items = []
+    for polygon in geofence.get("polygons", []):
+        command = _MAV_CMD_NAV_FENCE_POLYGON_VERTEX_INCLUSION \
+            if polygon["inclusion"] \
+            else _MAV_CMD_NAV_FENCE_POLYGON_VERTEX_EXCLUSION
+        vertices = polygon["polygon"]
+        for latitude, longitude in vertices:
+            items.append(_fence_item(len(items), command, len(vertices),
+                                     latitude, longitude))
+
+    for circle in geofence.get("circles", []):
+        command = _MAV_CMD_NAV_FENCE_CIRCLE_INCLUSION \
+            if circle["inclusion"] \
+            else _MAV_CMD_NAV_FENCE_CIRCLE_EXCLUSION
+        latitude, longitude = circle["circle"]["center"]
+        items.append(_fence_item(len(items), command,
+                                 circle["circle"]["radius"],
+                                 latitude, longitude))
+    return tuple(items)
+
+
+def _fence_item(seq, command, param1, latitude, longitude):
+    return (seq, _MAV_FRAME_GLOBAL_INT, command, 0, 1,
+            float(param1), 0.0, 0.0, 0.0,
+            _encode_xy(_MAV_FRAME_GLOBAL_INT, latitude),
+            _encode_xy(_MAV_FRAME_GLOBAL_INT, longitude),
+            0.0, _MAV_MISSION_TYPE_FENCE)
+
+
+def _rally_item(seq, point):
+    latitude, longitude, altitude = point
+    return (seq, _MAV_FRAME_GLOBAL_RELATIVE_ALT, _MAV_CMD_NAV_RALLY_POINT,
+            0, 1, 0.0, 0.0, 0.0, 0.0,
+            _encode_xy(_MAV_FRAME_GLOBAL_RELATIVE_ALT, latitude),
+            _encode_xy(_MAV_FRAME_GLOBAL_RELATIVE_ALT, longitude),
+            float(altitude), _MAV_MISSION_TYPE_RALLY)
+
+
+def _parse_waypoints(data):
+    lines = data.decode("utf-8").splitlines()
+    if not lines or not lines[0].startswith("QGC WPL"):
+        raise ValueError("Not a QGC WPL waypoints file")
+
+    items = []
+    for number, line in enumerate(lines[1:], 2):
+        if not line.strip():
+            continue
+        fields = line.split("\t") if "\t" in line else line.split()
+        if len(fields) != 12:
+            raise ValueError(
+                f"Invalid waypoints line {number}: expected 12 fields, "
+                f"got {len(fields)}")
+        try:
+            frame = int(fields[2])
+            items.append((
+                int(fields[0]),
+                frame,
+                int(fields[3]),
+                int(fields[1]),
+                int(float(fields[11])),
+                float(fields[4]),
+                float(fields[5]),
+                float(fields[6]),
+                float(fields[7]),
+                _encode_xy(frame, float(fields[8])),
+                _encode_xy(frame, float(fields[9])),
+                float(fields[10]),
+                _MAV_MISSION_TYPE_MISSION))
+        except ValueError as error:
+            raise ValueError(
+                f"Invalid waypoints line {number}: {error}") from error
+    return tuple(items)
+
+
+def _export_simple_item(item, jump_id):
+    return {
+        "autoContinue": bool(item.autocontinue),
+        "command": item.command,
+        "doJumpId": jump_id,
+        "frame": item.frame,
+        "params": [_json_number(item.param1),
+                   _json_number(item.param2),
+                   _json_number(item.param3),
+                   _json_number(item.param4),
+                   _decode_xy(item.frame, item.x),
+                   _decode_xy(item.frame, item.y),
+                   _json_number(item.z)],
+        "type": "SimpleItem"
+    }
+
+
+def _export_geofence(geofence_items):
+    polygons = []
+    circles = []
+    remaining = 0
+    for item in geofence_items:
+        latitude = _decode_xy(item.frame, item.x)
+        longitude = _decode_xy(item.frame, item.y)
+        if item.command in (_MAV_CMD_NAV_FENCE_POLYGON_VERTEX_INCLUSION,
+                            _MAV_CMD_NAV_FENCE_POLYGON_VERTEX_EXCLUSION):
+            if remaining == 0:
+                remaining = int(item.param1)
+                polygons.append({
+                    "inclusion": item.command
+                    == _MAV_CMD_NAV_FENCE_POLYGON_VERTEX_INCLUSION,
+                    "polygon": [],
+                    "version": 1
+                })
+            polygons[-1]["polygon"].append([latitude, longitude])
+            remaining -= 1
+        elif item.command in (_MAV_CMD_NAV_FENCE_CIRCLE_INCLUSION,
+                              _MAV_CMD_NAV_FENCE_CIRCLE_EXCLUSION):
+            circles.append({
+                "circle": {
+                    "center": [latitude, longitude],
+                    "radius": item.param1
+                },
+                "inclusion": item.command
+                == _MAV_CMD_NAV_FENCE_CIRCLE_INCLUSION,
+                "version": 1
+            })
+
+    return {"circles": circles, "polygons": polygons, "version": 2}
+
+
+def _param(value):
+    return math.nan if value is None else float(value)
+
+
+def _encode_xy(frame, value):
+    """
+     Converts param5 / param6 to the MISSION_ITEM_INT x / y encoding
+    """
+    if value is None:
+        return 0
+    if frame in _GLOBAL_FRAMES:
+        return int(round(value * 1e7))
+    if frame == _MAV_FRAME_MISSION:
+        return int(value)
+    return int(round(value * 1e4))
+
+
+def _decode_xy(frame, value):
+    if frame in _GLOBAL_FRAMES:
+        return value / 1e7
+    if frame == _MAV_FRAME_MISSION:
+        return value
+    return value / 1e4
+
+
+def _json_number(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
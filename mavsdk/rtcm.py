@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import time
+
+from .rtk import RtcmData, RtkError
+
+PREAMBLE = 0xD3
+
+# Preamble, 6 reserved bits and 10 bits of payload length
+_HEADER_BYTES = 3
+_CRC_BYTES = 3
+
+#: Most bytes sent in one `Rtk.send_rtcm_data` call: the server splits the
+#: data into at most 4 GPS_RTCM_DATA fragments of 180 bytes
+MAX_SEND_BYTES = 4 * 180
+
+
+def _crc24q_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+        table.append(crc & 0xFFFFFF)
+    return tuple(table)
+
+
+_CRC24Q_TABLE = _crc24q_table()
+
+
+def crc24q(data, crc=0):
+    """
+     CRC-24Q of data, as used by RTCM3.
+
+     Parameters
+     ----------
+     data : bytes-like
+          The data
+
+     crc : int
+          CRC of the preceding data, to compute it over several parts
+
+     Returns
+     -------
+     crc : int
+          The 24-bit CRC
+    """
+    table = _CRC24Q_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ byte]
+    return crc
+
+
+def rtcm_priority(message_type):
+    """
+     Default send priority of an RTCM3 message type, lowest first.
+
+     Observations (MSM and legacy) go first, as they age quickly. Station
+     description and bias messages follow, and ephemerides, which are
+     valid for hours, go last.
+
+     Parameters
+     ----------
+     message_type : int
+          The RTCM3 message number
+
+     Returns
+     -------
+     priority : int
+          0 for observations, 1 for station messages, 2 for the others
+    """
+    if 1001 <= message_type <= 1004 or 1009 <= message_type <= 1012 \
+            or 1071 <= message_type <= 1137:
+        return 0
+    if message_type in (1005, 1006, 1007, 1008, 1033, 1230):
+        return 1
+    return 2
+
+
+class RtcmFrame:
+    """
+     One RTCM3 frame, including its header and CRC.
+
+     Parameters
+     ----------
+     message_type : int
+          RTCM3 message number, 0 for an empty frame
+
+     data : memoryview
+          The frame bytes, a view of the data it was parsed from
+
+     received_ns : int
+          Monotonic time of reception (in nanoseconds)
+
+     """
+
+    __slots__ = ("message_type", "data", "received_ns")
+
+    def __init__(
+            self,
+            message_type,
+            data,
+            received_ns):
+        """ Initializes the RtcmFrame object """
+        self.message_type = message_type
+        self.data = data
+        self.received_ns = received_ns
+
+    def __len__(self):
+        return len(self.data)
+
+    def __str__(self):
+        """ RtcmFrame in string representation """
+        struct_repr = ", ".join([
+                "message_type: " + str(self.message_type),
+                "size: " + str(len(self.data))
+                ])
+
+        return f"RtcmFrame: [{struct_repr}]"
+
+
+class RtcmFramer:
+    """
+     Extracts RTCM3 frames from a byte stream.
+
+     Data can be fed in chunks of any size, e.g. as read from a serial port;
+     a frame split between chunks is completed by the next ones. Bytes that
+     are not part of a valid frame (other protocols such as UBX or NMEA on
+     the same port, line noise) are skipped, and frames with a wrong CRC are
+     dropped.
+
+     Every `feed` copies the pending bytes once into an immutable buffer, and
+     the frames it returns are views of that buffer: they stay valid after
+     the following calls, without further copies.
+
+     """
+
+    def __init__(self):
+        """ Initializes the RtcmFramer object """
+        self._pending = bytearray()
+
+        #: Number of valid frames extracted
+        self.frames = 0
+        #: Number of frames dropped because of their CRC
+        self.crc_errors = 0
+        #: Number of bytes skipped outside of frames
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """
+         Add received data, and extract the frames it completes.
+
+         Parameters
+         ----------
+         data : bytes-like
+              The received data
+
+         Returns
+         -------
+         frames : [RtcmFrame]
+              The complete frames, in stream order
+        """
+        received_ns = time.monotonic_ns()
+        pending = self._pending
+        pending += data
+        buffer = bytes(pending)
+        view = memoryview(buffer)
+        size = len(buffer)
+        frames = []
+
+        position = 0
+        while True:
+            start = buffer.find(b"\xd3", position)
+            if start < 0:
+                self.skipped_bytes += size - position
+                position = size
+                break
+            self.skipped_bytes += start - position
+            position = start
+            if size - start < _HEADER_BYTES:
+                break
+            if buffer[start + 1] & 0xFC:
+                # Reserved bits are set, not a frame
+                position = start + 1
+                self.skipped_bytes += 1
+                continue
+
+            length = ((buffer[start + 1] & 0x03) << 8) | buffer[start + 2]
+            end = start + _HEADER_BYTES + length + _CRC_BYTES
+            if end > size:
+                break
+            crc = (buffer[end - 3] << 16) | (buffer[end - 2] << 8) \
+                | buffer[end - 1]
+            if crc24q(view[start:end - _CRC_BYTES]) != crc:
+                # Probably a preamble byte in other data, resynchronize
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                position = start + 1
+                continue
+
+            message_type = 0
+            if length >= 2:
+                message_type = (buffer[start + 3] << 4) \
+                    | (buffer[start + 4] >> 4)
+            frames.append(
+                RtcmFrame(message_type, view[start:end], received_ns))
+            position = end
+
+        del pending[:position]
+        self.frames += len(frames)
+        return frames
+
+
+class RtcmForwarderStats:
+    """
+     Counters and latencies of an `RtcmForwarder`.
+
+     """
+
+    def __init__(self):
+        """ Initializes the RtcmForwarderStats object """
+        #: Number of frames queued
+        self.queued = 0
+        #: Number of frames sent
+        self.sent = 0
+        #: Number of `send_rtcm_data` calls
+        self.sends = 0
+        #: Number of bytes sent
+        self.bytes_sent = 0
+        #: Number of frames lost because they could not be encoded or their
+        #: send failed
+        self.failed = 0
+        #: Latency of the oldest frame of the last send, since its reception
+        #: (in seconds)
+        self.latency_s = None
+        #: Highest latency seen so far (in seconds)
+        self.max_latency_s = 0.0
+
+    def __str__(self):
+        """ RtcmForwarderStats in string representation """
+        struct_repr = ", ".join([
+                "queued: " + str(self.queued),
+                "sent: " + str(self.sent),
+                "sends: " + str(self.sends),
+                "bytes_sent: " + str(self.bytes_sent),
+                "failed: " + str(self.failed),
+                "latency_s: " + str(self.latency_s),
+                "max_latency_s: " + str(self.max_latency_s)
+                ])
+
+        return f"RtcmForwarderStats: [{struct_repr}]"
+
+
+def _literal_char(byte):
+    if byte in b"\\'":
+        return "\\" + chr(byte)
+    if 0x20 <= byte < 0x7F:
+        return chr(byte)
+    return {0x09: "\\t", 0x0A: "\\n", 0x0D: "\\r"}.get(byte, f"\\x{byte:02x}")
+
+
+_LITERAL_TABLE = {byte: _literal_char(byte) for byte in range(256)}
+
+
+def _bytes_literal(data):
+    """
+     Bytes as the string of their Python bytes literal, e.g. "b'\\xd3\\x00'"
+    """
+    return "b'" + bytes(data).decode("latin-1").translate(_LITERAL_TABLE) \
+        + "'"
+
+
+class RtcmForwarder:
+    """
+     Forwards RTCM3 corrections to the vehicle, batched by priority.
+
+     Frames queued while a send is in progress are sent together by the
+     following ones: they are ordered by the priority of their message type
+     (stable within a priority), and packed into sends of at most
+     `max_send_bytes`. A frame larger than that is split over consecutive
+     sends, the receiver forwards the bytes to the GNSS receiver as a
+     stream. A burst of frames at the start of an epoch thus costs a few
+     calls instead of one per frame.
+
+     `RtcmData.data` is a string, which the server decodes back to bytes:
+     by default the data is passed as its Python bytes literal (as in
+     ``str(data)``, e.g. "b'\\xd3\\x00\\x13...'"), which carries every byte
+     value. With a server expecting another encoding (e.g. base64), pass it
+     as `encode`. `max_send_bytes` applies to the UTF-8 length of the
+     encoded string, counted as the sum of the encoded sizes of the frames
+     of a send (an upper bound for the bytes literal and base64).
+
+     Parameters
+     ----------
+     rtk : Rtk
+          Rtk plugin of the vehicle (e.g. `drone.rtk`)
+
+     priority : callable
+          Function returning the priority of a message type, lowest sent
+          first, see `rtcm_priority`
+
+     max_send_bytes : int
+          Most bytes per `send_rtcm_data` call
+
+     encode : callable
+          Function converting the bytes of a send to the `RtcmData` string,
+          it must accept every byte value
+
+     Raises
+     ------
+     ValueError
+         If encode cannot carry binary data.
+
+     """
+
+    def __init__(self, rtk, priority=rtcm_priority,
+                 max_send_bytes=MAX_SEND_BYTES, encode=_bytes_literal):
+        """ Initializes the RtcmForwarder object """
+        try:
+            encode(bytes(range(256)))
+        except ValueError as error:
+            raise ValueError(
+                f"encode cannot carry binary RTCM data: {error}") from error
+        self._rtk = rtk
+        self._priority = priority
+        self._max_send_bytes = max_send_bytes
+        self._encode = encode
+        self._framer = RtcmFramer()
+        self._queue = []
+        self._event = asyncio.Event()
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+        #: Send statistics
+        self.stats = RtcmForwarderStats()
+
+    @property
+    def framer(self):
+        """ Framer of the data given to `feed` """
+        return self._framer
+
+    def feed(self, data):
+        """
+         Hand received stream data to the forwarder, the frames it
+         completes are queued.
+
+         Parameters
+         ----------
+         data : bytes-like
+              The received data
+        """
+        self.add(self._framer.feed(data))
+
+    def add(self, frames):
+        """
+         Queue frames to send.
+
+         Parameters
+         ----------
+         frames : [RtcmFrame]
+              The frames
+        """
+        if frames:
+            self._queue.extend(frames)
+            self.stats.queued += len(frames)
+            self._event.set()
+
+    async def forward(self, chunks):
+        """
+         Feed chunks of stream data, and send the frames until the stream
+         ends.
+
+         Parameters
+         ----------
+         chunks : async iterable
+              Chunks of stream data (e.g. read from a serial port)
+        """
+        sender = asyncio.ensure_future(self.run())
+        try:
+            async for chunk in chunks:
+                self.feed(chunk)
+                if sender.done():
+                    sender.result()
+        finally:
+            sender.cancel()
+
+    async def run(self):
+        """
+         Send the queued frames, forever.
+
+         A failed send is logged, and its frames are dropped: corrections
+         are only useful while they are recent.
+        """
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            frames = self._queue
+            self._queue = []
+            frames.sort(key=lambda frame: self._priority(frame.message_type))
+            for text, size, batch in self._pack(frames):
+                await self._send(text, size, batch)
+
+    def _encoded_size(self, data):
+        return len(self._encode(bytes(data)).encode("utf-8"))
+
+    def _joined(self, parts, batch):
+        data = b"".join(parts)
+        return self._encode(data), len(data), batch
+
+    def _pack(self, frames):
+        """
+         Joins frames into sends whose encoded string is at most
+         max_send_bytes long, yields (string, bytes, frames)
+        """
+        limit = self._max_send_bytes
+        parts = []
+        batch = []
+        total = 0
+        for frame in frames:
+            data = frame.data
+            pieces = []
+            try:
+                # Every frame is encoded once to measure it
+                size = self._encoded_size(data)
+                while size > limit:
+                    # Split a frame too large for one send
+                    cut = self._fit(data)
+                    pieces.append(data[:cut])
+                    data = data[cut:]
+                    size = self._encoded_size(data)
+            except ValueError as error:
+                self.stats.failed += 1
+                self._logger.warning(
+                    f"RTCM frame {frame.message_type} cannot be encoded: "
+                    f"{error}")
+                continue
+
+            if parts and (pieces or total + size > limit):
+                yield self._joined(parts, batch)
+                parts = []
+                batch = []
+                total = 0
+            for piece in pieces:
+                yield self._joined([piece], [])
+            parts.append(data)
+            batch.append(frame)
+            total += size
+        if parts:
+            yield self._joined(parts, batch)
+
+    def _fit(self, data):
+        """ Longest prefix of data whose encoding fits in one send """
+        low, high = 1, min(len(data), self._max_send_bytes)
+        while low < high:
+            middle = (low + high + 1) // 2
+            try:
+                fits = self._encoded_size(data[:middle]) \
+                    <= self._max_send_bytes
+            except ValueError:
+                # E.g. a multi-byte sequence cut in the middle
+                fits = False
+            if fits:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    async def _send(self, text, size, frames):
+        stats = self.stats
+        try:
+            await self._rtk.send_rtcm_data(RtcmData(text))
+        except RtkError as error:
+            stats.failed += len(frames)
+            self._logger.warning(f"RTCM send failed: {error}")
+            return
+
+        now_ns = time.monotonic_ns()
+        stats.sends += 1
+        stats.bytes_sent += size
+        stats.sent += len(frames)
+        if frames:
+            stats.latency_s = \
+                (now_ns - min(frame.received_ns for frame in frames)) * 1e-9
+            stats.max_latency_s = max(stats.max_latency_s, stats.latency_s)
@@ -0,0 +1,728 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import struct
+import time
+import zlib
+from enum import IntFlag
+
+try:
+    # NumPy is optional, it is only needed for the structured array views
+    import numpy as np
+except ImportError:
+    np = None
+
+from .offboard import (AccelerationNed, Attitude, AttitudeRate,
+                       PositionGlobalYaw, PositionNedYaw, VelocityBodyYawspeed,
+                       VelocityNedYaw)
+
+
+class SetpointMode(IntFlag):
+    """
+     Setpoint flags of a setpoint packet.
+
+     Values
+     ------
+     POSITION_VELOCITY_NED
+          Local position with feed-forward velocity
+
+     POSITION_VELOCITY_ACCELERATION_NED
+          Local position with feed-forward velocity and acceleration
+
+     ACCELERATION_NED
+          Local frame acceleration
+
+     ATTITUDE_CONTROL
+          Roll, pitch, yaw and thrust
+
+     ATTITUDE_RATE_CONTROL
+          Roll, pitch and yaw rates and thrust
+
+     POSITION_LOCAL_NED
+          Local position (north, east, down)
+
+     POSITION_GLOBAL_LATLON
+          Global position (latitude, longitude, altitude)
+
+     VELOCITY_NED
+          Local frame velocity
+
+     VELOCITY_BODY
+          Body frame velocity (forward, right, down)
+
+     YAW_CONTROL
+          Use the yaw of the packet instead of the default yaw
+
+     """
+
+    POSITION_VELOCITY_NED = 0x01
+    POSITION_VELOCITY_ACCELERATION_NED = 0x02
+    ACCELERATION_NED = 0x04
+    ATTITUDE_CONTROL = 0x08
+    ATTITUDE_RATE_CONTROL = 0x10
+    POSITION_LOCAL_NED = 0x20
+    POSITION_GLOBAL_LATLON = 0x40
+    VELOCITY_NED = 0x80
+    VELOCITY_BODY = 0x100
+    YAW_CONTROL = 0x200
+
+
+#: Magic value starting every packet
+PACKET_HEADER = 0xDEADBEEFDEADBEEF
+
+_HEADER = struct.Struct(">Q")
+_PAYLOAD = struct.Struct(">QIII3d3d3d4d3d")
+_CRC = struct.Struct(">I")
+
+#: Size of an encoded packet (in bytes)
+PACKET_SIZE = _HEADER.size + _PAYLOAD.size + _CRC.size
+
+_CRC_OFFSET = _HEADER.size + _PAYLOAD.size
+
+if np is not None:
+    #: NumPy structured dtype matching the wire format of one packet
+    PACKET_DTYPE = np.dtype([
+        ("header", ">u8"),
+        ("timestamp_ns", ">u8"),
+        ("setpoint_flags", ">u4"),
+        ("enable_flag", ">u4"),
+        ("yaw_control_flag", ">u4"),
+        ("position", ">f8", (3,)),
+        ("velocity", ">f8", (3,)),
+        ("acceleration", ">f8", (3,)),
+        ("attitude", ">f8", (4,)),
+        ("attitude_rate", ">f8", (3,)),
+        ("crc", ">u4"),
+    ])
+else:
+    PACKET_DTYPE = None
+
+
+class SetpointPacket:
+    """
+     Decoded setpoint packet.
+
+     The wire format is the one of the `ControlPacket` used by the
+     `offboard_from_stream` examples: an 8 byte header, a big-endian payload
+     and the CRC32 of the payload.
+
+     Parameters
+     ----------
+     timestamp_ns : int
+          Sender timestamp (in nanoseconds since the UNIX epoch)
+
+     setpoint_flags : SetpointMode
+          Setpoints carried by the packet
+
+     enable_flag : bool
+          True to engage offboard control, False to stop it
+
+     yaw_control_flag : bool
+          Yaw control flag as sent by the sender
+
+     position : tuple
+          NED: north, east, down (in metres) |
+          Global: latitude, longitude (in degrees), altitude (in metres)
+
+     velocity : tuple
+          Velocity (in metres/second)
+
+     acceleration : tuple
+          Acceleration (in metres/second^2)
+
+     attitude : tuple
+          Roll, pitch, yaw (in degrees) and thrust (range: 0 to 1)
+
+     attitude_rate : tuple
+          Roll, pitch and yaw rates (in degrees/second)
+
+     """
+
+    __slots__ = ("timestamp_ns", "setpoint_flags", "enable_flag",
+                 "yaw_control_flag", "position", "velocity", "acceleration",
+                 "attitude", "attitude_rate", "received_ns")
+
+    def __init__(
+            self,
+            timestamp_ns,
+            setpoint_flags,
+            enable_flag,
+            yaw_control_flag,
+            position,
+            velocity,
+            acceleration,
+            attitude,
+            attitude_rate):
+        """ Initializes the SetpointPacket object """
+        self.timestamp_ns = timestamp_ns
+        self.setpoint_flags = SetpointMode(setpoint_flags)
+        self.enable_flag = enable_flag
+        self.yaw_control_flag = yaw_control_flag
+        self.position = position
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.attitude = attitude
+        self.attitude_rate = attitude_rate
+        #: Monotonic time at which the packet was received (in nanoseconds)
+        self.received_ns = None
+
+    def __str__(self):
+        """ SetpointPacket in string representation """
+        struct_repr = ", ".join([
+                "timestamp_ns: " + str(self.timestamp_ns),
+                "setpoint_flags: " + str(self.setpoint_flags),
+                "enable_flag: " + str(self.enable_flag),
+                "yaw_control_flag: " + str(self.yaw_control_flag),
+                "position: " + str(self.position),
+                "velocity: " + str(self.velocity),
+                "acceleration: " + str(self.acceleration),
+                "attitude: " + str(self.attitude),
+                "attitude_rate: " + str(self.attitude_rate)
+                ])
+
+        return f"SetpointPacket: [{struct_repr}]"
+
+    @staticmethod
+    def decode(data, offset=0):
+        """
+         Decode a packet from a bytes-like object, without copying it.
+
+         Parameters
+         ----------
+         data : bytes-like
+              Buffer holding the packet (bytes, bytearray or memoryview)
+
+         offset : int
+              Offset of the packet in the buffer
+
+         Returns
+         -------
+         packet : SetpointPacket
+              The decoded packet
+
+         Raises
+         ------
+         ValueError
+             If the packet is truncated or its header or CRC is invalid.
+        """
+        view = memoryview(data)
+        if len(view) - offset < PACKET_SIZE:
+            raise ValueError(
+                f"Truncated packet: {len(view) - offset} bytes, "
+                f"expected {PACKET_SIZE}")
+
+        if _HEADER.unpack_from(view, offset)[0] != PACKET_HEADER:
+            raise ValueError("Invalid packet header")
+
+        start = offset + _HEADER.size
+        end = start + _PAYLOAD.size
+        crc = _CRC.unpack_from(view, end)[0]
+        if zlib.crc32(view[start:end]) != crc:
+            raise ValueError("CRC check failed")
+
+        data = _PAYLOAD.unpack_from(view, start)
+        return SetpointPacket(
+            data[0],
+            data[1],
+            bool(data[2]),
+            bool(data[3]),
+            data[4:7],
+            data[7:10],
+            data[10:13],
+            data[13:17],
+            data[17:20])
+
+    def encode(self):
+        """
+         Encode the packet.
+
+         Returns
+         -------
+         data : bytes
+              The encoded packet
+        """
+        buffer = bytearray(PACKET_SIZE)
+        _PAYLOAD.pack_into(
+            buffer,
+            _HEADER.size,
+            int(self.timestamp_ns),
+            int(self.setpoint_flags),
+            1 if self.enable_flag else 0,
+            1 if self.yaw_control_flag else 0,
+            *self.position,
+            *self.velocity,
+            *self.acceleration,
+            *self.attitude,
+            *self.attitude_rate)
+        _seal(buffer, 0)
+        return bytes(buffer)
+
+
+def _seal(buffer, offset):
+    """
+     Writes header and CRC of the packet at `offset` of a writable buffer
+    """
+    _HEADER.pack_into(buffer, offset, PACKET_HEADER)
+    payload = memoryview(buffer)[offset + _HEADER.size:offset + _CRC_OFFSET]
+    _CRC.pack_into(buffer, offset + _CRC_OFFSET, zlib.crc32(payload))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for setpoint array views")
+
+
+class SetpointBatch:
+    """
+     Preallocated buffer encoding many setpoint packets at once.
+
+     Packets are laid out back to back, each one in the exact wire format of
+     `SetpointPacket`, so `packet_view` returns a datagram ready to be sent
+     to a single vehicle without copying.
+
+     The batch can be filled packet by packet with `pack`, or in bulk by
+     writing the fields of the structured array returned by `as_array`
+     (requires NumPy) and calling `seal` afterwards.
+
+     Parameters
+     ----------
+     capacity : int
+          Maximum number of packets in the batch
+
+     """
+
+    def __init__(self, capacity):
+        """ Initializes the SetpointBatch object """
+        self._buffer = bytearray(capacity * PACKET_SIZE)
+        self._view = memoryview(self._buffer)
+        self.capacity = capacity
+
+    def pack(self, index, timestamp_ns, setpoint_flags, enable_flag,
+             yaw_control_flag, position, velocity, acceleration, attitude,
+             attitude_rate):
+        """
+         Encode one packet in place.
+
+         The parameters after `index` are the fields of `SetpointPacket`.
+
+         Parameters
+         ----------
+         index : int
+              Slot of the packet in the batch
+        """
+        offset = index * PACKET_SIZE
+        _PAYLOAD.pack_into(
+            self._buffer,
+            offset + _HEADER.size,
+            int(timestamp_ns),
+            int(setpoint_flags),
+            1 if enable_flag else 0,
+            1 if yaw_control_flag else 0,
+            *position,
+            *velocity,
+            *acceleration,
+            *attitude,
+            *attitude_rate)
+        _seal(self._buffer, offset)
+
+    def pack_packets(self, packets):
+        """
+         Encode a sequence of `SetpointPacket` from the first slot on.
+
+         Parameters
+         ----------
+         packets : [SetpointPacket]
+              Packets to encode, at most `capacity`
+
+         Returns
+         -------
+         count : int
+              Number of packets encoded
+        """
+        count = 0
+        for count, packet in enumerate(packets, 1):
+            self.pack(count - 1,
+                      packet.timestamp_ns,
+                      packet.setpoint_flags,
+                      packet.enable_flag,
+                      packet.yaw_control_flag,
+                      packet.position,
+                      packet.velocity,
+                      packet.acceleration,
+                      packet.attitude,
+                      packet.attitude_rate)
+        return count
+
+    def seal(self, count=None):
+        """
+         Write headers and CRCs after the payloads were filled in bulk.
+
+         Parameters
+         ----------
+         count : int
+              Number of packets to seal, all of them by default
+        """
+        for index in range(self.capacity if count is None else count):
+            _seal(self._buffer, index * PACKET_SIZE)
+
+    def packet_view(self, index):
+        """
+         Encoded packet of a slot, as a zero-copy view.
+
+         Parameters
+         ----------
+         index : int
+              Slot of the packet in the batch
+
+         Returns
+         -------
+         view : memoryview
+              The encoded packet, ready to be sent as one datagram
+        """
+        offset = index * PACKET_SIZE
+        return self._view[offset:offset + PACKET_SIZE]
+
+    def as_array(self):
+        """
+         Structured NumPy array viewing the batch buffer, without copying.
+
+         Returns
+         -------
+         array : numpy.ndarray
+              Writable array of `PACKET_DTYPE` with `capacity` records
+
+         Raises
+         ------
+         ImportError
+             If NumPy is not installed.
+        """
+        _require_numpy()
+        return np.frombuffer(self._buffer, dtype=PACKET_DTYPE)
+
+    @staticmethod
+    def decode(data):
+        """
+         Decode back-to-back packets of a buffer.
+
+         Parameters
+         ----------
+         data : bytes-like
+              Buffer holding a whole number of packets
+
+         Returns
+         -------
+         packets : [SetpointPacket]
+              The decoded packets
+
+         Raises
+         ------
+         ValueError
+             If the buffer size is not a multiple of the packet size, or a
+             packet is invalid.
+        """
+        view = memoryview(data)
+        if len(view) % PACKET_SIZE:
+            raise ValueError(
+                f"Buffer of {len(view)} bytes does not hold a whole number "
+                f"of {PACKET_SIZE} byte packets")
+        return [SetpointPacket.decode(view, offset)
+                for offset in range(0, len(view), PACKET_SIZE)]
+
+    @staticmethod
+    def decode_array(data):
+        """
+         View back-to-back packets as a structured NumPy array, and check
+         them.
+
+         Parameters
+         ----------
+         data : bytes-like
+              Buffer holding a whole number of packets
+
+         Returns
+         -------
+         array : numpy.ndarray
+              Zero-copy array of `PACKET_DTYPE` over the buffer
+
+         valid : numpy.ndarray
+              Boolean mask of the records with a valid header and CRC
+
+         Raises
+         ------
+         ImportError
+             If NumPy is not installed.
+         ValueError
+             If the buffer size is not a multiple of the packet size.
+        """
+        _require_numpy()
+        view = memoryview(data)
+        if len(view) % PACKET_SIZE:
+            raise ValueError(
+                f"Buffer of {len(view)} bytes does not hold a whole number "
+                f"of {PACKET_SIZE} byte packets")
+
+        array = np.frombuffer(view, dtype=PACKET_DTYPE)
+        valid = array["header"] == PACKET_HEADER
+        for index in np.flatnonzero(valid):
+            offset = int(index) * PACKET_SIZE
+            payload = view[offset + _HEADER.size:offset + _CRC_OFFSET]
+            valid[index] = zlib.crc32(payload) == array["crc"][index]
+        return array, valid
+
+
+class SetpointStreamStats:
+    """
+     Counters and latencies of a `SetpointStream`.
+
+     Latencies are measured per applied packet: `queue_latency_s` is the time
+     between reception and the end of the offboard call, `transit_latency_s`
+     the time between the sender timestamp and the end of the offboard call.
+     The latter is only meaningful if sender and receiver clocks are
+     synchronized.
+
+     """
+
+    def __init__(self):
+        """ Initializes the SetpointStreamStats object """
+        #: Number of valid packets received
+        self.received = 0
+        #: Number of datagrams rejected (bad size, header or CRC)
+        self.rejected = 0
+        #: Number of valid packets replaced by a newer one before being applied
+        self.superseded = 0
+        #: Number of packets applied to the offboard plugin
+        self.applied = 0
+        #: Latency of the last applied packet since reception (in seconds)
+        self.queue_latency_s = None
+        #: Latency of the last applied packet since sending (in seconds)
+        self.transit_latency_s = None
+        #: Highest queue latency seen so far (in seconds)
+        self.max_queue_latency_s = 0.0
+
+    def __str__(self):
+        """ SetpointStreamStats in string representation """
+        struct_repr = ", ".join([
+                "received: " + str(self.received),
+                "rejected: " + str(self.rejected),
+                "superseded: " + str(self.superseded),
+                "applied: " + str(self.applied),
+                "queue_latency_s: " + str(self.queue_latency_s),
+                "transit_latency_s: " + str(self.transit_latency_s),
+                "max_queue_latency_s: " + str(self.max_queue_latency_s)
+                ])
+
+        return f"SetpointStreamStats: [{struct_repr}]"
+
+
+class _SetpointProtocol(asyncio.DatagramProtocol):
+    """
+     Decodes datagrams and keeps the latest valid packet only
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def datagram_received(self, data, addr):
+        self._stream._on_datagram(data)
+
+    def error_received(self, exc):
+        self._stream._logger.warning(f"Setpoint socket error: {exc}")
+
+
+class SetpointStream:
+    """
+     Receives setpoint packets over UDP and applies them to offboard.
+
+     Datagrams are decoded as soon as they arrive, but only the most recent
+     valid packet is kept: when packets arrive faster than the offboard
+     plugin accepts them, older ones are dropped instead of queuing up stale
+     commands.
+
+     The first packet with its enable flag set sends its setpoint and starts
+     offboard if it is not active yet. A packet with the enable flag cleared
+     stops offboard if it is active. If offboard is left by other means
+     (e.g. a pilot switching modes), it is not restarted until a packet with
+     the enable flag cleared has been received.
+
+     Parameters
+     ----------
+     offboard : Offboard
+          Offboard plugin used to send the setpoints (e.g. `drone.offboard`)
+
+     default_yaw_deg : float
+          Yaw used for position and velocity setpoints of packets without
+          the `YAW_CONTROL` flag
+
+     on_applied : callable
+          Optional callback, called with each packet and the stats after the
+          packet has been applied
+
+     """
+
+    def __init__(self, offboard, default_yaw_deg=0.0, on_applied=None):
+        """ Initializes the SetpointStream object """
+        self._offboard = offboard
+        self._on_applied = on_applied
+        self._latest = None
+        self._event = asyncio.Event()
+        self._transport = None
+        self._engaged = False
+        self._logger = logging.getLogger(__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+        #: Yaw used when a packet does not carry the `YAW_CONTROL` flag
+        self.default_yaw_deg = default_yaw_deg
+        #: Reception and latency statistics
+        self.stats = SetpointStreamStats()
+
+    async def open(self, host="0.0.0.0", port=5005):
+        """
+         Bind the UDP socket.
+
+         Parameters
+         ----------
+         host : str
+              Address to listen on
+
+         port : int
+              UDP port to listen on
+        """
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SetpointProtocol(self), local_addr=(host, port))
+
+    def close(self):
+        """
+         Close the UDP socket.
+        """
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def feed(self, data):
+        """
+         Hand a datagram to the stream, as if received on the socket.
+
+         Parameters
+         ----------
+         data : bytes-like
+              The received datagram
+        """
+        self._on_datagram(data)
+
+    def _on_datagram(self, data):
+        received_ns = time.monotonic_ns()
+        try:
+            packet = SetpointPacket.decode(data)
+        except ValueError as error:
+            self.stats.rejected += 1
+            self._logger.debug(f"Rejected setpoint datagram: {error}")
+            return
+
+        packet.received_ns = received_ns
+        self.stats.received += 1
+        if self._latest is not None:
+            self.stats.superseded += 1
+        self._latest = packet
+        self._event.set()
+
+    async def run(self):
+        """
+         Apply the latest received packet, forever.
+
+         Raises
+         ------
+         OffboardError
+             If an offboard request fails.
+        """
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            packet = self._latest
+            self._latest = None
+            if packet is None:
+                continue
+
+            await self.apply(packet)
+
+            stats = self.stats
+            stats.applied += 1
+            stats.queue_latency_s = \
+                (time.monotonic_ns() - packet.received_ns) * 1e-9
+            stats.transit_latency_s = \
+                (time.time_ns() - packet.timestamp_ns) * 1e-9
+            stats.max_queue_latency_s = max(stats.max_queue_latency_s,
+                                            stats.queue_latency_s)
+            if self._on_applied is not None:
+                self._on_applied(packet, stats)
+
+    async def apply(self, packet):
+        """
+         Send the setpoints of a packet to the offboard plugin.
+
+         Parameters
+         ----------
+         packet : SetpointPacket
+              The packet to apply
+
+         Raises
+         ------
+         OffboardError
+             If an offboard request fails.
+        """
+        offboard = self._offboard
+        if not packet.enable_flag:
+            if self._engaged or await offboard.is_active():
+                await offboard.stop()
+            self._engaged = False
+            return
+
+        flags = packet.setpoint_flags
+        yaw = packet.attitude[2] if flags & SetpointMode.YAW_CONTROL \
+            else self.default_yaw_deg
+        position = packet.position
+        velocity = packet.velocity
+        acceleration = packet.acceleration
+        attitude = packet.attitude
+        rate = packet.attitude_rate
+
+        if flags & SetpointMode.POSITION_LOCAL_NED:
+            await offboard.set_position_ned(
+                PositionNedYaw(*position, yaw))
+
+        if flags & SetpointMode.POSITION_VELOCITY_NED:
+            await offboard.set_position_velocity_ned(
+                PositionNedYaw(*position, yaw),
+                VelocityNedYaw(*velocity, yaw))
+
+        if flags & SetpointMode.POSITION_VELOCITY_ACCELERATION_NED:
+            await offboard.set_position_velocity_acceleration_ned(
+                PositionNedYaw(*position, yaw),
+                VelocityNedYaw(*velocity, yaw),
+                AccelerationNed(*acceleration))
+
+        if flags & SetpointMode.POSITION_GLOBAL_LATLON:
+            await offboard.set_position_global(
+                PositionGlobalYaw(*position, yaw,
+                                  PositionGlobalYaw.AltitudeType.AMSL))
+
+        if flags & SetpointMode.VELOCITY_NED:
+            await offboard.set_velocity_ned(VelocityNedYaw(*velocity, yaw))
+
+        if flags & SetpointMode.VELOCITY_BODY:
+            await offboard.set_velocity_body(
+                VelocityBodyYawspeed(*velocity, rate[2]))
+
+        if flags & SetpointMode.ACCELERATION_NED:
+            await offboard.set_acceleration_ned(AccelerationNed(*acceleration))
+
+        if flags & SetpointMode.ATTITUDE_CONTROL:
+            await offboard.set_attitude(Attitude(*attitude))
+
+        if flags & SetpointMode.ATTITUDE_RATE_CONTROL:
+            await offboard.set_attitude_rate(AttitudeRate(*rate, attitude[3]))
+
+        if not self._engaged:
+            if not await offboard.is_active():
+                await offboard.start()
+            self._engaged = True
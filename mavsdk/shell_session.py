@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import re
+
+# Prompt of the PX4 NuttShell, at the start of a line. Data received after
+# it, e.g. a log message, does not hide it
+DEFAULT_PROMPT = r"(?:^|\n)nsh> ?"
+
+# Terminal escape sequences (colors, line clearing) sent by the shell
+_ESCAPE_SEQUENCE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# Length of received data searched again, so that a prompt split between
+# two receptions is found
+_SEARCH_OVERLAP = 64
+
+
+class ShellTimeoutError(asyncio.TimeoutError):
+    """ Raised when the end of the output of a command is not received """
+
+    def __init__(self, command, output):
+        self.command = command
+        #: Output received before the timeout
+        self.output = output
+
+    def __str__(self):
+        return f"No prompt after '{self.command}', received: " \
+            f"{self.output!r}"
+
+
+class ShellSession:
+    """
+     Command/response session over the MAVLink shell.
+
+     One `Shell.receive` subscription stays open for the whole session, and
+     commands run one at a time: a command is sent, and its output is
+     collected until the prompt (or another pattern) is received. Commands
+     can be run concurrently, they are queued.
+
+     Terminal escape sequences and carriage returns are removed from the
+     output, as well as the echo of the command line.
+
+     Parameters
+     ----------
+     shell : Shell
+          Shell plugin of the vehicle (e.g. `drone.shell`)
+
+     prompt : str or re.Pattern
+          Pattern ending the output of a command, the first match in the
+          received data is used
+
+     timeout_s : float
+          Default time to wait for the end of the output of a command (in
+          seconds)
+
+     """
+
+    def __init__(self, shell, prompt=DEFAULT_PROMPT, timeout_s=5.0):
+        """ Initializes the ShellSession object """
+        self._shell = shell
+        self._prompt = re.compile(prompt) if isinstance(prompt, str) \
+            else prompt
+        self._timeout_s = timeout_s
+        self._buffer = ""
+        self._event = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._receiver = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self, attempts=5, attempt_timeout_s=1.0):
+        """
+         Open the receive subscription, and wait until it is live.
+
+         The subscription is live once an empty command line gets a prompt
+         back. Prompts sent before then are lost, so the empty line is sent
+         again after every `attempt_timeout_s`.
+
+         Parameters
+         ----------
+         attempts : int
+              Number of empty lines sent
+
+         attempt_timeout_s : float
+              Time to wait for the prompt after each one (in seconds)
+
+         Raises
+         ------
+         ShellTimeoutError
+             If no prompt was received.
+        """
+        if self._receiver is None:
+            self._receiver = asyncio.ensure_future(self._receive())
+        for attempt in range(attempts):
+            try:
+                await self.run("", timeout_s=attempt_timeout_s)
+                return
+            except ShellTimeoutError:
+                if attempt == attempts - 1:
+                    raise
+
+    async def close(self):
+        """ Close the receive subscription """
+        if self._receiver is not None:
+            self._receiver.cancel()
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+            self._receiver = None
+
+    async def _receive(self):
+        async for data in self._shell.receive():
+            self._buffer += _ESCAPE_SEQUENCE.sub("", data).replace("\r", "")
+            self._event.set()
+
+    async def run(self, command, expect=None, timeout_s=None):
+        """
+         Run a command line and return its output.
+
+         Parameters
+         ----------
+         command : str
+              The command line
+
+         expect : str or re.Pattern
+              Pattern ending the output, the prompt by default
+
+         timeout_s : float
+              Time to wait for the end of the output (in seconds), the
+              session timeout by default
+
+         Returns
+         -------
+         output : str
+              Output of the command, without the command line echo and the
+              pattern ending it
+
+         Raises
+         ------
+         ShellTimeoutError
+             If the pattern is not received in time. The error contains the
+             output received so far.
+         ShellError
+             If the command line cannot be sent.
+        """
+        if self._receiver is None:
+            raise RuntimeError("The session is not started")
+        if isinstance(expect, str):
+            expect = re.compile(expect)
+        pattern = expect or self._prompt
+        timeout_s = self._timeout_s if timeout_s is None else timeout_s
+
+        async with self._lock:
+            # Output of a previous command arriving after its prompt
+            self._buffer = ""
+            await self._shell.send(command.rstrip("\n") + "\n")
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout_s
+            searched = 0
+            while True:
+                match = pattern.search(
+                    self._buffer, max(searched - _SEARCH_OVERLAP, 0))
+                if match is not None:
+                    break
+                searched = len(self._buffer)
+
+                self._event.clear()
+                remaining = deadline - loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    await asyncio.wait_for(self._wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise ShellTimeoutError(command, self._buffer) from None
+
+            output = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+
+        lines = output.split("\n")
+        if lines and lines[0].strip() == command.strip():
+            lines = lines[1:]
+        return "\n".join(lines)
+
+    async def _wait(self):
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            await asyncio.wait([waiter, self._receiver],
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if self._receiver.done():
+            # The subscription ended or failed
+            self._receiver.result()
+            raise ConnectionError("The shell subscription ended")
+
+    async def run_many(self, commands, timeout_s=None):
+        """
+         Run command lines one after the other.
+
+         Parameters
+         ----------
+         commands : [str]
+              The command lines
+
+         timeout_s : float
+              Time to wait for the output of each command (in seconds)
+
+         Returns
+         -------
+         outputs : [str]
+              Output of every command, see `run`
+        """
+        return [await self.run(command, timeout_s=timeout_s)
+                for command in commands]
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import bisect
+import csv
+import math
+from array import array
+
+from .offboard import AccelerationNed, PositionNedYaw, VelocityNedYaw
+
+
+class TrajectorySample:
+    """
+     Interpolated state of a trajectory at a given time
+
+     Parameters
+     ----------
+     time_s : float
+          Trajectory time of the sample (in seconds)
+
+     position_ned_yaw : PositionNedYaw
+          Interpolated position and yaw
+
+     velocity_ned_yaw : VelocityNedYaw
+          Interpolated velocity and yaw
+
+     acceleration_ned : AccelerationNed
+          Interpolated acceleration
+
+     mode : int
+          Mode code of the segment the sample falls in
+
+     """
+
+    def __init__(
+            self,
+            time_s,
+            position_ned_yaw,
+            velocity_ned_yaw,
+            acceleration_ned,
+            mode):
+        """ Initializes the TrajectorySample object """
+        self.time_s = time_s
+        self.position_ned_yaw = position_ned_yaw
+        self.velocity_ned_yaw = velocity_ned_yaw
+        self.acceleration_ned = acceleration_ned
+        self.mode = mode
+
+    def __str__(self):
+        """ TrajectorySample in string representation """
+        struct_repr = ", ".join([
+                "time_s: " + str(self.time_s),
+                "position_ned_yaw: " + str(self.position_ned_yaw),
+                "velocity_ned_yaw: " + str(self.velocity_ned_yaw),
+                "acceleration_ned: " + str(self.acceleration_ned),
+                "mode: " + str(self.mode)
+                ])
+
+        return f"TrajectorySample: [{struct_repr}]"
+
+
+class Trajectory:
+    """
+     Time-indexed NED trajectory stored in flat arrays.
+
+     Samples must be ordered by strictly increasing time. Between two samples,
+     position, velocity and acceleration are linearly interpolated and yaw is
+     interpolated along the shortest arc. The mode code is held from the
+     sample that starts the segment.
+
+     Lookups use a cursor on the last active segment, so sampling at
+     increasing times costs constant time per call regardless of the
+     trajectory length. Random access falls back to a binary search.
+
+     Parameters
+     ----------
+     rows : iterable
+          Rows of ``(t, px, py, pz, vx, vy, vz, ax, ay, az[, yaw[, mode]])``.
+          A NumPy array of shape (N, 10..12) is accepted as well.
+
+     """
+
+    #: Column names, in row order, as used in CSV headers
+    COLUMNS = ("t", "px", "py", "pz", "vx", "vy", "vz",
+               "ax", "ay", "az", "yaw", "mode")
+
+    def __init__(self, rows):
+        """ Initializes the Trajectory object """
+        self._columns = [array("d") for _ in range(11)]
+        self._modes = array("l")
+
+        if hasattr(rows, "ndim") and rows.ndim == 2:
+            # NumPy array: copy whole columns instead of iterating rows
+            width = rows.shape[1]
+            if not 10 <= width <= 12:
+                raise ValueError(
+                    f"Trajectory rows need 10 to 12 values, got {width}")
+            for k in range(min(width, 11)):
+                self._columns[k].frombytes(rows[:, k].astype("f8").tobytes())
+            if width == 10:
+                self._columns[10].extend(0.0 for _ in range(len(rows)))
+            if width == 12:
+                self._modes.extend(rows[:, 11].astype(int).tolist())
+            else:
+                self._modes.extend(0 for _ in range(len(rows)))
+            rows = ()
+
+        for row in rows:
+            if not 10 <= len(row) <= 12:
+                raise ValueError(
+                    f"Trajectory rows need 10 to 12 values, got {len(row)}")
+            for column, value in zip(self._columns, row[:11]):
+                column.append(float(value))
+            if len(row) == 10:
+                self._columns[10].append(0.0)
+            self._modes.append(int(row[11]) if len(row) == 12 else 0)
+
+        times = self._columns[0]
+        if not times:
+            raise ValueError("Trajectory needs at least one sample")
+        for previous, current in zip(times, times[1:]):
+            if current <= previous:
+                raise ValueError(
+                    "Trajectory times must be strictly increasing "
+                    f"({previous} is followed by {current})")
+
+        self._cursor = 0
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+         Load a trajectory from a CSV file.
+
+         The file needs a header naming at least the columns ``t``, ``px``,
+         ``py``, ``pz``, ``vx``, ``vy``, ``vz``, ``ax``, ``ay`` and ``az``.
+         The ``yaw`` and ``mode`` columns are optional and default to 0.
+         Any other column is ignored.
+
+         Parameters
+         ----------
+         path : str
+              Path to the CSV file
+
+         Returns
+         -------
+         trajectory : Trajectory
+              The loaded trajectory
+
+         Raises
+         ------
+         ValueError
+             If a required column is missing or the data is invalid.
+        """
+        with open(path, newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            header = reader.fieldnames or []
+            missing = [name for name in cls.COLUMNS[:10]
+                       if name not in header]
+            if missing:
+                raise ValueError(
+                    f"Trajectory CSV '{path}' is missing columns: "
+                    f"{', '.join(missing)}")
+
+            return cls([row[name] for name in cls.COLUMNS[:10]]
+                       + [row.get("yaw") or 0.0, row.get("mode") or 0]
+                       for row in reader)
+
+    def __len__(self):
+        """ Number of samples in the trajectory """
+        return len(self._modes)
+
+    @property
+    def start_time(self):
+        """ Time of the first sample (in seconds) """
+        return self._columns[0][0]
+
+    @property
+    def end_time(self):
+        """ Time of the last sample (in seconds) """
+        return self._columns[0][-1]
+
+    @property
+    def duration(self):
+        """ Duration between first and last sample (in seconds) """
+        return self.end_time - self.start_time
+
+    def segment_index(self, time_s):
+        """
+         Index of the sample that starts the segment containing `time_s`.
+
+         Times before the start map to 0, times after the end map to the
+         last sample.
+
+         Parameters
+         ----------
+         time_s : float
+              Trajectory time (in seconds)
+
+         Returns
+         -------
+         index : int
+              Index of the segment start sample
+        """
+        times = self._columns[0]
+        last = len(times) - 1
+        i = self._cursor
+
+        if times[i] <= time_s:
+            # Common case: time moved forward by less than a couple of
+            # samples since the previous lookup
+            for _ in range(2):
+                if i == last or time_s < times[i + 1]:
+                    self._cursor = i
+                    return i
+                i += 1
+
+        if time_s <= times[0]:
+            i = 0
+        elif time_s >= times[last]:
+            i = last
+        else:
+            i = bisect.bisect_right(times, time_s) - 1
+
+        self._cursor = i
+        return i
+
+    def sample(self, time_s):
+        """
+         Interpolate the trajectory at the given time.
+
+         Times outside the trajectory are clamped to the first or last
+         sample.
+
+         Parameters
+         ----------
+         time_s : float
+              Trajectory time (in seconds)
+
+         Returns
+         -------
+         sample : TrajectorySample
+              The interpolated state
+        """
+        i = self.segment_index(time_s)
+        c = self._columns
+        times = c[0]
+
+        if i == len(times) - 1 or time_s <= times[i]:
+            values = [column[i] for column in c]
+        else:
+            ratio = (time_s - times[i]) / (times[i + 1] - times[i])
+            values = [column[i] + (column[i + 1] - column[i]) * ratio
+                      for column in c[:10]]
+            yaw_delta = (c[10][i + 1] - c[10][i] + 180.0) % 360.0 - 180.0
+            values.append(
+                math.remainder(c[10][i] + yaw_delta * ratio, 360.0))
+
+        yaw = values[10]
+        return TrajectorySample(
+            time_s,
+            PositionNedYaw(values[1], values[2], values[3], yaw),
+            VelocityNedYaw(values[4], values[5], values[6], yaw),
+            AccelerationNed(values[7], values[8], values[9]),
+            self._modes[i])
+
+
+class TrajectoryPlayer:
+    """
+     Streams a `Trajectory` to the offboard plugin at a fixed rate.
+
+     The setpoint sent at every tick is interpolated at the elapsed wall-clock
+     time since the start of playback, and ticks are scheduled against
+     absolute deadlines. A slow offboard call therefore does not make the
+     trajectory drift; late ticks are skipped instead of being sent in a
+     burst.
+
+     Offboard mode is neither started nor stopped by the player: set an
+     initial setpoint and call `Offboard.start` before `play`.
+
+     Parameters
+     ----------
+     offboard : Offboard
+          Offboard plugin used to send the setpoints (e.g. `drone.offboard`)
+
+     trajectory : Trajectory
+          Trajectory to play
+
+     rate_hz : float
+          Rate at which setpoints are sent (in Hz)
+
+     use_acceleration : bool
+          Use `set_position_velocity_acceleration_ned`. If False,
+          `set_position_velocity_ned` is used, for mavsdk_server builds
+          without acceleration support.
+
+     """
+
+    def __init__(self, offboard, trajectory, rate_hz=10.0,
+                 use_acceleration=True):
+        """ Initializes the TrajectoryPlayer object """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+
+        self._offboard = offboard
+        self._trajectory = trajectory
+        self._period = 1.0 / rate_hz
+        self._use_acceleration = use_acceleration
+
+        #: Number of setpoints sent during the last playback
+        self.sent_count = 0
+        #: Number of ticks skipped because the previous one ran late
+        self.skipped_count = 0
+
+    async def _send(self, sample):
+        if self._use_acceleration:
+            await self._offboard.set_position_velocity_acceleration_ned(
+                sample.position_ned_yaw,
+                sample.velocity_ned_yaw,
+                sample.acceleration_ned)
+        else:
+            await self._offboard.set_position_velocity_ned(
+                sample.position_ned_yaw,
+                sample.velocity_ned_yaw)
+
+    async def play(self, start_time=None, on_sample=None):
+        """
+         Play the trajectory until its last sample has been sent.
+
+         Parameters
+         ----------
+         start_time : float
+              Trajectory time to start from (in seconds). Defaults to the
+              first sample.
+
+         on_sample : callable
+              Optional callback, called with each `TrajectorySample` right
+              after it has been sent.
+
+         Raises
+         ------
+         OffboardError
+             If sending a setpoint fails.
+        """
+        trajectory = self._trajectory
+        if start_time is None:
+            start_time = trajectory.start_time
+        end_time = trajectory.end_time
+
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        tick = 0
+        self.sent_count = 0
+        self.skipped_count = 0
+
+        while True:
+            time_s = min(start_time + tick * self._period, end_time)
+            sample = trajectory.sample(time_s)
+            await self._send(sample)
+            self.sent_count += 1
+            if on_sample is not None:
+                on_sample(sample)
+
+            if time_s >= end_time:
+                return
+
+            tick += 1
+            deadline = origin + tick * self._period
+            now = loop.time()
+            if now > deadline:
+                missed = int((now - deadline) / self._period)
+                tick += missed
+                self.skipped_count += missed
+                deadline = origin + tick * self._period
+            await asyncio.sleep(max(0.0, deadline - now))
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+import mmap
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_MAGIC = b"ULog\x01\x12\x35"
+_HEADER_SIZE = 16
+_MESSAGE_HEADER = struct.Struct("<HB")
+_MESSAGE_HEADER_SIZE = _MESSAGE_HEADER.size
+_UINT16 = struct.Struct("<H")
+# Message header followed by the message id of data messages
+_DATA_HEADER = struct.Struct("<HBH")
+_TIMESTAMP = struct.Struct("<Q")
+_FLAG_BITS = struct.Struct("<8B8B3Q")
+_ADD_LOGGED = struct.Struct("<BH")
+_LOGGING = struct.Struct("<BQ")
+_LOGGING_TAGGED = struct.Struct("<BHQ")
+
+# Incompatible flag of logs with data appended at the given offsets
+_INCOMPAT_DATA_APPENDED = 0x01
+
+_TYPES = {
+    "int8_t": "i1",
+    "uint8_t": "u1",
+    "int16_t": "<i2",
+    "uint16_t": "<u2",
+    "int32_t": "<i4",
+    "uint32_t": "<u4",
+    "int64_t": "<i8",
+    "uint64_t": "<u8",
+    "float": "<f4",
+    "double": "<f8",
+    "bool": "?",
+    "char": "S1",
+}
+
+# Bytes gathered per step when extracting a topic, bounds the temporary
+# index arrays
+_GATHER_BYTES = 1 << 22
+
+
+def _parse_type(type_name):
+    """ Split "float[3]" into ("float", 3), "float" into ("float", None) """
+    if type_name.endswith("]"):
+        base, count = type_name[:-1].split("[")
+        return base, int(count)
+    return type_name, None
+
+
+class ULogData:
+    """
+     Messages of one logged topic instance, as NumPy columns.
+
+     Columns are extracted from the log on first access, reading only the
+     messages of this topic. Array fields are 2-D columns (one row per
+     message), and fields of nested types are named "field.subfield".
+
+     """
+
+    def __init__(self, ulog, name, multi_id, msg_id):
+        """ Initializes the ULogData object """
+        self._ulog = ulog
+        self.name = name
+        self.multi_id = multi_id
+        self._msg_id = msg_id
+        self._records = None
+
+    def __len__(self):
+        """ Number of messages """
+        return len(self._ulog._offsets.get(self._msg_id, ()))
+
+    @property
+    def field_names(self):
+        """ Names of the columns """
+        return list(self.to_array().dtype.names)
+
+    def __getitem__(self, field_name):
+        """ Column of a field, e.g. `data["timestamp"]` """
+        return self.to_array()[field_name]
+
+    @property
+    def timestamp(self):
+        """ Timestamps of the messages (in microseconds) """
+        return self["timestamp"]
+
+    def to_array(self):
+        """
+         All the messages as a structured array.
+
+         Returns
+         -------
+         records : numpy.ndarray
+              One record per message, one field per column
+        """
+        if self._records is None:
+            self._records = self._ulog._gather(self._msg_id)
+        return self._records
+
+    def __str__(self):
+        """ ULogData in string representation """
+        struct_repr = ", ".join([
+                "name: " + str(self.name),
+                "multi_id: " + str(self.multi_id),
+                "messages: " + str(len(self))
+                ])
+
+        return f"ULogData: [{struct_repr}]"
+
+
+class ULog:
+    """
+     Reader of ULog files, the log format of PX4.
+
+     The file is memory-mapped and indexed in a single pass: definitions,
+     information, parameters and logged strings are decoded, while data
+     messages are only located. Topic data is extracted on demand, see
+     `data`, so only the pages holding the requested messages are read.
+
+     This class requires NumPy.
+
+     Parameters
+     ----------
+     source : str or bytes-like
+          Path of the log, or its content
+
+     Raises
+     ------
+     ImportError
+         If NumPy is not installed.
+
+     """
+
+    def __init__(self, source):
+        """ Initializes the ULog object """
+        if np is None:
+            raise ImportError("NumPy is required to read ULog files")
+        self._file = None
+        self._mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._buffer = memoryview(source).cast("B")
+        else:
+            self._file = open(source, "rb")
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file, which cannot be mapped
+                self._file.close()
+                raise ValueError(f"'{source}' is not a ULog file")
+            self._buffer = memoryview(self._mmap)
+
+        #: Message formats, by name: [(type, array length, field name)]
+        self.formats = {}
+        #: Information messages, by key
+        self.info = {}
+        #: Multi information messages, by key, one list per value
+        self.info_multi = {}
+        #: Initial parameter values, by name
+        self.params = {}
+        #: Parameters changed while logging: [(name, value)]
+        self.changed_params = []
+        #: Default parameter values, by name: {name: (default_types, value)}
+        self.default_params = {}
+        #: Logged strings: [(timestamp, level, tag, message)]
+        self.logged_messages = []
+        #: Duration of the dropouts (in milliseconds)
+        self.dropouts = []
+
+        self._subscriptions = {}
+        self._offsets = {}
+        self._sizes = {}
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """ Release the file """
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def topics(self):
+        """ Logged topics with messages, as (name, multi_id) pairs """
+        return sorted((name, multi_id) for msg_id, (name, multi_id)
+                      in self._subscriptions.items()
+                      if len(self._offsets.get(msg_id, ())))
+
+    @property
+    def end_timestamp(self):
+        """
+         Timestamp of the last data message (in microseconds), read from the
+         index without extracting any topic.
+        """
+        end = self.start_timestamp
+        for msg_id, offsets in self._offsets.items():
+            if len(offsets) and self._sizes[msg_id] >= 8:
+                # Every topic starts with its uint64 timestamp
+                end = max(end, _TIMESTAMP.unpack_from(self._buffer,
+                                                      offsets[-1])[0])
+        return end
+
+    def data(self, name, multi_id=0):
+        """
+         Messages of a topic.
+
+         Parameters
+         ----------
+         name : str
+              Name of the topic, e.g. "vehicle_local_position"
+
+         multi_id : int
+              Instance of the topic
+
+         Returns
+         -------
+         data : ULogData
+              The messages, extracted on first access
+
+         Raises
+         ------
+         KeyError
+             If the topic was not logged.
+        """
+        for msg_id, subscription in self._subscriptions.items():
+            if subscription == (name, multi_id):
+                return ULogData(self, name, multi_id, msg_id)
+        raise KeyError(f"{name} (multi_id {multi_id}) was not logged")
+
+    def _parse(self):
+        buffer = self._buffer
+        if len(buffer) < _HEADER_SIZE or bytes(buffer[:7]) != _MAGIC:
+            raise ValueError("Not a ULog file")
+        self.version = buffer[7]
+        self.start_timestamp = _TIMESTAMP.unpack_from(buffer, 8)[0]
+
+        segments = [_HEADER_SIZE, len(buffer)]
+        if len(buffer) >= _HEADER_SIZE + _MESSAGE_HEADER_SIZE + \
+                _FLAG_BITS.size:
+            size, msg_type = _MESSAGE_HEADER.unpack_from(buffer,
+                                                         _HEADER_SIZE)
+        else:
+            size, msg_type = 0, None
+        if msg_type == ord("B") and size >= _FLAG_BITS.size:
+            flags = _FLAG_BITS.unpack_from(
+                buffer, _HEADER_SIZE + _MESSAGE_HEADER_SIZE)
+            incompat = flags[8:16]
+            if incompat[0] & ~_INCOMPAT_DATA_APPENDED or any(incompat[1:]):
+                raise ValueError("Unsupported incompatible ULog flags")
+            if incompat[0] & _INCOMPAT_DATA_APPENDED:
+                appended = sorted(offset for offset in flags[16:] if offset)
+                segments = [_HEADER_SIZE] + appended + [len(buffer)]
+
+        for start, end in zip(segments[:-1], segments[1:]):
+            self._parse_segment(start, end)
+
+    def _parse_segment(self, position, end):
+        # Data messages are most of the log: only their offset is recorded,
+        # with the header and message id unpacked at once
+        buffer = self._buffer
+        unpack_data_header = _DATA_HEADER.unpack_from
+        appenders = {}
+        data_type = ord("D")
+
+        while position + _DATA_HEADER.size <= end:
+            size, msg_type, msg_id = unpack_data_header(buffer, position)
+            start = position + _MESSAGE_HEADER_SIZE
+            position = start + size
+            if position > end:
+                # Truncated message at the end of the log
+                break
+
+            if msg_type == data_type:
+                append = appenders.get(msg_id)
+                if append is None:
+                    append = appenders[msg_id] = self._offsets.setdefault(
+                        msg_id, array("q")).append
+                    self._sizes.setdefault(msg_id, size - 2)
+                append(start + 2)
+            else:
+                self._parse_message(msg_type, bytes(buffer[start:position]))
+
+    def _parse_message(self, msg_type, payload):
+        msg_type = chr(msg_type)
+        if msg_type == "F":
+            name, _, fields = payload.decode("utf-8", "replace") \
+                .partition(":")
+            self.formats[name] = [
+                (*_parse_type(field.split(" ")[0]), field.split(" ")[1])
+                for field in fields.split(";") if " " in field]
+        elif msg_type == "A":
+            multi_id, msg_id = _ADD_LOGGED.unpack_from(payload)
+            name = payload[_ADD_LOGGED.size:].decode("utf-8", "replace")
+            self._subscriptions[msg_id] = (name, multi_id)
+        elif msg_type in "IPQ":
+            default_types = None
+            if msg_type == "Q":
+                default_types, payload = payload[0], payload[1:]
+            key, value = self._decode_key_value(payload)
+            if msg_type == "I":
+                self.info[key] = value
+            elif msg_type == "Q":
+                self.default_params[key] = (default_types, value)
+            elif self._subscriptions:
+                self.changed_params.append((key, value))
+            else:
+                self.params[key] = value
+        elif msg_type == "M":
+            is_continued = payload[0]
+            key, value = self._decode_key_value(payload[1:])
+            values = self.info_multi.setdefault(key, [])
+            if is_continued and values:
+                values[-1] += value
+            else:
+                values.append(value)
+        elif msg_type == "L":
+            level, timestamp = _LOGGING.unpack_from(payload)
+            self.logged_messages.append((
+                timestamp, level, None,
+                payload[_LOGGING.size:].decode("utf-8", "replace")))
+        elif msg_type == "C":
+            level, tag, timestamp = _LOGGING_TAGGED.unpack_from(payload)
+            self.logged_messages.append((
+                timestamp, level, tag,
+                payload[_LOGGING_TAGGED.size:].decode("utf-8", "replace")))
+        elif msg_type == "O":
+            self.dropouts.append(_UINT16.unpack_from(payload)[0])
+        # "B" was handled first, "R" and "S" carry nothing to keep
+
+    @staticmethod
+    def _decode_key_value(payload):
+        key_length = payload[0]
+        key = payload[1:1 + key_length].decode("utf-8", "replace")
+        value = payload[1 + key_length:]
+        type_name, _, name = key.partition(" ")
+        base, count = _parse_type(type_name)
+        if base == "char":
+            return name, value.decode("utf-8", "replace").rstrip("\0")
+        if base not in _TYPES:
+            return name, value
+        values = np.frombuffer(value, dtype=_TYPES[base],
+                               count=count or 1).tolist()
+        return name, values if count else values[0]
+
+    def _size(self, format_name):
+        size = 0
+        for type_name, count, _ in self.formats[format_name]:
+            if type_name in _TYPES:
+                item_size = np.dtype(_TYPES[type_name]).itemsize
+            else:
+                item_size = self._size(type_name)
+            size += item_size * (count or 1)
+        return size
+
+    def _fields(self, format_name, prefix="", base_offset=0):
+        """ (column name, NumPy type, offset) of every field, flattened """
+        offset = base_offset
+        for type_name, count, name in self.formats[format_name]:
+            if type_name in _TYPES:
+                item_size = np.dtype(_TYPES[type_name]).itemsize
+                if not name.startswith("_padding"):
+                    if type_name == "char" and count:
+                        field_type = np.dtype(f"S{count}")
+                    elif count:
+                        field_type = np.dtype((_TYPES[type_name], (count,)))
+                    else:
+                        field_type = np.dtype(_TYPES[type_name])
+                    yield prefix + name, field_type, offset
+            else:
+                item_size = self._size(type_name)
+                for index in range(count or 1):
+                    element = f"{name}[{index}]" if count else name
+                    yield from self._fields(
+                        type_name, f"{prefix}{element}.",
+                        offset + index * item_size)
+            offset += item_size * (count or 1)
+
+    def _gather(self, msg_id):
+        # Topics are logged with the format of the same name
+        format_name = self._subscriptions[msg_id][0]
+        offsets = self._offsets.get(msg_id, array("q"))
+        record_size = self._sizes.get(msg_id, self._size(format_name))
+
+        # Trailing padding is not logged, fields must fit in the record
+        fields = [(name, field_type, offset) for name, field_type, offset
+                  in self._fields(format_name)
+                  if offset + field_type.itemsize <= record_size]
+        dtype = np.dtype({
+            "names": [name for name, _, _ in fields],
+            "formats": [field_type for _, field_type, _ in fields],
+            "offsets": [offset for _, _, offset in fields],
+            "itemsize": max(record_size, 1),
+        })
+
+        count = len(offsets)
+        raw = np.empty((count, record_size), dtype=np.uint8)
+        if count and record_size:
+            source = np.frombuffer(self._buffer, dtype=np.uint8)
+            starts = np.frombuffer(offsets, dtype=np.int64)
+            columns = np.arange(record_size)
+            step = max(_GATHER_BYTES // record_size, 1)
+            for first in range(0, count, step):
+                chunk = starts[first:first + step]
+                raw[first:first + len(chunk)] = \
+                    source[chunk[:, None] + columns]
+        return raw.reshape(-1).view(dtype)
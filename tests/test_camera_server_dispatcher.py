@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from mavsdk.camera_server import (CameraFeedback, CameraServerError,
+                                  CameraServerResult, CaptureInfo,
+                                  CaptureStatus, StorageInformation)
+from mavsdk.camera_server_dispatcher import CameraServerDispatcher
+
+
+class _FakeCameraServer:
+    """
+     Yields the scripted values of each request, then waits for their
+     responses before ending the subscription
+    """
+
+    def __init__(self, requests, respond_error=False):
+        self.requests = requests
+        self.respond_error = respond_error
+        self.responses = []
+        self._expected = sum(map(len, requests.values()))
+
+    def __getattr__(self, name):
+        if name.startswith("respond_"):
+            async def respond(*arguments):
+                self.responses.append((name[len("respond_"):],) + arguments)
+                if self.respond_error:
+                    raise CameraServerError(CameraServerResult(
+                        CameraServerResult.Result.NO_SYSTEM, ""), name)
+            return respond
+        if name not in self.requests:
+            raise AttributeError(name)
+
+        async def subscription():
+            for value in self.requests[name]:
+                yield value
+            while len(self.responses) < self._expected:
+                await asyncio.sleep(0.001)
+        return subscription
+
+
+def _serve(dispatcher):
+    asyncio.run(asyncio.wait_for(dispatcher.run(), 1.0))
+
+
+def test_handler_responses_are_sent():
+    camera_server = _FakeCameraServer({"set_mode": [0], "zoom_range": [2.0],
+                                       "take_photo": [4]})
+    dispatcher = CameraServerDispatcher(camera_server)
+    dispatcher.register("set_mode", lambda mode: None)
+    photo = CaptureInfo(None, None, 0, True, 4, "file://4.jpg")
+
+    @dispatcher.handler("zoom_range")
+    async def zoom_range(factor):
+        return CameraFeedback.BUSY
+
+    @dispatcher.handler("take_photo")
+    async def take_photo(index):
+        return CameraFeedback.OK, photo
+
+    _serve(dispatcher)
+
+    assert sorted(camera_server.responses) == [
+        ("set_mode", CameraFeedback.OK),
+        ("take_photo", CameraFeedback.OK, photo),
+        ("zoom_range", CameraFeedback.BUSY)]
+    assert dispatcher.stats["take_photo"].responded == 1
+    assert dispatcher.stats["take_photo"].mean_latency_s >= 0.0
+
+
+def test_raising_handler_is_answered_failed():
+    camera_server = _FakeCameraServer({"start_video": [0],
+                                       "format_storage": [1]})
+    dispatcher = CameraServerDispatcher(camera_server)
+
+    def start_video(_):
+        raise RuntimeError("no sensor")
+
+    async def format_storage(_):
+        raise OSError("read-only")
+
+    dispatcher.register("start_video", start_video)
+    dispatcher.register("format_storage", format_storage)
+
+    _serve(dispatcher)
+
+    assert sorted(camera_server.responses) == [
+        ("format_storage", CameraFeedback.FAILED),
+        ("start_video", CameraFeedback.FAILED)]
+    for request in ("start_video", "format_storage"):
+        stats = dispatcher.stats[request]
+        assert (stats.received, stats.failed, stats.responded) == (1, 1, 1)
+
+
+def test_failed_responses_carry_placeholder_data():
+    camera_server = _FakeCameraServer({"take_photo": [7],
+                                       "storage_information": [2],
+                                       "capture_status": [0]})
+    dispatcher = CameraServerDispatcher(camera_server)
+
+    def fail(_):
+        raise RuntimeError("camera off")
+
+    for request in ("take_photo", "storage_information", "capture_status"):
+        dispatcher.register(request, fail)
+    _serve(dispatcher)
+
+    responses = {response[0]: response[1:]
+                 for response in camera_server.responses}
+    assert all(feedback == CameraFeedback.FAILED
+               for feedback, _ in responses.values())
+    capture_info = responses["take_photo"][1]
+    assert (capture_info.index, capture_info.is_success) == (7, False)
+    storage = responses["storage_information"][1]
+    assert storage.storage_id == 2
+    assert storage.storage_status == \
+        StorageInformation.StorageStatus.NOT_AVAILABLE
+    assert responses["capture_status"][1].image_status == \
+        CaptureStatus.ImageStatus.IDLE
+
+
+def test_malformed_response_is_answered_failed():
+    camera_server = _FakeCameraServer({"take_photo": [3]})
+    dispatcher = CameraServerDispatcher(camera_server)
+    # take_photo expects a (feedback, CaptureInfo) tuple
+    dispatcher.register("take_photo", lambda index: CameraFeedback.OK)
+
+    _serve(dispatcher)
+
+    (_, feedback, capture_info), = camera_server.responses
+    assert feedback == CameraFeedback.FAILED
+    assert capture_info.index == 3
+    assert dispatcher.stats["take_photo"].failed == 1
+
+
+def test_response_errors_are_counted():
+    camera_server = _FakeCameraServer({"stop_video": [0]},
+                                      respond_error=True)
+    dispatcher = CameraServerDispatcher(camera_server)
+    dispatcher.register("stop_video", lambda _: None)
+
+    _serve(dispatcher)
+
+    stats = dispatcher.stats["stop_video"]
+    assert (stats.respond_errors, stats.responded) == (1, 0)
+    assert stats.mean_latency_s is None
+
+
+def test_exclusive_requests_are_handled_in_order():
+    camera_server = _FakeCameraServer({"zoom_in_start": [1, 2, 3],
+                                       "set_mode": [0, 1]})
+    dispatcher = CameraServerDispatcher(camera_server, max_concurrency=2)
+    running = []
+    handled = []
+
+    @dispatcher.handler("zoom_in_start", exclusive=True)
+    async def zoom_in_start(value):
+        running.append(value)
+        assert len(running) == 1
+        await asyncio.sleep(0.01 * (4 - value))
+        running.remove(value)
+        handled.append(value)
+
+    dispatcher.register("set_mode", lambda _: None)
+
+    _serve(dispatcher)
+
+    assert handled == [1, 2, 3]
+    assert len(camera_server.responses) == 5
+    assert dispatcher.stats["zoom_in_start"].failed == 0
+
+
+def test_registration_errors():
+    dispatcher = CameraServerDispatcher(_FakeCameraServer({}))
+
+    with pytest.raises(ValueError):
+        dispatcher.register("self_destruct", lambda _: None)
+    with pytest.raises(ValueError):
+        asyncio.run(dispatcher.run())
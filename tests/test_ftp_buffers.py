@@ -0,0 +1,74 @@
+import asyncio
+import io
+import os
+import posixpath
+
+import pytest
+
+from mavsdk import ftp_buffers
+from mavsdk.ftp import ProgressData
+
+
+class _FakeFtp:
+    """ Writes a remote file in parts, as the server does """
+
+    def __init__(self, files, part_size=4):
+        self.files = dict(files)
+        self.part_size = part_size
+        self.requests = []
+        self.scratch_dirs = []
+
+    async def download(self, remote_path, local_dir, use_burst):
+        self.requests.append(("download", remote_path, use_burst))
+        self.scratch_dirs.append(local_dir)
+        data = self.files[remote_path]
+        path = os.path.join(local_dir, posixpath.basename(remote_path))
+        with open(path, "wb") as local_file:
+            for offset in range(0, len(data), self.part_size):
+                local_file.write(data[offset:offset + self.part_size])
+                local_file.flush()
+                yield ProgressData(local_file.tell(), len(data))
+
+    async def upload(self, local_path, remote_dir):
+        self.requests.append(("upload", remote_dir))
+        with open(local_path, "rb") as local_file:
+            data = local_file.read()
+        self.files[posixpath.join(remote_dir,
+                                  os.path.basename(local_path))] = data
+        yield ProgressData(len(data), len(data))
+
+
+def test_download_bytes_does_not_use_burst_by_default():
+    ftp = _FakeFtp({"/fs/params.txt": b"0123456789"})
+
+    data = asyncio.run(ftp_buffers.download_bytes(ftp, "/fs/params.txt"))
+
+    assert data == b"0123456789"
+    assert ftp.requests == [("download", "/fs/params.txt", False)]
+    assert not os.path.exists(ftp.scratch_dirs[0])
+
+
+@pytest.mark.parametrize("use_burst", [False, True])
+def test_download_chunks(use_burst):
+    ftp = _FakeFtp({"/fs/log.ulg": bytes(range(50))}, part_size=16)
+
+    async def collect():
+        return [chunk async for chunk in ftp_buffers.download_chunks(
+            ftp, "/fs/log.ulg", use_burst, chunk_size=10)]
+
+    chunks = asyncio.run(collect())
+
+    assert b"".join(chunks) == bytes(range(50))
+    assert max(len(chunk) for chunk in chunks) <= 10
+    assert not os.path.exists(ftp.scratch_dirs[0])
+
+
+def test_upload_bytes_from_bytes_and_file_objects():
+    ftp = _FakeFtp({})
+
+    asyncio.run(ftp_buffers.upload_bytes(ftp, b"abc", "/fs/a.txt"))
+    asyncio.run(ftp_buffers.upload_bytes(ftp, io.BytesIO(b"def"), "b.txt"))
+
+    assert ftp.files == {"/fs/a.txt": b"abc", "/b.txt": b"def"}
+    with pytest.raises(ValueError):
+        asyncio.run(ftp_buffers.upload_bytes(ftp, b"", "/fs/"))
@@ -0,0 +1,111 @@
+import asyncio
+
+from mavsdk.ftp_cache import CachedFtp
+
+
+class _FakeFtp:
+
+    def __init__(self, tree):
+        # Directory path -> entries, as returned by Ftp.list_directory
+        self.tree = tree
+        self.listed = []
+        self.compid = 1
+
+    async def list_directory(self, remote_dir):
+        self.listed.append(remote_dir)
+        await asyncio.sleep(0)
+        return list(self.tree[self.compid].get(remote_dir, []))
+
+    async def remove_file(self, remote_file_path):
+        pass
+
+    async def set_target_compid(self, compid):
+        self.compid = compid
+
+
+_TREE = {
+    1: {"/log": ["D.", "D..", "D2024-01-01", "D2024-01-02", "Fnotes\t3"],
+        "/log/2024-01-01": ["F10_00_00.ulg\t100", "F11_00_00.ulg\t200"],
+        "/log/2024-01-02": ["F09_00_00.ulg\t300", "Fnotes.txt\t4"]},
+    100: {"/log": ["Fimage.jpg\t500"]},
+}
+
+
+def test_listings_are_cached_and_shared():
+    ftp = _FakeFtp(_TREE)
+    cached = CachedFtp(ftp)
+
+    async def scenario():
+        first = await asyncio.gather(cached.list_directory("/log"),
+                                     cached.list_directory("/log/"))
+        return first, await cached.entries("//log")
+
+    (first, second), entries = asyncio.run(scenario())
+
+    assert ftp.listed == ["/log"]
+    assert first == second == _TREE[1]["/log"]
+    assert [entry.name for entry in entries] == \
+        ["2024-01-01", "2024-01-02", "notes"]
+
+
+def test_glob_lists_only_the_needed_directories():
+    ftp = _FakeFtp(_TREE)
+
+    entries = asyncio.run(CachedFtp(ftp).glob("/log/*/*.ulg"))
+
+    assert [entry.path for entry in entries] == [
+        "/log/2024-01-01/10_00_00.ulg", "/log/2024-01-01/11_00_00.ulg",
+        "/log/2024-01-02/09_00_00.ulg"]
+    assert sorted(ftp.listed) == ["/log", "/log/2024-01-01",
+                                  "/log/2024-01-02"]
+
+
+def test_stat():
+    cached = CachedFtp(_FakeFtp(_TREE))
+
+    entry = asyncio.run(cached.stat("/log/2024-01-01/11_00_00.ulg"))
+
+    assert entry.size == 200
+    assert asyncio.run(cached.stat("/log/missing")) is None
+
+
+def test_mutations_invalidate_the_parent_listing():
+    ftp = _FakeFtp(_TREE)
+    cached = CachedFtp(ftp)
+
+    async def scenario():
+        await cached.entries("/log")
+        await cached.entries("/log/2024-01-01")
+        await cached.remove_file("/log/2024-01-01/10_00_00.ulg")
+        await cached.entries("/log")
+        await cached.entries("/log/2024-01-01")
+
+    asyncio.run(scenario())
+
+    assert ftp.listed == ["/log", "/log/2024-01-01", "/log/2024-01-01"]
+
+
+def test_expired_listings_are_read_again():
+    ftp = _FakeFtp(_TREE)
+    cached = CachedFtp(ftp, ttl_s=0.0)
+
+    asyncio.run(cached.entries("/log"))
+    asyncio.run(cached.entries("/log"))
+
+    assert ftp.listed == ["/log", "/log"]
+
+
+def test_set_target_compid_forwards_and_invalidates():
+    ftp = _FakeFtp(_TREE)
+    cached = CachedFtp(ftp)
+
+    async def scenario():
+        before = await cached.list_directory("/log")
+        await cached.set_target_compid(100)
+        return before, await cached.list_directory("/log")
+
+    before, after = asyncio.run(scenario())
+
+    assert ftp.compid == 100
+    assert before == _TREE[1]["/log"]
+    assert after == ["Fimage.jpg\t500"]
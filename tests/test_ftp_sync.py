@@ -0,0 +1,132 @@
+import asyncio
+import os
+import posixpath
+
+from mavsdk.ftp import FtpError, FtpResult, ProgressData
+from mavsdk.ftp_sync import (FtpTransferManager, RemoteEntry,
+                             parse_directory_listing)
+
+
+def _error(result):
+    return FtpError(FtpResult(result, str(result)), "fake")
+
+
+class _FakeFtp:
+    """ Remote file system kept in memory, files are bytes by path """
+
+    def __init__(self, files, failures=None, burst=True):
+        self.files = dict(files)
+        self.failures = failures or {}
+        self.burst = burst
+        self.downloads = []
+
+    async def list_directory(self, path):
+        prefix = path.rstrip("/") + "/"
+        entries = {}
+        for file_path, data in self.files.items():
+            if not file_path.startswith(prefix):
+                continue
+            name, _, rest = file_path[len(prefix):].partition("/")
+            entries[name] = f"D{name}" if rest else f"F{name}\t{len(data)}"
+        return ["D.", "D.."] + sorted(entries.values())
+
+    async def download(self, remote_path, local_dir, use_burst):
+        if use_burst and not self.burst:
+            raise _error(FtpResult.Result.UNSUPPORTED)
+        if self.failures.get(remote_path):
+            raise _error(self.failures[remote_path].pop(0))
+        self.downloads.append((remote_path, use_burst))
+        data = self.files[remote_path]
+        with open(os.path.join(local_dir, posixpath.basename(remote_path)),
+                  "wb") as local_file:
+            local_file.write(data)
+        yield ProgressData(len(data), len(data))
+
+    async def upload(self, local_path, remote_dir):
+        with open(local_path, "rb") as local_file:
+            data = local_file.read()
+        self.files[posixpath.join(remote_dir,
+                                  os.path.basename(local_path))] = data
+        yield ProgressData(len(data), len(data))
+
+    async def create_directory(self, remote_dir):
+        raise _error(FtpResult.Result.FILE_EXISTS)
+
+    async def are_files_identical(self, local_path, remote_path):
+        with open(local_path, "rb") as local_file:
+            return local_file.read() == self.files.get(remote_path)
+
+
+def test_parse_directory_listing():
+    entries = parse_directory_listing("/fs", [
+        "D.", "D..", "Dlog", "Fa.ulg\t120", "Fb.txt\tbad", "Sskip", "plain",
+        ""])
+
+    assert entries == [RemoteEntry("/fs/log", True),
+                       RemoteEntry("/fs/a.ulg", False, 120),
+                       RemoteEntry("/fs/b.txt", False),
+                       RemoteEntry("/fs/plain", False)]
+    assert entries[1].name == "a.ulg"
+
+
+def test_walk_filters_by_pattern():
+    ftp = _FakeFtp({"/log/a/1.ulg": b"1", "/log/b/2.ulg": b"22",
+                    "/log/b/notes.txt": b"x"})
+
+    files = asyncio.run(FtpTransferManager(ftp).walk("/log", "*.ulg"))
+
+    assert [(entry.path, entry.size) for entry in files] == \
+        [("/log/a/1.ulg", 1), ("/log/b/2.ulg", 2)]
+
+
+def test_download_dir_skips_identical_files(tmp_path):
+    ftp = _FakeFtp({"/log/a/1.ulg": b"one", "/log/2.ulg": b"two"})
+    manager = FtpTransferManager(ftp)
+
+    first = asyncio.run(manager.download_dir("/log", str(tmp_path)))
+    ftp.files["/log/2.ulg"] = b"changed"
+    second = asyncio.run(manager.download_dir("/log", str(tmp_path)))
+
+    assert sorted(first.transferred) == ["/log/2.ulg", "/log/a/1.ulg"]
+    assert first.bytes_transferred == 6 and first.success
+    assert second.skipped == ["/log/a/1.ulg"]
+    assert second.transferred == ["/log/2.ulg"]
+    assert (tmp_path / "a" / "1.ulg").read_bytes() == b"one"
+    assert (tmp_path / "2.ulg").read_bytes() == b"changed"
+
+
+def test_link_failures_are_retried_and_other_failures_reported(tmp_path):
+    ftp = _FakeFtp({"/log/1.ulg": b"1", "/log/2.ulg": b"2"},
+                   failures={"/log/1.ulg": [FtpResult.Result.TIMEOUT],
+                             "/log/2.ulg": [FtpResult.Result.FILE_IO_ERROR]})
+    manager = FtpTransferManager(ftp, retry_delay_s=0.0)
+
+    result = asyncio.run(manager.download_dir("/log", str(tmp_path)))
+
+    assert result.transferred == ["/log/1.ulg"]
+    assert result.failed == {"/log/2.ulg": FtpResult.Result.FILE_IO_ERROR}
+    assert not result.success
+
+
+def test_unsupported_burst_falls_back_to_normal_mode(tmp_path):
+    ftp = _FakeFtp({"/log/1.ulg": b"1"}, burst=False)
+
+    result = asyncio.run(
+        FtpTransferManager(ftp).download_dir("/log", str(tmp_path)))
+
+    assert result.success
+    assert ftp.downloads == [("/log/1.ulg", False)]
+
+
+def test_upload_dir_skips_identical_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_bytes(b"a")
+    (tmp_path / "sub" / "b.txt").write_bytes(b"bb")
+    ftp = _FakeFtp({"/fs/a.txt": b"a"})
+
+    result = asyncio.run(
+        FtpTransferManager(ftp).upload_dir(str(tmp_path), "/fs"))
+
+    assert result.skipped == ["/fs/a.txt"]
+    assert result.transferred == ["/fs/sub/b.txt"]
+    assert ftp.files["/fs/sub/b.txt"] == b"bb"
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from mavsdk import geofence_engine
+from mavsdk.geofence import Circle, FenceType, GeofenceData, Point, Polygon
+from mavsdk.geofence_engine import GeofenceEngine
+
+_FIELD = Polygon([Point(47.0, 8.0), Point(47.01, 8.0), Point(47.01, 8.01),
+                  Point(47.0, 8.01)], FenceType.INCLUSION)
+# A concave notch cut into the east side of the field
+_NOTCH = Polygon([Point(47.004, 8.006), Point(47.006, 8.006),
+                  Point(47.006, 8.012), Point(47.004, 8.012)],
+                 FenceType.EXCLUSION)
+_TREE = Circle(Point(47.002, 8.002), 50.0, FenceType.EXCLUSION)
+
+
+def _engine(**kwargs):
+    return GeofenceEngine(GeofenceData([_FIELD, _NOTCH], [_TREE]), **kwargs)
+
+
+def _grid():
+    return [(47.0 - 0.001 + i * 0.0006, 8.0 - 0.001 + j * 0.0006)
+            for i in range(22) for j in range(22)]
+
+
+def test_scalar_queries():
+    engine = _engine()
+
+    assert engine.is_allowed(47.008, 8.002)
+    assert not engine.is_allowed(47.005, 8.008)
+    assert not engine.is_allowed(47.002, 8.002)
+    assert not engine.is_allowed(47.02, 8.002)
+    assert engine.containing_fences(47.002, 8.002) == [_FIELD, _TREE]
+
+
+def test_no_inclusion_fence_allows_everything_outside_exclusions():
+    engine = GeofenceEngine(GeofenceData([], [_TREE]))
+
+    assert engine.is_allowed(10.0, 10.0)
+    assert not engine.is_allowed(47.002, 8.002)
+
+
+@pytest.mark.parametrize("cell_size_m", [None, 20.0, 5000.0])
+def test_batch_matches_scalar(cell_size_m):
+    np = pytest.importorskip("numpy")
+    engine = _engine(cell_size_m=cell_size_m)
+    points = _grid()
+
+    allowed = engine.is_allowed_many([p[0] for p in points],
+                                     [p[1] for p in points])
+
+    assert isinstance(allowed, np.ndarray)
+    assert allowed.tolist() == [engine.is_allowed(*p) for p in points]
+    assert 0 < allowed.sum() < len(points)
+
+
+def test_batch_without_numpy_raises_import_error(monkeypatch):
+    monkeypatch.setattr(geofence_engine, "np", None)
+
+    with pytest.raises(ImportError):
+        _engine().is_allowed_many([47.0], [8.0])
+
+
+def test_polygon_needs_three_points():
+    polygon = Polygon([Point(47.0, 8.0), Point(47.1, 8.0)],
+                      FenceType.INCLUSION)
+
+    with pytest.raises(ValueError):
+        GeofenceEngine(GeofenceData([polygon], []))
+
+
+def test_monitor_flags_every_position():
+    engine = _engine()
+
+    async def positions():
+        for latitude, longitude in [(47.008, 8.002), (47.005, 8.008)]:
+            yield Point(latitude, longitude)
+
+    async def collect():
+        return [allowed async for _, allowed in engine.monitor(positions())]
+
+    assert asyncio.run(collect()) == [True, False]
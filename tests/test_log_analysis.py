@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import struct
+
+import pytest
+
+from mavsdk import log_analysis
+from mavsdk.log_analysis import LogAnalysisPipeline, analyze_log
+
+pytest.importorskip("numpy")
+
+_START_US = 1000000
+
+# name: (format, struct, rows)
+_TOPICS = {
+    "battery_status": (
+        b"uint64_t timestamp;float voltage_v;float current_a;"
+        b"float discharged_mah;float remaining",
+        struct.Struct("<Q4f"),
+        [(_START_US + i * 100000, 16.8 - 0.1 * i, 10.0 + i, 50.0 * i,
+          1.0 - 0.05 * i) for i in range(5)]),
+    "vehicle_imu_status": (
+        b"uint64_t timestamp;float accel_vibration_metric;"
+        b"float gyro_vibration_metric",
+        struct.Struct("<Q2f"),
+        [(_START_US + i * 100000, 1.0 + i, 0.01) for i in range(5)]),
+    "vehicle_local_position": (
+        b"uint64_t timestamp;float x;float y;float z",
+        struct.Struct("<Q3f"),
+        [(_START_US + i * 100000, 3.0, 4.0, -9.0) for i in range(5)]),
+    "vehicle_local_position_setpoint": (
+        b"uint64_t timestamp;float x;float y;float z",
+        struct.Struct("<Q3f"),
+        [(_START_US, 0.0, 0.0, -10.0)]),
+}
+
+
+def _message(msg_type, payload):
+    return struct.pack("<HB", len(payload), ord(msg_type)) + payload
+
+
+def _ulog_bytes():
+    log = [b"ULog\x01\x12\x35\x01", struct.pack("<Q", _START_US)]
+    for msg_id, (name, (fields, _, _)) in enumerate(_TOPICS.items()):
+        log.append(_message("F", name.encode() + b":" + fields))
+        log.append(_message("A", struct.pack("<BH", 0, msg_id)
+                            + name.encode()))
+    for msg_id, (_, layout, rows) in enumerate(_TOPICS.values()):
+        log.extend(_message("D", struct.pack("<H", msg_id)
+                            + layout.pack(*row)) for row in rows)
+    return b"".join(log)
+
+
+def _write_log(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_ulog_bytes())
+    return str(path)
+
+
+def test_default_metrics(tmp_path):
+    path = _write_log(tmp_path / "log.ulg")
+
+    summary = analyze_log(path)
+
+    assert summary["log"] == "log.ulg"
+    assert summary["path"] == os.path.abspath(path)
+    assert summary["flight"]["duration_s"] == pytest.approx(0.4)
+    assert summary["flight"]["topics"] == 4
+    assert summary["vibration"]["accel"]["max"] == 5.0
+    battery = summary["battery"]
+    assert battery["voltage_start_v"] == pytest.approx(16.8)
+    assert battery["voltage_min_v"] == pytest.approx(16.4)
+    assert battery["discharged_mah"] == 200.0
+    assert battery["current_a"]["mean"] == 12.0
+    assert summary["tracking"]["horizontal_m"]["max"] == pytest.approx(5.0)
+    assert summary["tracking"]["vertical_m"]["mean"] == pytest.approx(1.0)
+
+
+def _failing_metric(ulog):
+    raise RuntimeError("broken")
+
+
+def test_failing_metric_gives_an_error_entry(tmp_path):
+    path = _write_log(tmp_path / "log.ulg")
+
+    summary = analyze_log(path, {"broken": _failing_metric})
+
+    assert summary["broken"] == {"error": "RuntimeError: broken"}
+
+
+def test_same_log_names_in_different_directories_do_not_collide(tmp_path):
+    first = _write_log(tmp_path / "vehicle1" / "log.ulg")
+    second = _write_log(tmp_path / "vehicle2" / "log.ulg")
+
+    with LogAnalysisPipeline(str(tmp_path / "out"), max_workers=1) \
+            as pipeline:
+        assert pipeline.summary_path(first) != pipeline.summary_path(second)
+
+        async def scenario():
+            return [await pipeline.analyze(path) for path in (first, second)]
+
+        summaries = asyncio.run(scenario())
+
+    assert [summary["path"] for summary in summaries] == \
+        [os.path.abspath(first), os.path.abspath(second)]
+    assert len(os.listdir(tmp_path / "out")) == 2
+
+
+def test_summaries_are_reused_only_for_the_same_source(tmp_path):
+    path = _write_log(tmp_path / "log.ulg")
+
+    with LogAnalysisPipeline(str(tmp_path / "out"), max_workers=1) \
+            as pipeline:
+        summary_path = pipeline.summary_path(path)
+        os.makedirs(tmp_path / "out")
+
+        async def analyze_with_summary(summary):
+            with open(summary_path, "w") as summary_file:
+                json.dump(summary, summary_file)
+            return await pipeline.analyze(path)
+
+        cached = asyncio.run(analyze_with_summary(
+            {"path": os.path.abspath(path), "cached": True}))
+        foreign = asyncio.run(analyze_with_summary(
+            {"path": "/elsewhere/log.ulg", "cached": True}))
+
+    assert cached == {"path": os.path.abspath(path), "cached": True}
+    assert "cached" not in foreign
+    assert foreign["flight"]["topics"] == 4
+
+
+def test_run_yields_every_log(tmp_path):
+    paths = [_write_log(tmp_path / f"log{i}.ulg") for i in range(3)]
+    (tmp_path / "bad.ulg").write_bytes(b"garbage")
+    paths.append(str(tmp_path / "bad.ulg"))
+
+    async def feed():
+        for path in paths:
+            yield path
+
+    async def scenario(pipeline):
+        return {path: summary async for path, summary in pipeline.run(feed())}
+
+    with LogAnalysisPipeline(str(tmp_path / "out"), max_workers=2) \
+            as pipeline:
+        results = asyncio.run(scenario(pipeline))
+
+    assert sorted(results) == sorted(paths)
+    assert results[paths[-1]] == {"error": "ValueError: Not a ULog file"}
+    assert all("flight" in results[path] for path in paths[:-1])
+
+
+def test_missing_numpy_raises_import_error(monkeypatch, tmp_path):
+    monkeypatch.setattr(log_analysis, "np", None)
+
+    with pytest.raises(ImportError):
+        LogAnalysisPipeline(str(tmp_path))
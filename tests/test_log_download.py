@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime
+
+from mavsdk.log_download import (LogDownloadQueue, default_filename,
+                                 entry_timestamp, fleet_progress)
+from mavsdk.log_files import Entry, LogFilesError, LogFilesResult, \
+    ProgressData
+
+
+def _error(result):
+    return LogFilesError(LogFilesResult(result, str(result)), "fake")
+
+
+class _FakeLogFiles:
+
+    def __init__(self, entries, failures=None, short=()):
+        self.entries = entries
+        # Errors to raise for an id, before the download succeeds
+        self.failures = failures or {}
+        # Ids of logs written one byte short
+        self.short = set(short)
+        self.downloaded = []
+
+    async def get_entries(self):
+        if not self.entries:
+            raise _error(LogFilesResult.Result.NO_LOGFILES)
+        return self.entries
+
+    async def download_log_file(self, entry, path):
+        if self.failures.get(entry.id):
+            raise self.failures[entry.id].pop(0)
+        self.downloaded.append(entry.id)
+        size = entry.size_bytes - (1 if entry.id in self.short else 0)
+        with open(path, "wb") as log_file:
+            log_file.write(b"\0" * size)
+        yield ProgressData(0.5)
+        yield ProgressData(1.0)
+
+
+_ENTRIES = [Entry(0, "2024-01-01T10:00:00Z", 10),
+            Entry(1, "2024-01-03T10:00:00Z", 30),
+            Entry(2, "2024-01-02T10:00:00Z", 20)]
+
+
+def _queue(log_files, directory, **kwargs):
+    return LogDownloadQueue(log_files, str(directory), retry_delay_s=0.0,
+                            **kwargs)
+
+
+def _harvest(queue):
+    async def scenario():
+        await queue.fetch()
+        queue.start()
+        results = await asyncio.wait_for(queue.join(), 5)
+        await queue.stop()
+        return results
+    return asyncio.run(scenario())
+
+
+def test_entry_helpers():
+    assert entry_timestamp(_ENTRIES[0]) == 1704103200.0
+    assert entry_timestamp(Entry(0, "", 0)) == 0.0
+    assert default_filename(_ENTRIES[0]) == \
+        "log-0-2024-01-01T10-00-00Z.ulg"
+
+
+def test_logs_are_downloaded_by_priority_and_skipped_when_present(tmp_path):
+    log_files = _FakeLogFiles(_ENTRIES)
+
+    results = _harvest(_queue(log_files, tmp_path))
+    queue = _queue(log_files, tmp_path, priority="smallest")
+    again = _harvest(queue)
+
+    assert log_files.downloaded == [1, 2, 0]
+    assert {r.status for r in results.values()} == {"downloaded"}
+    assert {r.status for r in again.values()} == {"skipped"}
+    assert queue.bytes_done == queue.bytes_total == 60
+    assert queue.progress == 1.0
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_date_window(tmp_path):
+    queue = _queue(_FakeLogFiles(_ENTRIES), tmp_path,
+                   date_window=(datetime(2024, 1, 2), None))
+
+    assert queue.add(_ENTRIES) == 2
+    assert queue.add(_ENTRIES) == 0
+
+
+def test_link_failures_are_retried(tmp_path):
+    log_files = _FakeLogFiles(_ENTRIES[:1], failures={
+        0: [_error(LogFilesResult.Result.TIMEOUT)]})
+
+    results = _harvest(_queue(log_files, tmp_path))
+
+    assert results[0].status == "downloaded"
+    assert results[0].attempts == 2
+
+
+def test_failed_logs_are_recorded_and_can_be_queued_again(tmp_path):
+    log_files = _FakeLogFiles(_ENTRIES, failures={
+        0: [_error(LogFilesResult.Result.FILE_OPEN_FAILED)],
+        2: [OSError("disk full")]}, short={1})
+    queue = _queue(log_files, tmp_path, retries=1)
+
+    async def scenario():
+        await queue.fetch()
+        queue.start()
+        failed = dict(await asyncio.wait_for(queue.join(), 5))
+        progress = (queue.bytes_done, queue.progress)
+        log_files.short.clear()
+        await queue.fetch()
+        results = await asyncio.wait_for(queue.join(), 5)
+        await queue.stop()
+        return failed, progress, results
+
+    failed, progress, results = asyncio.run(scenario())
+
+    assert {i: r.status for i, r in failed.items()} == \
+        {0: "failed", 1: "failed", 2: "failed"}
+    assert failed[0].attempts == 1
+    assert failed[0].error._result.result == \
+        LogFilesResult.Result.FILE_OPEN_FAILED
+    assert failed[1].attempts == 2 and failed[1].error is None
+    assert isinstance(failed[2].error, OSError)
+    assert progress == (0, 1.0)
+
+    assert {r.status for r in results.values()} == {"downloaded"}
+    assert queue.bytes_done == queue.bytes_total == 60
+
+
+def test_fleet_progress(tmp_path):
+    first = _queue(_FakeLogFiles(_ENTRIES), tmp_path / "a")
+    second = _queue(_FakeLogFiles(_ENTRIES), tmp_path / "b")
+    first.add(_ENTRIES)
+    second.add(_ENTRIES[:1])
+    second.bytes_done = 10
+
+    assert fleet_progress([first, second]) == 10 / 70
+    assert fleet_progress([]) == 1.0
@@ -0,0 +1,112 @@
+import asyncio
+import types
+
+import pytest
+
+from mavsdk.log_files import Entry, LogFilesError, LogFilesResult
+from mavsdk.log_watcher import LogIndex, LogWatcher
+
+
+class _FakeLogFiles:
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.scans = 0
+
+    async def get_entries(self):
+        self.scans += 1
+        if not self.entries:
+            raise LogFilesError(LogFilesResult(
+                LogFilesResult.Result.NO_LOGFILES, ""), "get_entries()")
+        return list(self.entries)
+
+
+class _Stream:
+    """ Async iterator of values put with `put`, ends on None """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def put(self, value):
+        self.queue.put_nowait(value)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        value = await self.queue.get()
+        if value is None:
+            raise StopAsyncIteration
+        return value
+
+
+def test_index_tracks_changed_entries_and_persists(tmp_path):
+    path = str(tmp_path / "vehicle" / "index.json")
+    index = LogIndex(path)
+    index.add([Entry(0, "2024-01-01T10:00:00Z", 10)])
+
+    reloaded = LogIndex(path)
+    new = reloaded.new_entries([Entry(0, "2024-01-01T10:00:00Z", 10),
+                                Entry(0, "2024-01-01T10:00:00Z", 20),
+                                Entry(1, "2024-01-02T10:00:00Z", 5)])
+
+    assert len(reloaded) == 1
+    assert [(entry.id, entry.size_bytes) for entry in new] == \
+        [(0, 20), (1, 5)]
+
+
+def test_invalid_index_file_is_rejected(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text('{"format": 99}')
+
+    with pytest.raises(ValueError):
+        LogIndex(str(path))
+
+
+def test_scan_yields_entries_until_they_are_harvested(tmp_path):
+    entries = [Entry(0, "2024-01-01T10:00:00Z", 10)]
+    watcher = LogWatcher(_FakeLogFiles(entries),
+                         LogIndex(str(tmp_path / "index.json")))
+
+    assert asyncio.run(watcher.scan()) == entries
+    assert asyncio.run(watcher.scan()) == entries
+    watcher.mark_harvested(entries)
+    assert asyncio.run(watcher.scan()) == []
+    assert asyncio.run(LogWatcher(_FakeLogFiles([]), watcher.index)
+                       .scan()) == []
+
+
+def test_watch_scans_on_start_reconnection_and_landing(tmp_path):
+    log_files = _FakeLogFiles([Entry(0, "2024-01-01T10:00:00Z", 10)])
+    watcher = LogWatcher(log_files, LogIndex(str(tmp_path / "index.json")))
+
+    async def scenario():
+        connection, in_air = _Stream(), _Stream()
+        core = types.SimpleNamespace(connection_state=lambda: connection)
+        telemetry = types.SimpleNamespace(in_air=lambda: in_air)
+        feed = watcher.watch(core, telemetry)
+
+        batches = [await feed.__anext__()]
+        watcher.mark_harvested(batches[0])
+
+        # A log appears after a landing, taking off does not scan
+        in_air.put(True)
+        log_files.entries.append(Entry(1, "2024-01-01T11:00:00Z", 20))
+        in_air.put(False)
+        batches.append(await feed.__anext__())
+
+        connection.put(types.SimpleNamespace(is_connected=True))
+        connection.put(types.SimpleNamespace(is_connected=False))
+        connection.put(types.SimpleNamespace(is_connected=True))
+        batches.append(await feed.__anext__())
+
+        connection.put(None)
+        remaining = [batch async for batch in feed]
+        return batches, remaining
+
+    batches, remaining = asyncio.run(scenario())
+
+    assert [[entry.id for entry in batch] for batch in batches] == \
+        [[0], [1], [1]]
+    assert remaining == []
+    assert log_files.scans == 3
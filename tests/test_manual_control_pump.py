@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from mavsdk.manual_control import ManualControlError, ManualControlResult
+from mavsdk.manual_control_pump import (UDP_INPUT_FORMAT, AxisMapping,
+                                        ManualControlPump,
+                                        ThreadedInputSource, UdpInputSource)
+
+
+class _FakeManualControl:
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.inputs = []
+
+    async def set_manual_control_input(self, x, y, z, r):
+        if self.fail:
+            raise ManualControlError(ManualControlResult(
+                ManualControlResult.Result.CONNECTION_ERROR, ""),
+                "set_manual_control_input()", x, y, z, r)
+        self.inputs.append((x, y, z, r))
+
+
+def _pump_for(pump, duration_s):
+    async def scenario():
+        pump.start()
+        await asyncio.sleep(duration_s)
+        await pump.stop()
+
+    asyncio.run(scenario())
+
+
+def test_axis_mapping():
+    mapping = AxisMapping(inverted=("x",), deadzone=0.1)
+
+    assert mapping([0.05, -0.55, 0.0, 1.0]) == \
+        pytest.approx((0.5, 0.0, 0.5, 1.0))
+    assert mapping([0.0, 2.0, -1.0, float("nan")]) == (-1.0, 0.0, 0.0, 0.0)
+    assert AxisMapping(throttle_zero_to_one=False, deadzone=0.0)(
+        [0.0, 0.0, -1.0, 0.0]) == (0.0, 0.0, -1.0, 0.0)
+
+
+def test_udp_source_listens_on_loopback_by_default():
+    source = UdpInputSource()
+
+    async def scenario():
+        await source.open(port=0)
+        try:
+            return source._transport.get_extra_info("sockname")
+        finally:
+            source.close()
+
+    host, _ = asyncio.run(scenario())
+
+    assert host == "127.0.0.1"
+
+
+def test_udp_source_keeps_the_latest_datagram():
+    source = UdpInputSource()
+
+    async def scenario():
+        await source.open(port=0)
+        address = source._transport.get_extra_info("sockname")
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            sender.sendto(UDP_INPUT_FORMAT.pack(0.5, 0.0, 0.25, -1.0),
+                          address)
+            sender.sendto(b"short", address)
+            sender.sendto(UDP_INPUT_FORMAT.pack(1.0, 0.0, 0.5, 0.0), address)
+            for _ in range(100):
+                if source.received + source.rejected == 3:
+                    break
+                await asyncio.sleep(0.01)
+        source.close()
+
+    asyncio.run(scenario())
+
+    assert (source.received, source.rejected) == (2, 1)
+    assert source() == (1.0, 0.0, 0.5, 0.0)
+
+
+def test_old_input_is_no_longer_used():
+    source = UdpInputSource(timeout_s=0.01)
+    source.feed(UDP_INPUT_FORMAT.pack(0.5, 0.0, 0.25, -1.0))
+
+    assert source() == (0.5, 0.0, 0.25, -1.0)
+    time.sleep(0.02)
+    assert source() is None
+
+
+def test_threaded_source_maps_reads():
+    reads = iter([None, [0.0, 0.0, 1.0, 0.0]])
+
+    def read():
+        time.sleep(0.001)
+        return next(reads, None)
+
+    source = ThreadedInputSource(read, AxisMapping(), timeout_s=1.0)
+    source.start()
+    try:
+        for _ in range(100):
+            if source() is not None:
+                break
+            time.sleep(0.01)
+    finally:
+        source.stop()
+
+    assert source() == (0.0, 0.0, 1.0, 0.0)
+
+
+def test_pump_sends_clamped_input():
+    manual_control = _FakeManualControl()
+    pump = ManualControlPump(manual_control, lambda: (2.0, -0.5, 0.5, 0.0),
+                             rate_hz=100.0)
+
+    _pump_for(pump, 0.05)
+
+    assert manual_control.inputs[0] == (1.0, -0.5, 0.5, 0.0)
+    assert pump.stats.sent == len(manual_control.inputs) >= 2
+    assert pump.stats.ticks >= pump.stats.sent
+
+
+def test_keepalive_skips_unchanged_input():
+    manual_control = _FakeManualControl()
+    pump = ManualControlPump(manual_control, lambda: (0.0, 0.0, 0.5, 0.0),
+                             rate_hz=200.0, keepalive_hz=1.0)
+
+    _pump_for(pump, 0.05)
+
+    assert len(manual_control.inputs) == 1
+    assert pump.stats.skipped >= 2
+
+
+def test_nothing_is_sent_without_input_and_failures_are_counted():
+    silent = ManualControlPump(_FakeManualControl(), lambda: None,
+                               rate_hz=100.0)
+    failing = ManualControlPump(_FakeManualControl(fail=True),
+                                lambda: (0.0, 0.0, 0.5, 0.0), rate_hz=100.0)
+
+    _pump_for(silent, 0.03)
+    _pump_for(failing, 0.03)
+
+    assert silent.stats.sent == 0
+    assert silent.stats.no_input == silent.stats.ticks >= 1
+    assert failing.stats.sent == 0
+    assert failing.stats.failed == failing.stats.ticks >= 1
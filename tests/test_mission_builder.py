@@ -0,0 +1,70 @@
+import pytest
+
+from mavsdk import mission_builder, mission_pb2
+from mavsdk.mission import MissionItem, MissionPlan
+
+np = pytest.importorskip("numpy")
+
+NAN = float("nan")
+
+
+def _serialized(message):
+    return message.SerializeToString(deterministic=True)
+
+
+def _plan_request(mission_plan):
+    request = mission_pb2.UploadMissionRequest()
+    mission_plan.translate_to_rpc(request.mission_plan)
+    return request
+
+
+def test_upload_request_is_byte_identical_to_mission_plan():
+    latitudes = np.array([47.1, 47.2, 47.3])
+    longitudes = np.array([8.1, 8.2, 8.3])
+    arrays = mission_builder.MissionArrays(
+        latitudes, longitudes, 15.0, speed_m_s=[3.0, 0.0, 5.0],
+        is_fly_through=[True, False, True],
+        camera_action=MissionItem.CameraAction.TAKE_PHOTO,
+        vehicle_action=[0, 1, 0], loiter_time_s=2.0)
+
+    plan = MissionPlan([
+        MissionItem(47.1, 8.1, 15.0, 3.0, True, NAN, NAN,
+                    MissionItem.CameraAction.TAKE_PHOTO, 2.0, NAN, NAN,
+                    NAN, NAN, MissionItem.VehicleAction.NONE),
+        MissionItem(47.2, 8.2, 15.0, 0.0, False, NAN, NAN,
+                    MissionItem.CameraAction.TAKE_PHOTO, 2.0, NAN, NAN,
+                    NAN, NAN, MissionItem.VehicleAction.TAKEOFF),
+        MissionItem(47.3, 8.3, 15.0, 5.0, True, NAN, NAN,
+                    MissionItem.CameraAction.TAKE_PHOTO, 2.0, NAN, NAN,
+                    NAN, NAN, MissionItem.VehicleAction.NONE),
+    ])
+
+    assert _serialized(arrays.to_upload_request()) == \
+        _serialized(_plan_request(plan))
+
+
+def test_to_mission_plan_round_trip():
+    arrays = mission_builder.MissionArrays([47.0, 47.5], [8.0, 8.5],
+                                           [10.0, 20.0])
+
+    plan = arrays.to_mission_plan()
+
+    assert [item.relative_altitude_m for item in plan.mission_items] == \
+        [10.0, 20.0]
+    assert _serialized(_plan_request(plan)) == \
+        _serialized(arrays.to_upload_request())
+
+
+def test_invalid_columns_are_rejected():
+    with pytest.raises(ValueError):
+        mission_builder.MissionArrays([47.0, 47.5], [8.0, 8.1, 8.2], 10.0)
+    with pytest.raises(ValueError):
+        mission_builder.MissionArrays([47.0], [8.0], 10.0,
+                                      camera_action=200)
+
+
+def test_missing_numpy_raises_import_error(monkeypatch):
+    monkeypatch.setattr(mission_builder, "np", None)
+
+    with pytest.raises(ImportError):
+        mission_builder.MissionArrays([47.0], [8.0], 10.0)
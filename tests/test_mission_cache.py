@@ -0,0 +1,89 @@
+import asyncio
+
+from mavsdk import mission_raw
+from mavsdk.mission import MissionError, MissionItem, MissionPlan
+from mavsdk.mission_cache import (MissionUploadCache, mission_plan_digest,
+                                  mission_raw_digest)
+
+
+def _plan(altitude=10.0):
+    return MissionPlan([MissionItem(
+        47.0, 8.0, altitude, 5.0, True, float("nan"), float("nan"),
+        MissionItem.CameraAction.NONE, float("nan"), float("nan"),
+        float("nan"), float("nan"), float("nan"),
+        MissionItem.VehicleAction.NONE)])
+
+
+def _raw_item(current):
+    return mission_raw.MissionItem(0, 6, 16, current, 1, 0.0, 0.0, 0.0,
+                                   float("nan"), 473977418, 85455939, 10.0,
+                                   0)
+
+
+class _FakeMission:
+
+    def __init__(self, on_vehicle=None, fail_download=False):
+        self.on_vehicle = on_vehicle
+        self.fail_download = fail_download
+        self.uploads = 0
+        self.downloads = 0
+
+    async def upload_mission(self, mission_plan):
+        self.uploads += 1
+        self.on_vehicle = mission_plan
+
+    async def download_mission(self):
+        self.downloads += 1
+        if self.fail_download:
+            raise MissionError(None, "download_mission()")
+        return self.on_vehicle
+
+
+def test_digests_ignore_the_current_flag_only():
+    assert mission_plan_digest(_plan()) == mission_plan_digest(_plan())
+    assert mission_plan_digest(_plan()) != mission_plan_digest(_plan(20.0))
+    assert mission_raw_digest([_raw_item(0)]) == \
+        mission_raw_digest([_raw_item(1)])
+
+
+def test_identical_upload_is_skipped():
+    mission = _FakeMission()
+    cache = MissionUploadCache(mission, None, verify_with_download=False)
+
+    async def scenario():
+        return [await cache.upload_mission(_plan()),
+                await cache.upload_mission(_plan()),
+                await cache.upload_mission(_plan(20.0))]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert mission.uploads == 2
+
+
+def test_unknown_state_is_verified_with_a_download():
+    mission = _FakeMission(on_vehicle=_plan())
+    cache = MissionUploadCache(mission, None)
+
+    assert asyncio.run(cache.upload_mission(_plan())) is False
+    assert mission.downloads == 1
+    assert mission.uploads == 0
+
+
+def test_failed_download_falls_back_to_an_upload():
+    mission = _FakeMission(fail_download=True)
+    cache = MissionUploadCache(mission, None)
+
+    assert asyncio.run(cache.upload_mission(_plan())) is True
+    assert cache.digest == mission_plan_digest(_plan())
+
+
+def test_invalidate_forces_the_next_upload():
+    mission = _FakeMission()
+    cache = MissionUploadCache(mission, None, verify_with_download=False)
+
+    async def scenario():
+        await cache.upload_mission(_plan())
+        cache.invalidate()
+        return await cache.upload_mission(_plan())
+
+    assert asyncio.run(scenario()) is True
+    assert mission.uploads == 2
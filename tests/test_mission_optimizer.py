@@ -0,0 +1,72 @@
+from mavsdk import mission_raw
+from mavsdk.mission import MissionItem, MissionPlan
+from mavsdk.mission_optimizer import (simplify_mission_plan,
+                                      simplify_mission_raw)
+
+NAN = float("nan")
+
+
+def _item(latitude_deg, longitude_deg,
+          camera_action=MissionItem.CameraAction.NONE, speed_m_s=5.0):
+    return MissionItem(latitude_deg, longitude_deg, 10.0, speed_m_s, True,
+                       NAN, NAN, camera_action, NAN, NAN, NAN, NAN, NAN,
+                       MissionItem.VehicleAction.NONE)
+
+
+def _line(count, step_deg=1e-5):
+    # Points on a straight line, about 1.1 m apart
+    return [_item(47.0 + i * step_deg, 8.0) for i in range(count)]
+
+
+def _indices(mission_plan, items):
+    # MissionItem equality fails on NaN fields, compare identities
+    return [next(i for i, item in enumerate(items) if item is kept)
+            for kept in mission_plan.mission_items]
+
+
+def test_collinear_waypoints_are_removed():
+    plan = MissionPlan(_line(10))
+
+    simplified = simplify_mission_plan(plan, tolerance_m=0.5)
+
+    assert _indices(simplified, plan.mission_items) == [0, 9]
+
+
+def test_corners_beyond_the_tolerance_are_kept():
+    items = _line(5) + [_item(47.00004, 8.0 + i * 1e-4) for i in (1, 2)]
+
+    simplified = simplify_mission_plan(MissionPlan(items), tolerance_m=1.0)
+
+    assert _indices(simplified, items) == [0, 4, 6]
+
+
+def test_actions_and_setting_changes_are_kept():
+    items = _line(9)
+    items[3] = _item(items[3].latitude_deg, 8.0,
+                     camera_action=MissionItem.CameraAction.TAKE_PHOTO)
+    items[6] = _item(items[6].latitude_deg, 8.0, speed_m_s=8.0)
+
+    simplified = simplify_mission_plan(MissionPlan(items), tolerance_m=5.0)
+
+    # The item after the speed change restores the speed, and is kept too
+    assert _indices(simplified, items) == [0, 3, 6, 7, 8]
+
+
+def _raw(seq, command=16, x=473977418, param1=0.0):
+    return mission_raw.MissionItem(seq, 6, command, 0, 1, param1, 0.0, 0.0,
+                                   NAN, x, 85455939, 10.0, 0)
+
+
+def test_raw_items_are_renumbered_and_jumps_remapped():
+    items = [_raw(seq, x=473977418 + seq * 100) for seq in range(6)]
+    items.append(_raw(6, command=177, x=0, param1=5.0))
+
+    simplified = simplify_mission_raw(items, tolerance_m=0.5)
+
+    assert [item.seq for item in simplified] == \
+        list(range(len(simplified)))
+    assert len(simplified) < len(items)
+    jump = simplified[-1]
+    assert jump.command == 177
+    # The jump target and the waypoint before the jump are kept
+    assert simplified[int(jump.param1)].x == items[5].x
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from mavsdk import mission_survey
+from mavsdk.geofence import FenceType, Point, Polygon
+from mavsdk.mission import MissionItem
+
+np = pytest.importorskip("numpy")
+
+# About 111 m north and 76 m east of the origin at this latitude
+_SQUARE = Polygon([Point(47.0, 8.0), Point(47.001, 8.0),
+                   Point(47.001, 8.001), Point(47.0, 8.001)],
+                  FenceType.INCLUSION)
+
+_START = MissionItem.CameraAction.START_PHOTO_DISTANCE.translate_to_rpc()
+_STOP = MissionItem.CameraAction.STOP_PHOTO_DISTANCE.translate_to_rpc()
+
+
+def test_survey_lanes_cover_the_polygon_back_and_forth():
+    mission = mission_survey.survey_grid(_SQUARE, 30.0, spacing_m=10.0)
+
+    latitude = np.asarray(mission.latitude_deg)
+    longitude = np.asarray(mission.longitude_deg)
+    # North-south lanes, 76 m / 10 m -> 8 lanes of two waypoints
+    assert len(mission) == 16
+    assert np.all((latitude >= 47.0 - 1e-9) & (latitude <= 47.001 + 1e-9))
+    assert np.all((longitude > 8.0) & (longitude < 8.001))
+    lane_directions = np.sign(latitude[1::2] - latitude[0::2])
+    assert np.all(lane_directions[1:] == -lane_directions[:-1])
+    assert np.all(np.asarray(mission.relative_altitude_m) == 30.0)
+
+
+def test_survey_overshoot_extends_the_lanes():
+    mission = mission_survey.survey_grid(_SQUARE, 30.0, spacing_m=10.0,
+                                         overshoot_m=20.0)
+
+    latitude = np.asarray(mission.latitude_deg)
+    overshoot_deg = math.degrees(20.0 / 6371000.0)
+    assert latitude.min() == pytest.approx(47.0 - overshoot_deg, abs=1e-7)
+    assert latitude.max() == pytest.approx(47.001 + overshoot_deg, abs=1e-7)
+
+
+def test_survey_triggers_on_every_lane():
+    mission = mission_survey.survey_grid(_SQUARE, 30.0, spacing_m=20.0,
+                                         trigger_distance_m=5.0)
+
+    actions = np.asarray(mission.camera_action)
+    assert np.all(actions[0::2] == _START)
+    assert np.all(actions[1::2] == _STOP)
+    assert np.all(np.asarray(mission.camera_photo_distance_m)[0::2] == 5.0)
+
+
+def test_corridor_lanes_alternate_along_the_path():
+    path = [Point(47.0, 8.0), Point(47.001, 8.0), Point(47.002, 8.001)]
+
+    mission = mission_survey.corridor_scan(path, 20.0, width_m=30.0,
+                                           spacing_m=10.0,
+                                           trigger_distance_m=3.0)
+
+    latitude = np.asarray(mission.latitude_deg)
+    assert len(mission) == 4 * len(path)
+    assert latitude[0] < latitude[2] and latitude[3] > latitude[5]
+    actions = np.asarray(mission.camera_action)
+    assert actions[0] == _START and actions[-1] == _STOP
+
+
+def test_perimeter_orbit_closes_every_lap():
+    mission = mission_survey.perimeter_orbit(_SQUARE, 25.0, laps=2)
+
+    latitude = np.asarray(mission.latitude_deg)
+    assert len(mission) == 9
+    assert latitude[0] == latitude[4] == latitude[8]
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError):
+        mission_survey.survey_grid(_SQUARE, 30.0, spacing_m=0.0)
+    with pytest.raises(ValueError):
+        mission_survey.corridor_scan([Point(47.0, 8.0)], 20.0, 10.0, 5.0)
+    with pytest.raises(ValueError):
+        mission_survey.perimeter_orbit(_SQUARE, 25.0, laps=0)
+
+
+def test_missing_numpy_raises_import_error(monkeypatch):
+    monkeypatch.setattr(mission_survey, "np", None)
+
+    with pytest.raises(ImportError):
+        mission_survey.perimeter_orbit(_SQUARE, 25.0)
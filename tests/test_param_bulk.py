@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from mavsdk.param import ParamError, ParamResult
+from mavsdk.param_bulk import ParamBulk, read_param_file
+
+
+def _error(result):
+    return ParamError(ParamResult(result, str(result)), "fake")
+
+
+class _FakeParam:
+
+    def __init__(self, values, failures=None):
+        self.values = values
+        # Results to raise for a name before the request succeeds
+        self.failures = failures or {}
+        self.calls = []
+
+    async def _get(self, name):
+        self.calls.append(("get", name))
+        if self.failures.get(name):
+            raise _error(self.failures[name].pop(0))
+        return self.values[name]
+
+    async def _set(self, name, value):
+        self.calls.append(("set", name, type(value)))
+        if self.failures.get(name):
+            raise _error(self.failures[name].pop(0))
+        self.values[name] = value
+
+    get_param_int = get_param_float = get_param_custom = _get
+    set_param_int = set_param_float = set_param_custom = _set
+
+
+def test_timeouts_are_retried_per_parameter():
+    param = _FakeParam({"A": 1.0, "B": 2.0},
+                       {"A": [ParamResult.Result.TIMEOUT,
+                              ParamResult.Result.CONNECTION_ERROR]})
+    bulk = ParamBulk(param, retry_delay_s=0.0)
+
+    results = asyncio.run(bulk.get_many(["A", "B"]))
+
+    assert list(results) == ["A", "B"]
+    assert results["A"].success and results["A"].value == 1.0
+    assert results["A"].attempts == 3
+    assert results["B"].attempts == 1
+
+
+def test_other_failures_and_exhausted_retries_are_reported():
+    param = _FakeParam({"A": 1, "B": 2},
+                       {"A": [ParamResult.Result.WRONG_TYPE],
+                        "B": [ParamResult.Result.TIMEOUT] * 5})
+    bulk = ParamBulk(param, retries=2, retry_delay_s=0.0)
+
+    results = asyncio.run(bulk.get_many({"A": int, "B": int}))
+
+    assert results["A"].result == ParamResult.Result.WRONG_TYPE
+    assert results["A"].attempts == 1 and results["A"].value is None
+    assert results["B"].result == ParamResult.Result.TIMEOUT
+    assert results["B"].attempts == 3
+
+
+def test_set_many_dispatches_by_value_type():
+    param = _FakeParam({})
+    bulk = ParamBulk(param)
+
+    results = asyncio.run(bulk.set_many({"I": 3, "F": 0.5, "S": "abc"}))
+
+    assert all(result.success for result in results.values())
+    assert param.values == {"I": 3, "F": 0.5, "S": "abc"}
+    with pytest.raises(TypeError):
+        asyncio.run(bulk.set_many({"L": [1]}))
+
+
+def test_concurrency_is_limited():
+    in_flight = []
+    peak = []
+
+    class _SlowParam(_FakeParam):
+
+        async def _get(self, name):
+            in_flight.append(name)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(name)
+            return 0.0
+
+        get_param_float = _get
+
+    bulk = ParamBulk(_SlowParam({}), concurrency=3)
+
+    results = asyncio.run(bulk.get_many([f"P{i}" for i in range(10)]))
+
+    assert len(results) == 10
+    assert max(peak) == 3
+    with pytest.raises(ValueError):
+        ParamBulk(_FakeParam({}), concurrency=0)
+
+
+def test_read_param_file(tmp_path):
+    path = tmp_path / "vehicle.params"
+    path.write_text("# Onboard parameters\n"
+                    "1\t1\tMPC_XY_VEL_MAX\t12.5\t9\n"
+                    "\n"
+                    "1\t1\tCOM_RC_LOSS_T\t1.000000\t6\n")
+
+    assert read_param_file(str(path)) == {"MPC_XY_VEL_MAX": 12.5,
+                                          "COM_RC_LOSS_T": 1}
+
+    path.write_text("1\t1\tBROKEN\n")
+    with pytest.raises(ValueError):
+        read_param_file(str(path))
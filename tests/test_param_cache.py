@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import types
+
+import pytest
+
+from mavsdk.param import (AllParams, FloatParam, IntParam, ParamError,
+                          ParamResult)
+from mavsdk.param_cache import ParamCache
+
+
+class _FakeInfo:
+
+    async def get_identification(self):
+        return types.SimpleNamespace(hardware_uid="uid-1")
+
+    async def get_version(self):
+        return types.SimpleNamespace(flight_sw_major=1, flight_sw_minor=15,
+                                     flight_sw_patch=0,
+                                     flight_sw_git_hash="abc")
+
+
+class _FakeParam:
+
+    def __init__(self, ints, floats, param_hash=None):
+        self.ints = ints
+        self.floats = floats
+        self.param_hash = param_hash
+        self.downloads = 0
+        self.reads = []
+        self.fail_download = False
+
+    async def get_all_params(self):
+        self.downloads += 1
+        if self.fail_download:
+            raise ParamError(ParamResult(ParamResult.Result.TIMEOUT, ""),
+                             "get_all_params()")
+        return AllParams(
+            [IntParam(name, value) for name, value in self.ints.items()],
+            [FloatParam(name, value) for name, value in self.floats.items()],
+            [])
+
+    async def get_param_int(self, name):
+        self.reads.append(name)
+        if name != "_HASH_CHECK":
+            return self.ints[name]
+        if self.param_hash is None:
+            raise ParamError(ParamResult(ParamResult.Result.FAILED, ""),
+                             "get_param_int()", name)
+        return self.param_hash
+
+    async def get_param_float(self, name):
+        self.reads.append(name)
+        return self.floats[name]
+
+    async def get_param_custom(self, name):
+        raise ParamError(ParamResult(ParamResult.Result.FAILED, ""),
+                         "get_param_custom()", name)
+
+
+def _load(param, cache_dir):
+    async def scenario():
+        cache = ParamCache(param, _FakeInfo(), cache_dir=str(cache_dir))
+        params = await cache.load()
+        return cache, params, await cache.wait_revalidated()
+    return asyncio.run(scenario())
+
+
+def test_first_load_downloads_and_stores(tmp_path):
+    param = _FakeParam({"SYS_AUTOSTART": 4001}, {"MPC_XY_VEL_MAX": 12.0})
+
+    cache, params, changed = _load(param, tmp_path)
+
+    assert param.downloads == 1
+    assert [p.name for p in params.int_params] == ["SYS_AUTOSTART"]
+    assert changed == [] and cache.is_stale is False
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_matching_hash_skips_the_download(tmp_path):
+    param = _FakeParam({"A": 1}, {}, param_hash=42)
+    _load(param, tmp_path)
+
+    cache, _, changed = _load(param, tmp_path)
+
+    assert param.downloads == 1
+    assert changed == [] and cache.is_stale is False
+
+
+def test_changed_values_are_reported(tmp_path):
+    param = _FakeParam({"A": 1, "B": 2}, {"C": 0.5})
+    _load(param, tmp_path)
+    param.ints = {"A": 1, "B": 3}
+    param.floats = {"D": 1.0}
+
+    cache, _, changed = _load(param, tmp_path)
+
+    assert changed == ["B", "C", "D"]
+    assert {p.name: p.value for p in cache.params.int_params} == \
+        {"A": 1, "B": 3}
+
+
+def test_refresh_reads_only_the_given_parameters(tmp_path):
+    param = _FakeParam({"A": 1, "B": 2}, {}, param_hash=42)
+    _load(param, tmp_path)
+    param.ints["B"] = 3
+    param.param_hash = 43
+
+    async def scenario():
+        cache = ParamCache(param, _FakeInfo(), cache_dir=str(tmp_path))
+        await cache.load(revalidate=False)
+        param.reads.clear()
+        await cache.refresh(["B"])
+        return cache
+
+    cache = asyncio.run(scenario())
+
+    assert param.downloads == 1
+    assert param.reads == ["B", "_HASH_CHECK"]
+    assert {p.name: p.value for p in cache.params.int_params} == \
+        {"A": 1, "B": 3}
+    # The refreshed hash is stored, the next load needs no download
+    _, _, changed = _load(param, tmp_path)
+    assert changed == [] and param.downloads == 1
+
+
+def test_failed_revalidation_is_logged_and_marks_stale(tmp_path, caplog):
+    param = _FakeParam({"A": 1}, {})
+    _load(param, tmp_path)
+    param.fail_download = True
+
+    async def scenario():
+        cache = ParamCache(param, _FakeInfo(), cache_dir=str(tmp_path))
+        params = await cache.load()
+        # Let the background task fail without awaiting it
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return cache, params
+
+    with caplog.at_level(logging.ERROR, logger="mavsdk.param_cache"):
+        cache, params = asyncio.run(scenario())
+
+    assert [p.name for p in params.int_params] == ["A"]
+    assert cache.is_stale is True
+    assert "revalidation failed" in caplog.text
+    with pytest.raises(ParamError):
+        asyncio.run(cache.wait_revalidated())
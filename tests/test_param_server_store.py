@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import types
+
+import pytest
+
+from mavsdk.param_server import ParamServerError, ParamServerResult
+from mavsdk.param_server_store import ParamServerStore
+
+
+class _FakeParamServer:
+
+    def __init__(self, fail=()):
+        self.provided = []
+        self.fail = set(fail)
+        self.streams = {int: asyncio.Queue(), float: asyncio.Queue(),
+                        str: asyncio.Queue()}
+
+    async def _provide(self, name, value):
+        if name in self.fail:
+            raise ParamServerError(ParamServerResult(
+                ParamServerResult.Result.NOT_FOUND, ""), "provide", name)
+        self.provided.append((name, value))
+
+    provide_param_int = provide_param_float = provide_param_custom = \
+        _provide
+
+    async def _stream(self, value_type):
+        queue = self.streams[value_type]
+        while True:
+            name, value = await queue.get()
+            yield types.SimpleNamespace(name=name, value=value)
+
+    def changed_param_int(self):
+        return self._stream(int)
+
+    def changed_param_float(self):
+        return self._stream(float)
+
+    def changed_param_custom(self):
+        return self._stream(str)
+
+
+def test_push_provides_only_pending_changes():
+    async def scenario():
+        server = _FakeParamServer(fail={"BAD"})
+        store = ParamServerStore(server)
+        store.load({"A": 1, "B": 0.5, "S": "x", "BAD": 3})
+        first = await store.push()
+        store.set("A", 1)
+        store.set("B", 0.75)
+        second = await store.push()
+        return server, store, first, second
+
+    server, store, first, second = asyncio.run(scenario())
+
+    assert first["BAD"] == ParamServerResult.Result.NOT_FOUND
+    assert second == {"B": ParamServerResult.Result.SUCCESS,
+                      "BAD": ParamServerResult.Result.NOT_FOUND}
+    assert server.provided.count(("A", 1)) == 1
+    assert store.pending == ["BAD"]
+
+
+def test_local_type_change_raises():
+    store = ParamServerStore(_FakeParamServer())
+    store.set("A", 1)
+
+    with pytest.raises(TypeError):
+        store.set("A", 1.5)
+    with pytest.raises(TypeError):
+        store.set("L", [1])
+
+
+def test_change_log():
+    store = ParamServerStore(_FakeParamServer(), log_size=2)
+    store.load({"A": 1, "B": 2, "C": 3})
+
+    assert [change.name for change in store.changes_since(1)] == ["B", "C"]
+    assert store.changes_since(3) == []
+    with pytest.raises(ValueError):
+        store.changes_since(0)
+
+
+def test_remote_changes_are_merged_and_mismatches_skipped(caplog):
+    async def scenario():
+        server = _FakeParamServer()
+        store = ParamServerStore(server)
+        store.load({"A": 1, "B": 0.5})
+        changes = store.changes()
+        # A float change of an int parameter must not stop the feed
+        server.streams[float].put_nowait(("A", 2.5))
+        server.streams[int].put_nowait(("A", 2))
+        batch = await changes.__anext__()
+        server.streams[float].put_nowait(("B", 0.25))
+        second = await changes.__anext__()
+        await changes.aclose()
+        return store, batch, second
+
+    with caplog.at_level(logging.WARNING,
+                         logger="mavsdk.param_server_store"):
+        store, batch, second = asyncio.run(scenario())
+
+    assert batch == {"A": 2}
+    assert second == {"B": 0.25}
+    assert store["A"] == 2
+    assert store.changes_since(2)[0].remote is True
+    assert store.pending == []
+    assert "Ignored change of parameter A" in caplog.text
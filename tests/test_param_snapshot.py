@@ -0,0 +1,97 @@
+import asyncio
+
+from mavsdk.param import AllParams, FloatParam, IntParam, ParamResult
+from mavsdk.param_snapshot import ParamSnapshot
+
+NAN = float("nan")
+
+
+class _FakeParam:
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.writes = {}
+
+    async def get_all_params(self):
+        return self.snapshot.to_all_params()
+
+    async def _set(self, name, value):
+        self.writes[name] = value
+
+    set_param_int = set_param_float = set_param_custom = _set
+
+
+def test_diff_reports_added_removed_and_changed():
+    old = ParamSnapshot({"A": 1, "B": 2}, {"C": 0.5}, {"S": "x"})
+    new = ParamSnapshot({"A": 1, "D": 4}, {"C": 0.25, "B": 2.0}, {"S": "x"})
+
+    diff = old.diff(new)
+
+    assert diff.added == {"D": 4}
+    assert diff.removed == {}
+    assert diff.changed == {"B": (2, 2.0), "C": (0.5, 0.25)}
+    assert not old.diff(old)
+
+
+def test_floats_compare_at_vehicle_precision():
+    assert ParamSnapshot(float_params={"A": 0.1}) == \
+        ParamSnapshot(float_params={"A": 0.10000000149011612})
+    assert ParamSnapshot(float_params={"A": 0.1}) != \
+        ParamSnapshot(float_params={"A": 0.1001})
+
+
+def test_nan_values_compare_equal():
+    assert ParamSnapshot(float_params={"A": NAN}) == \
+        ParamSnapshot(float_params={"A": NAN})
+    assert list(ParamSnapshot(float_params={"A": NAN}).diff(
+        ParamSnapshot(float_params={"A": 1.0})).changed) == ["A"]
+
+
+def test_values_out_of_float32_range_are_a_difference():
+    diff = ParamSnapshot(float_params={"A": 1.0}).diff(
+        ParamSnapshot(float_params={"A": 1e39}))
+
+    assert diff.changed == {"A": (1.0, 1e39)}
+    assert ParamSnapshot(float_params={"A": 1e39}) == \
+        ParamSnapshot(float_params={"A": 1e39})
+
+
+def test_save_and_load(tmp_path):
+    snapshot = ParamSnapshot({"A": 1}, {"B": 0.5, "N": NAN}, {"S": "x"})
+
+    for name in ("snapshot.json", "snapshot.json.gz"):
+        path = str(tmp_path / name)
+        snapshot.save(path)
+        assert ParamSnapshot.load(path) == snapshot
+
+
+def test_apply_writes_only_differences_with_the_vehicle_type():
+    vehicle = ParamSnapshot({"A": 1, "B": 2}, {"C": 0.5})
+    param = _FakeParam(vehicle)
+    target = ParamSnapshot({"A": 1, "B": 3.0}, {"C": 0.75})
+
+    results = asyncio.run(target.apply(param))
+
+    assert param.writes == {"B": 3, "C": 0.75}
+    assert type(param.writes["B"]) is int
+    assert all(result.success for result in results.values())
+
+
+def test_apply_rejects_non_integral_values_for_int_params():
+    vehicle = ParamSnapshot({"A": 1, "B": 2})
+    param = _FakeParam(vehicle)
+    target = ParamSnapshot({"B": 2}, {"A": 1.7})
+
+    results = asyncio.run(target.apply(param, current=vehicle))
+
+    assert param.writes == {}
+    assert results["A"].result == ParamResult.Result.WRONG_TYPE
+    assert results["A"].attempts == 0
+
+
+def test_from_all_params():
+    snapshot = ParamSnapshot.from_all_params(
+        AllParams([IntParam("A", 1)], [FloatParam("B", 0.5)], []))
+
+    assert snapshot.values() == {"A": 1, "B": 0.5}
+    assert len(snapshot) == 2
@@ -0,0 +1,241 @@
+import asyncio
+import math
+
+import pytest
+
+from mavsdk.mocap import MocapError, MocapResult
+from mavsdk.pose_feeder import PoseFeeder, _ClockOffset, quaternion_to_euler
+
+
+class _FakeMocap:
+    """ Keeps a copy of the fields of every message sent """
+
+    def __init__(self, delay_s=0.0, fail=False):
+        self.delay_s = delay_s
+        self.fail = fail
+        self.odometry = []
+        self.mocap = []
+        self.vision = []
+
+    async def set_odometry(self, odometry):
+        await self._sent()
+        self.odometry.append((
+            odometry.time_usec, odometry.frame_id,
+            tuple(vars(odometry.position_body).values()),
+            tuple(vars(odometry.q).values()),
+            tuple(vars(odometry.speed_body).values()),
+            tuple(vars(odometry.angular_velocity_body).values())))
+
+    async def set_attitude_position_mocap(self, attitude_position_mocap):
+        await self._sent()
+        self.mocap.append((
+            attitude_position_mocap.time_usec,
+            tuple(vars(attitude_position_mocap.q).values())))
+
+    async def set_vision_position_estimate(self, vision_position_estimate):
+        await self._sent()
+        self.vision.append((
+            vision_position_estimate.time_usec,
+            tuple(vars(vision_position_estimate.angle_body).values())))
+
+    async def _sent(self):
+        await asyncio.sleep(self.delay_s)
+        if self.fail:
+            raise MocapError(MocapResult(
+                MocapResult.Result.CONNECTION_ERROR, ""), "set_odometry()")
+
+
+def _run(feeder, duration_s=0.05, updates=None):
+    """ Runs the feeder for duration_s, calling updates once it runs """
+    async def scenario():
+        sender = asyncio.ensure_future(feeder.run())
+        await asyncio.sleep(0)
+        if updates:
+            await updates()
+        await asyncio.sleep(duration_s)
+        sender.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_quaternion_to_euler():
+    half = math.sqrt(0.5)
+
+    assert quaternion_to_euler(1.0, 0.0, 0.0, 0.0) == (0.0, 0.0, 0.0)
+    assert quaternion_to_euler(half, 0.0, 0.0, half) == \
+        pytest.approx((0.0, 0.0, math.pi / 2))
+    assert quaternion_to_euler(half, half, 0.0, 0.0) == \
+        pytest.approx((math.pi / 2, 0.0, 0.0))
+
+
+def test_clock_offset_keeps_the_smallest_delay_in_the_window():
+    clock = _ClockOffset(window_s=1.0)
+
+    assert clock.update(1000, 5000) == 4000
+    assert clock.update(2000, 5500) == 3500
+    assert clock.update(3000, 7000) == 3500
+    # The best sample left the window
+    assert clock.update(4000, 1510000) == 1506000
+
+
+def test_only_the_latest_pose_is_sent():
+    mocap = _FakeMocap()
+    feeder = PoseFeeder(rate_hz=20.0)
+    feeder.add_vehicle(1, mocap)
+
+    async def updates():
+        for x in range(3):
+            feeder.update(1, (float(x), 2.0, -3.0), (1.0, 0.0, 0.0, 0.0),
+                          velocity=(0.5, 0.0, 0.0))
+        feeder.update(99, (0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+
+    _run(feeder, updates=updates)
+
+    assert len(mocap.odometry) == 1
+    _, _, position, q, speed, angular_velocity = mocap.odometry[0]
+    assert position == (2.0, 2.0, -3.0)
+    assert q == (1.0, 0.0, 0.0, 0.0)
+    assert speed == (0.5, 0.0, 0.0)
+    assert all(math.isnan(rate) for rate in angular_velocity)
+    stats = feeder.stats(1)
+    assert (stats.received, stats.superseded, stats.sent) == (3, 2, 1)
+    assert stats.latency_s >= 0.0
+
+
+def test_poses_that_are_not_newer_are_dropped():
+    mocap = _FakeMocap()
+    feeder = PoseFeeder(rate_hz=100.0, message="mocap")
+    feeder.add_vehicle(1, mocap)
+
+    async def updates():
+        feeder.update(1, (0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0),
+                      timestamp_s=10.0)
+        await asyncio.sleep(0.03)
+        feeder.update(1, (0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0),
+                      timestamp_s=9.0)
+
+    _run(feeder, updates=updates)
+
+    assert [q for _, q in mocap.mocap] == [(1.0, 0.0, 0.0, 0.0)]
+    assert feeder.stats(1).stale == 1
+
+
+def test_vision_sends_euler_angles():
+    mocap = _FakeMocap()
+    feeder = PoseFeeder(message="vision")
+    feeder.add_vehicle(1, mocap)
+    half = math.sqrt(0.5)
+
+    async def updates():
+        feeder.update(1, (0.0, 0.0, 0.0), (half, 0.0, 0.0, half))
+
+    _run(feeder, updates=updates)
+
+    assert mocap.vision[0][1] == pytest.approx((0.0, 0.0, math.pi / 2))
+
+
+def test_failed_sends_are_counted_and_retried_with_the_next_pose():
+    mocap = _FakeMocap(fail=True)
+    feeder = PoseFeeder(rate_hz=100.0)
+    feeder.add_vehicle(1, mocap)
+
+    async def updates():
+        feeder.update(1, (0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+        await asyncio.sleep(0.03)
+        mocap.fail = False
+        feeder.update(1, (1.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+
+    _run(feeder, updates=updates)
+
+    stats = feeder.stats(1)
+    assert (stats.failed, stats.sent) == (1, 1)
+    assert mocap.odometry[0][2] == (1.0, 0.0, 0.0)
+
+
+def test_slow_vehicle_does_not_delay_the_others():
+    slow, fast = _FakeMocap(delay_s=1.0), _FakeMocap()
+    feeder = PoseFeeder(rate_hz=500.0)
+    feeder.add_vehicle("slow", slow)
+    feeder.add_vehicle("fast", fast)
+
+    async def updates():
+        for step in range(5):
+            feeder.update_batch(["slow", "fast"],
+                                [[step, 0.0, 0.0], [step, 0.0, 0.0]],
+                                [[1.0, 0.0, 0.0, 0.0]] * 2)
+            await asyncio.sleep(0.02)
+
+    _run(feeder, updates=updates)
+
+    assert slow.odometry == []
+    assert len(fast.odometry) == 5
+
+
+def test_vehicles_added_while_running_are_sent_to():
+    first, second, replacement = _FakeMocap(), _FakeMocap(), _FakeMocap()
+    feeder = PoseFeeder(rate_hz=100.0)
+
+    async def scenario():
+        sender = asyncio.ensure_future(feeder.run())
+        await asyncio.sleep(0.02)
+        # Running without vehicles waits for them
+        assert not sender.done()
+
+        feeder.add_vehicle(1, first)
+        feeder.add_vehicle(2, second)
+        feeder.update(1, (1.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+        feeder.update(2, (2.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+        await asyncio.sleep(0.03)
+
+        feeder.add_vehicle(1, replacement)
+        feeder.update(1, (3.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+        await asyncio.sleep(0.03)
+        sender.cancel()
+
+    asyncio.run(scenario())
+
+    assert [sent[2] for sent in first.odometry] == [(1.0, 0.0, 0.0)]
+    assert [sent[2] for sent in second.odometry] == [(2.0, 0.0, 0.0)]
+    assert [sent[2] for sent in replacement.odometry] == [(3.0, 0.0, 0.0)]
+
+
+def test_unexpected_send_error_ends_run():
+    class _BrokenMocap(_FakeMocap):
+        async def set_odometry(self, odometry):
+            raise RuntimeError("broken")
+
+    feeder = PoseFeeder(rate_hz=100.0)
+    feeder.add_vehicle(1, _FakeMocap())
+
+    async def scenario():
+        sender = asyncio.ensure_future(feeder.run())
+        await asyncio.sleep(0)
+        feeder.add_vehicle(2, _BrokenMocap())
+        feeder.update(2, (0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+        await asyncio.wait_for(sender, 1.0)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
+
+
+def test_update_batch_accepts_numpy_arrays():
+    np = pytest.importorskip("numpy")
+    mocap = _FakeMocap()
+    feeder = PoseFeeder(message="mocap")
+    feeder.add_vehicle(7, mocap)
+
+    async def updates():
+        feeder.update_batch(np.array([3, 7]), np.zeros((2, 3)),
+                            np.array([[1.0, 0.0, 0.0, 0.0],
+                                      [0.0, 0.0, 0.0, 1.0]]),
+                            timestamps_s=np.array([1.0, 1.0]))
+
+    _run(feeder, updates=updates)
+
+    assert [q for _, q in mocap.mocap] == [(0.0, 0.0, 0.0, 1.0)]
+    assert feeder.stats(7).received == 1
+
+
+def test_unknown_message_is_rejected():
+    with pytest.raises(ValueError):
+        PoseFeeder(message="gps")
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+
+from mavsdk import qgc_plan
+from mavsdk.mission_raw import MissionImportData, MissionItem
+
+_PLAN = {
+    "fileType": "Plan",
+    "geoFence": {
+        "circles": [{"circle": {"center": [47.3981, 8.5461], "radius": 50},
+                     "inclusion": False, "version": 1}],
+        "polygons": [{"inclusion": True, "version": 1,
+                      "polygon": [[47.39, 8.54], [47.40, 8.54],
+                                  [47.40, 8.55]]}],
+        "version": 2
+    },
+    "mission": {
+        "items": [
+            {"autoContinue": True, "command": 22, "doJumpId": 1, "frame": 3,
+             "params": [15, 0, 0, None, 47.3982493, 8.5455938, 20],
+             "type": "SimpleItem"},
+            {"type": "ComplexItem", "complexItemType": "survey",
+             "TransectStyleComplexItem": {"Items": [
+                 {"autoContinue": True, "command": 16, "doJumpId": 2,
+                  "frame": 3,
+                  "params": [0, 0, 0, None, 47.3983, 8.5456, 20],
+                  "type": "SimpleItem"},
+                 {"autoContinue": True, "command": 16, "doJumpId": 3,
+                  "frame": 3,
+                  "params": [0, 0, 0, None, 47.3984, 8.5457, 20],
+                  "type": "SimpleItem"}]}}
+        ],
+        "version": 2
+    },
+    "rallyPoints": {"points": [[47.3985, 8.5458, 30]], "version": 2},
+    "version": 1
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    qgc_plan.clear_cache()
+    yield
+    qgc_plan.clear_cache()
+
+
+def test_plan_import_flattens_complex_items():
+    data = qgc_plan.import_qgc_plan_from_string(json.dumps(_PLAN))
+
+    assert [item.seq for item in data.mission_items] == [0, 1, 2]
+    assert [item.command for item in data.mission_items] == [22, 16, 16]
+    assert data.mission_items[0].current == 1
+    assert data.mission_items[0].x == 473982493
+    assert [item.command for item in data.geofence_items] == \
+        [5001, 5001, 5001, 5004]
+    assert data.geofence_items[3].param1 == 50.0
+    assert data.rally_items[0].z == 30.0
+
+
+def test_plan_export_round_trips_without_float_artifacts():
+    data = qgc_plan.import_qgc_plan_from_string(json.dumps(_PLAN))
+
+    exported = json.loads(qgc_plan.export_qgc_plan(data))
+
+    assert exported["mission"]["items"][0]["params"][4:6] == \
+        [47.3982493, 8.5455938]
+    assert exported["mission"]["plannedHomePosition"][:2] == \
+        [47.3982493, 8.5455938]
+    assert exported["geoFence"]["polygons"][0]["polygon"] == \
+        _PLAN["geoFence"]["polygons"][0]["polygon"]
+    assert exported["geoFence"]["circles"][0]["circle"]["center"] == \
+        [47.3981, 8.5461]
+    assert exported["rallyPoints"]["points"] == [[47.3985, 8.5458, 30.0]]
+
+    again = qgc_plan.import_qgc_plan_from_string(json.dumps(exported))
+    assert [item.x for item in again.mission_items] == \
+        [item.x for item in data.mission_items]
+
+
+def test_invalid_plans_raise_value_error():
+    with pytest.raises(ValueError):
+        qgc_plan.import_qgc_plan_from_string(json.dumps({"fileType": "x"}))
+    with pytest.raises(ValueError):
+        qgc_plan.import_qgc_plan_from_string(json.dumps(
+            {"fileType": "Plan", "mission": {"items": [
+                {"type": "ComplexItem",
+                 "complexItemType": "StructureScan"}]}}))
+
+
+def test_waypoints_round_trip(tmp_path):
+    items = [MissionItem(0, 0, 16, 1, 1, 0.0, 0.0, 0.0, 0.0,
+                         473977418, 85455939, 488.0, 0),
+             MissionItem(1, 3, 16, 0, 1, 0.0, 2.0, 0.0, 0.0,
+                         473982493, 85455938, 20.0, 0)]
+    path = tmp_path / "mission.waypoints"
+    path.write_text(qgc_plan.export_waypoints(items))
+
+    imported = qgc_plan.import_waypoints(str(path))
+
+    assert imported == items
+    assert "47.3982493\t8.5455938" in path.read_text()
+
+
+def test_invalid_waypoints_raise_value_error(tmp_path):
+    path = tmp_path / "broken.waypoints"
+    path.write_text("QGC WPL 110\n0\t1\t0\t16\n")
+
+    with pytest.raises(ValueError):
+        qgc_plan.import_waypoints(str(path), cache=False)
+
+
+def test_file_imports_are_cached(tmp_path, monkeypatch):
+    path = tmp_path / "mission.plan"
+    path.write_text(json.dumps(_PLAN))
+    calls = []
+    parse = qgc_plan._parse_plan
+
+    def counting_parse(data):
+        calls.append(data)
+        return parse(data)
+
+    monkeypatch.setattr(qgc_plan, "_parse_plan", counting_parse)
+
+    first = qgc_plan.import_qgc_plan(str(path))
+    second = qgc_plan.import_qgc_plan(str(path))
+
+    assert len(calls) == 1
+    assert isinstance(second, MissionImportData)
+    assert [item.x for item in second.mission_items] == \
+        [item.x for item in first.mission_items]
+
+
+def test_file_import_after_its_content_was_evicted(tmp_path):
+    path = tmp_path / "a.plan"
+    path.write_text(json.dumps(_PLAN))
+    first = qgc_plan.import_qgc_plan(str(path))
+
+    # Evict its content through string imports, which share the cache
+    for index in range(256):
+        plan = dict(_PLAN, version=index + 2)
+        qgc_plan.import_qgc_plan_from_string(json.dumps(plan))
+
+    again = qgc_plan.import_qgc_plan(str(path))
+
+    assert [item.x for item in again.mission_items] == \
+        [item.x for item in first.mission_items]
@@ -0,0 +1,207 @@
+import ast
+import asyncio
+import base64
+
+import pytest
+
+from mavsdk.rtcm import (MAX_SEND_BYTES, RtcmForwarder, RtcmFrame,
+                         RtcmFramer, crc24q, rtcm_priority)
+from mavsdk.rtk import Rtk, rtk_pb2
+
+
+def _frame(message_type, size=10):
+    """ An RTCM3 frame of the given type with a payload of size bytes """
+    payload = bytes([message_type >> 4, (message_type & 0x0F) << 4]) \
+        + bytes(0x80 | index % 0x80 for index in range(size - 2))
+    data = bytes([0xD3, len(payload) >> 8, len(payload) & 0xFF]) + payload
+    return data + crc24q(data).to_bytes(3, "big")
+
+
+class _FakeStub:
+    """ Keeps the serialized requests, answers with result """
+
+    def __init__(self, result=rtk_pb2.RtkResult.RESULT_SUCCESS):
+        self.result = result
+        self.requests = []
+
+    async def SendRtcmData(self, request):
+        self.requests.append(request.SerializeToString())
+        response = rtk_pb2.SendRtcmDataResponse()
+        response.rtk_result.result = self.result
+        return response
+
+
+def _rtk(stub):
+    rtk = Rtk(None)
+    rtk._stub = stub
+    return rtk
+
+
+def _forward(forwarder, chunks):
+    async def feed():
+        for chunk in chunks:
+            yield chunk
+        # Let the sender empty the queue before the stream ends
+        await asyncio.sleep(0.01)
+
+    asyncio.run(forwarder.forward(feed()))
+
+
+def _base64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _sent_data(request):
+    return rtk_pb2.SendRtcmDataRequest.FromString(request).rtcm_data.data
+
+
+def test_crc24q():
+    assert crc24q(b"") == 0
+    assert crc24q(b"123456789") == 0xCDE703
+    assert crc24q(b"56789", crc24q(b"1234")) == 0xCDE703
+
+
+def test_framer_completes_split_frames_and_skips_other_data():
+    frames = [_frame(1005), _frame(1077, 30)]
+    stream = b"$GPGGA,noise\r\n" + frames[0] + b"\xd3\xff" + frames[1]
+    framer = RtcmFramer()
+
+    received = []
+    for start in range(0, len(stream), 7):
+        received += framer.feed(stream[start:start + 7])
+
+    assert [frame.message_type for frame in received] == [1005, 1077]
+    assert [bytes(frame.data) for frame in received] == frames
+    assert framer.frames == 2
+    assert framer.skipped_bytes == len(b"$GPGGA,noise\r\n") + 2
+    assert framer.crc_errors == 0
+
+
+def test_framer_drops_frames_with_a_wrong_crc():
+    corrupted = bytearray(_frame(1005))
+    corrupted[5] ^= 0x01
+    framer = RtcmFramer()
+
+    received = framer.feed(bytes(corrupted) + _frame(1006))
+
+    assert [frame.message_type for frame in received] == [1006]
+    assert framer.crc_errors == 1
+
+
+def test_priority_orders_observations_first():
+    assert [rtcm_priority(message_type)
+            for message_type in (1077, 1004, 1005, 1230, 1019)] == \
+        [0, 0, 1, 1, 2]
+
+
+def test_default_encoding_carries_every_byte_value():
+    frames = [_frame(1019, 300), _frame(1005), _frame(1077, 200),
+              _frame(1230), _frame(1077, 5)]
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub))
+
+    _forward(forwarder, [b"".join(frames)])
+
+    sent = [_sent_data(request) for request in stub.requests]
+    assert all(len(data.encode("utf-8")) <= MAX_SEND_BYTES for data in sent)
+    assert b"".join(ast.literal_eval(data) for data in sent) == b"".join(
+        frames[index] for index in (2, 4, 1, 3, 0))
+    assert (forwarder.stats.sent, forwarder.stats.failed) == (5, 0)
+
+
+def test_default_wire_data_is_the_bytes_literal():
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub))
+
+    async def scenario():
+        forwarder.add([RtcmFrame(1005, b"\xd3\x00'\\\n", 0)])
+        sender = asyncio.ensure_future(forwarder.run())
+        await asyncio.sleep(0.01)
+        sender.cancel()
+
+    asyncio.run(scenario())
+
+    # Field 1 (rtcm_data) holding field 1 (data), both length-delimited
+    literal = b"b'\\xd3\\x00\\'\\\\\\n'"
+    assert stub.requests == [
+        bytes([0x0A, len(literal) + 2, 0x0A, len(literal)]) + literal]
+    assert forwarder.stats.bytes_sent == 5
+
+
+def test_encoding_that_cannot_carry_binary_data_is_rejected():
+    with pytest.raises(ValueError):
+        RtcmForwarder(_rtk(_FakeStub()),
+                      encode=lambda data: data.decode("utf-8"))
+
+
+def test_frames_are_encoded_once():
+    encoded = []
+
+    def encode(data):
+        encoded.append(len(data))
+        return _base64(data)
+
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub), encode=encode)
+    encoded.clear()
+
+    _forward(forwarder, [_frame(1077, 20) * 100])
+
+    # Once per frame to measure it, once per send
+    assert len(encoded) == 100 + len(stub.requests)
+    assert forwarder.stats.sent == 100
+
+
+def test_wire_data_is_the_encoded_string():
+    frames = [_frame(1019), _frame(1005), _frame(1077)]
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub), encode=_base64)
+
+    _forward(forwarder, [b"".join(frames)])
+
+    assert len(stub.requests) == 1
+    request = rtk_pb2.SendRtcmDataRequest()
+    request.rtcm_data.data = _base64(frames[2] + frames[1] + frames[0])
+    assert stub.requests[0] == request.SerializeToString()
+    assert forwarder.stats.sent == 3
+    assert forwarder.stats.bytes_sent == sum(map(len, frames))
+
+
+def test_send_limit_applies_to_the_encoded_length():
+    frames = [_frame(1077, 200) for _ in range(5)]
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub), encode=_base64)
+
+    _forward(forwarder, [b"".join(frames)])
+
+    sent = [_sent_data(request) for request in stub.requests]
+    assert all(len(data.encode("utf-8")) <= MAX_SEND_BYTES for data in sent)
+    # 206 bytes of frame are 276 of base64, two fit in one send
+    assert len(sent) == 3
+    assert b"".join(base64.b64decode(data) for data in sent) == \
+        b"".join(frames)
+    assert forwarder.stats.sent == 5
+
+
+def test_oversized_frame_is_split_over_sends():
+    frame = _frame(1077, 1000)
+    stub = _FakeStub()
+    forwarder = RtcmForwarder(_rtk(stub), max_send_bytes=400, encode=_base64)
+
+    _forward(forwarder, [frame])
+
+    sent = [_sent_data(request) for request in stub.requests]
+    assert all(len(data) <= 400 for data in sent)
+    assert b"".join(base64.b64decode(data) for data in sent) == frame
+    assert forwarder.stats.sent == 1
+
+
+def test_failed_send_drops_its_frames():
+    stub = _FakeStub(rtk_pb2.RtkResult.RESULT_CONNECTION_ERROR)
+    forwarder = RtcmForwarder(_rtk(stub), encode=_base64)
+
+    _forward(forwarder, [_frame(1005) + _frame(1077)])
+
+    assert len(stub.requests) == 1
+    assert forwarder.stats.failed == 2
+    assert forwarder.stats.sent == 0
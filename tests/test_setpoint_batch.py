@@ -0,0 +1,59 @@
+import pytest
+
+from mavsdk.setpoint_stream import (PACKET_SIZE, SetpointBatch,
+                                    SetpointMode, SetpointPacket)
+
+np = pytest.importorskip("numpy")
+
+
+def _packet(index):
+    return SetpointPacket(index, SetpointMode.VELOCITY_NED, True, False,
+                          (0.0, 0.0, 0.0), (float(index), 0.0, 0.0),
+                          (0.0, 0.0, 0.0), (0.0, 0.0, 0.0, 0.0),
+                          (0.0, 0.0, 0.0))
+
+
+def test_packed_slots_match_the_single_packet_encoding():
+    batch = SetpointBatch(3)
+
+    count = batch.pack_packets(_packet(index) for index in range(3))
+
+    assert count == 3
+    for index in range(3):
+        assert bytes(batch.packet_view(index)) == _packet(index).encode()
+
+
+def test_decode_back_to_back_packets():
+    data = b"".join(_packet(index).encode() for index in range(4))
+
+    packets = SetpointBatch.decode(data)
+
+    assert [packet.velocity[0] for packet in packets] == [0.0, 1.0, 2.0, 3.0]
+    with pytest.raises(ValueError):
+        SetpointBatch.decode(data[:-1])
+
+
+def test_array_fill_and_seal():
+    batch = SetpointBatch(2)
+    array = batch.as_array()
+    array["timestamp_ns"] = [5, 6]
+    array["setpoint_flags"] = int(SetpointMode.POSITION_LOCAL_NED)
+    array["position"][:, 0] = [1.5, 2.5]
+
+    batch.seal()
+
+    packets = SetpointBatch.decode(bytes(batch.packet_view(0))
+                                   + bytes(batch.packet_view(1)))
+    assert [packet.timestamp_ns for packet in packets] == [5, 6]
+    assert [packet.position[0] for packet in packets] == [1.5, 2.5]
+
+
+def test_decode_array_flags_invalid_records():
+    data = bytearray(b"".join(_packet(index).encode() for index in range(3)))
+    data[PACKET_SIZE + 30] ^= 0xFF
+
+    array, valid = SetpointBatch.decode_array(data)
+
+    assert len(array) == 3
+    assert valid.tolist() == [True, False, True]
+    assert array["velocity"][2][0] == 2.0
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from mavsdk.setpoint_stream import (PACKET_SIZE, SetpointMode,
+                                    SetpointPacket, SetpointStream)
+
+
+def _packet(north=1.0, flags=SetpointMode.POSITION_LOCAL_NED, enable=True,
+            timestamp_ns=1000):
+    return SetpointPacket(timestamp_ns, flags, enable, False,
+                          (north, 2.0, -3.0), (0.1, 0.2, 0.3),
+                          (0.0, 0.0, 0.0), (0.0, 0.0, 90.0, 0.5),
+                          (0.0, 0.0, 10.0))
+
+
+def test_encode_decode_round_trip():
+    data = _packet().encode()
+
+    packet = SetpointPacket.decode(data)
+
+    assert len(data) == PACKET_SIZE
+    assert packet.timestamp_ns == 1000
+    assert packet.setpoint_flags == SetpointMode.POSITION_LOCAL_NED
+    assert packet.enable_flag is True
+    assert packet.position == (1.0, 2.0, -3.0)
+    assert packet.attitude == (0.0, 0.0, 90.0, 0.5)
+
+
+def test_decode_at_an_offset_of_a_larger_buffer():
+    data = b"\x00" * 5 + _packet(north=7.0).encode()
+
+    assert SetpointPacket.decode(data, 5).position[0] == 7.0
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:-1],
+    lambda data: b"\x00" + data[1:],
+    lambda data: data[:20] + bytes([data[20] ^ 0xFF]) + data[21:],
+])
+def test_decode_rejects_invalid_packets(corrupt):
+    with pytest.raises(ValueError):
+        SetpointPacket.decode(corrupt(_packet().encode()))
+
+
+class _FakeOffboard:
+
+    def __init__(self):
+        self.calls = []
+        self.active = False
+
+    async def set_position_ned(self, position):
+        self.calls.append(("position", position.north_m, position.yaw_deg))
+
+    async def is_active(self):
+        return self.active
+
+    async def start(self):
+        self.calls.append(("start",))
+        self.active = True
+
+    async def stop(self):
+        self.calls.append(("stop",))
+        self.active = False
+
+
+def test_feed_keeps_the_latest_packet_only():
+    stream = SetpointStream(_FakeOffboard())
+
+    for north in (1.0, 2.0, 3.0):
+        stream.feed(_packet(north=north).encode())
+    stream.feed(b"garbage")
+
+    assert stream.stats.received == 3
+    assert stream.stats.superseded == 2
+    assert stream.stats.rejected == 1
+    assert stream._latest.position[0] == 3.0
+
+
+def test_run_applies_the_latest_packet_and_engages_offboard():
+    offboard = _FakeOffboard()
+    applied = []
+    stream = SetpointStream(offboard, default_yaw_deg=45.0,
+                            on_applied=lambda packet, stats:
+                            applied.append(packet.position[0]))
+
+    async def scenario():
+        task = asyncio.ensure_future(stream.run())
+        stream.feed(_packet(north=1.0).encode())
+        stream.feed(_packet(north=2.0).encode())
+        await asyncio.sleep(0.01)
+        stream.feed(_packet(enable=False).encode())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(scenario())
+
+    assert applied == [2.0, 1.0]
+    assert offboard.calls == [("position", 2.0, 45.0), ("start",), ("stop",)]
+    assert stream.stats.applied == 2
+
+
+def test_yaw_control_flag_uses_the_packet_yaw():
+    offboard = _FakeOffboard()
+    stream = SetpointStream(offboard, default_yaw_deg=45.0)
+    flags = SetpointMode.POSITION_LOCAL_NED | SetpointMode.YAW_CONTROL
+
+    asyncio.run(stream.apply(_packet(flags=flags)))
+
+    assert offboard.calls[0] == ("position", 1.0, 90.0)
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from mavsdk.shell_session import ShellSession, ShellTimeoutError
+
+
+class _FakeShell:
+    """ Answers command lines with scripted chunks of output """
+
+    def __init__(self, replies, live_after=0):
+        # Command line -> chunks received after it
+        self.replies = replies
+        # Empty lines sent before the subscription is live
+        self.live_after = live_after
+        self.sent = []
+        self.queue = asyncio.Queue()
+
+    async def send(self, command):
+        self.sent.append(command)
+        if command == "\n" and self.live_after:
+            self.live_after -= 1
+            return
+        for chunk in self.replies.get(command.rstrip("\n"), []):
+            self.queue.put_nowait(chunk)
+
+    async def receive(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+_PROMPT = ["\r\nnsh> "]
+
+
+def _session(replies, **kwargs):
+    replies = dict(replies)
+    replies.setdefault("", _PROMPT)
+    return _FakeShell(replies, **kwargs)
+
+
+def test_output_is_cleaned_of_echo_escapes_and_carriage_returns():
+    shell = _session({"ver all": [
+        "ver all\r\n", "\x1b[0mHW arch: PX4_SITL\r\n",
+        "FW git-hash: abc\r\n", "nsh> \x1b[K"]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            return await session.run("ver all")
+
+    assert asyncio.run(scenario()) == "HW arch: PX4_SITL\nFW git-hash: abc"
+
+
+def test_prompt_split_between_receptions():
+    shell = _session({"uorb top": ["ok\r\nn", "sh", "> "]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            return await session.run("uorb top")
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_prompt_followed_by_more_data():
+    shell = _session({
+        "param set X 1": ["done\r\nnsh> INFO [logger] closed\r\n"],
+        "echo hi": ["hi\r\nnsh> "]})
+
+    async def scenario():
+        async with ShellSession(shell, timeout_s=1.0) as session:
+            return await session.run_many(["param set X 1", "echo hi"])
+
+    assert asyncio.run(scenario()) == ["done", "hi"]
+
+
+def test_first_prompt_ends_the_output():
+    shell = _session({"a": ["1\nnsh> 2\nnsh> "]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            return await session.run("a")
+
+    assert asyncio.run(scenario()) == "1"
+
+
+def test_start_retries_until_the_subscription_is_live():
+    shell = _session({}, live_after=2)
+
+    async def scenario():
+        session = ShellSession(shell)
+        await session.start(attempt_timeout_s=0.05)
+        await session.close()
+
+    asyncio.run(scenario())
+
+    assert shell.sent == ["\n", "\n", "\n"]
+
+
+def test_timeout_keeps_the_partial_output():
+    shell = _session({"dmesg": ["line 1\r\n"]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            await session.run("dmesg", timeout_s=0.05)
+
+    with pytest.raises(ShellTimeoutError) as error:
+        asyncio.run(scenario())
+    assert error.value.command == "dmesg"
+    assert error.value.output == "line 1\n"
+
+
+def test_custom_pattern():
+    shell = _session({"reboot": ["Rebooting...\r\n"]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            return await session.run("reboot", expect=r"Rebooting\.\.\.")
+
+    assert asyncio.run(scenario()) == ""
+
+
+def test_ended_subscription_and_unstarted_session():
+    shell = _session({"top": [None]})
+
+    async def scenario():
+        async with ShellSession(shell) as session:
+            await session.run("top")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(scenario())
+    with pytest.raises(RuntimeError):
+        asyncio.run(ShellSession(shell).run("top"))
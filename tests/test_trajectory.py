@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from mavsdk.trajectory import Trajectory, TrajectoryPlayer
+
+
+def _row(t, px=0.0, vx=0.0, yaw=0.0, mode=0):
+    return (t, px, 0.0, 0.0, vx, 0.0, 0.0, 0.0, 0.0, 0.0, yaw, mode)
+
+
+def test_sample_interpolates_linearly():
+    trajectory = Trajectory([_row(0.0, px=0.0, vx=1.0),
+                             _row(2.0, px=4.0, vx=3.0)])
+
+    sample = trajectory.sample(0.5)
+
+    assert sample.position_ned_yaw.north_m == pytest.approx(1.0)
+    assert sample.velocity_ned_yaw.north_m_s == pytest.approx(1.5)
+
+
+def test_sample_clamps_outside_of_the_trajectory():
+    trajectory = Trajectory([_row(1.0, px=1.0), _row(2.0, px=2.0)])
+
+    assert trajectory.sample(-5.0).position_ned_yaw.north_m == 1.0
+    assert trajectory.sample(10.0).position_ned_yaw.north_m == 2.0
+
+
+def test_yaw_wraps_along_the_shortest_arc():
+    trajectory = Trajectory([_row(0.0, yaw=170.0), _row(1.0, yaw=-170.0)])
+
+    yaw = trajectory.sample(0.5).position_ned_yaw.yaw_deg
+
+    assert abs(yaw) == pytest.approx(180.0)
+    assert trajectory.sample(0.25).position_ned_yaw.yaw_deg == \
+        pytest.approx(175.0)
+    assert trajectory.sample(0.75).position_ned_yaw.yaw_deg == \
+        pytest.approx(-175.0)
+
+
+def test_mode_is_held_from_the_segment_start():
+    trajectory = Trajectory([_row(0.0, mode=1), _row(1.0, mode=2),
+                             _row(2.0, mode=3)])
+
+    assert [trajectory.sample(t).mode for t in (0.5, 1.0, 1.9, 3.0)] == \
+        [1, 2, 2, 3]
+
+
+def test_segment_index_after_random_access():
+    trajectory = Trajectory([_row(float(t)) for t in range(100)])
+
+    assert trajectory.segment_index(50.5) == 50
+    assert trajectory.segment_index(3.2) == 3
+    assert trajectory.segment_index(3.9) == 3
+    assert trajectory.segment_index(99.0) == 99
+
+
+def test_rows_are_validated():
+    with pytest.raises(ValueError):
+        Trajectory([_row(1.0), _row(1.0)])
+    with pytest.raises(ValueError):
+        Trajectory([(0.0, 1.0)])
+    with pytest.raises(ValueError):
+        Trajectory([])
+
+
+def test_from_csv_defaults_yaw_and_mode(tmp_path):
+    path = tmp_path / "trajectory.csv"
+    path.write_text("t,px,py,pz,vx,vy,vz,ax,ay,az,extra\n"
+                    "0,0,0,0,0,0,0,0,0,0,x\n"
+                    "1,2,0,0,0,0,0,0,0,0,y\n")
+
+    trajectory = Trajectory.from_csv(str(path))
+
+    sample = trajectory.sample(0.5)
+    assert sample.position_ned_yaw.north_m == pytest.approx(1.0)
+    assert sample.position_ned_yaw.yaw_deg == 0.0
+    assert sample.mode == 0
+
+
+class _FakeOffboard:
+
+    def __init__(self):
+        self.positions = []
+
+    async def set_position_velocity_acceleration_ned(
+            self, position, velocity, acceleration):
+        self.positions.append(position.north_m)
+
+
+def test_player_sends_until_the_last_sample():
+    offboard = _FakeOffboard()
+    trajectory = Trajectory([_row(0.0, px=0.0), _row(0.05, px=5.0)])
+    player = TrajectoryPlayer(offboard, trajectory, rate_hz=100.0)
+
+    asyncio.run(player.play())
+
+    assert offboard.positions[0] == 0.0
+    assert offboard.positions[-1] == 5.0
+    assert player.sent_count == len(offboard.positions)
+    assert player.sent_count + player.skipped_count >= 6
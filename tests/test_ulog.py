@@ -0,0 +1,160 @@
+import struct
+
+import pytest
+
+from mavsdk import ulog
+from mavsdk.ulog import ULog
+
+np = pytest.importorskip("numpy")
+
+_START_US = 1000000
+_SENSOR = struct.Struct("<Q3f6f4h8s2xI")
+
+
+def _message(msg_type, payload):
+    return struct.pack("<HB", len(payload), ord(msg_type)) + payload
+
+
+def _key_value(key, value):
+    key = key.encode()
+    return bytes([len(key)]) + key + value
+
+
+def _sensor(timestamp, index):
+    return _SENSOR.pack(timestamp, index, 0.5, -1.0,
+                        *(float(index + axis) for axis in range(6)),
+                        index, -index, 2, 3, f"imu{index}".encode(),
+                        index * 10)
+
+
+def _ulog_bytes(messages=3, tail=b""):
+    """
+     A small ULog file: a nested topic with array, char and padding fields
+     logged as two instances, information, parameters and logged strings
+    """
+    log = [b"ULog\x01\x12\x35\x01", struct.pack("<Q", _START_US),
+           _message("B", bytes(40)),
+           _message("F", b"vec3:float[3] xyz;"),
+           _message("F", b"sensor:uint64_t timestamp;vec3 accel;"
+                         b"vec3[2] gyro;int16_t[4] raw;char[8] name;"
+                         b"uint8_t[2] _padding0;uint32_t count;"),
+           _message("I", _key_value("char[7] sys_name", b"PX4\0\0\0\0")),
+           _message("I", _key_value("int32_t ver_sw_release",
+                                    struct.pack("<i", 0x010f0000))),
+           _message("M", b"\0" + _key_value("char[5] perf", b"part1")),
+           _message("M", b"\1" + _key_value("char[5] perf", b"part2")),
+           _message("M", b"\0" + _key_value("char[5] perf", b"other")),
+           _message("P", _key_value("int32_t SYS_AUTOSTART",
+                                    struct.pack("<i", 4001))),
+           _message("P", _key_value("float MPC_XY_VEL_MAX",
+                                    struct.pack("<f", 12.5))),
+           _message("Q", b"\1" + _key_value("float MPC_XY_VEL_MAX",
+                                            struct.pack("<f", 12.0))),
+           _message("A", struct.pack("<BH", 0, 7) + b"sensor"),
+           _message("A", struct.pack("<BH", 1, 8) + b"sensor")]
+    for index in range(messages):
+        timestamp = _START_US + 1000 * (index + 1)
+        log.append(_message("D", struct.pack("<H", 7)
+                            + _sensor(timestamp, index)))
+        log.append(_message("D", struct.pack("<H", 8)
+                            + _sensor(timestamp + 500, index + 100)))
+    log += [_message("L", struct.pack("<BQ", ord("6"), _START_US + 1500)
+                     + b"Takeoff detected"),
+            _message("C", struct.pack("<BHQ", ord("4"), 3, _START_US + 2500)
+                     + b"tagged"),
+            _message("P", _key_value("int32_t SYS_AUTOSTART",
+                                     struct.pack("<i", 4002))),
+            _message("O", struct.pack("<H", 20))]
+    return b"".join(log) + tail
+
+
+@pytest.fixture
+def ulog_file(tmp_path):
+    path = tmp_path / "log.ulg"
+    path.write_bytes(_ulog_bytes())
+    return str(path)
+
+
+def test_nested_and_array_fields(ulog_file):
+    with ULog(ulog_file) as log:
+        data = log.data("sensor")
+
+        assert len(data) == 3
+        assert data.field_names == [
+            "timestamp", "accel.xyz", "gyro[0].xyz", "gyro[1].xyz", "raw",
+            "name", "count"]
+        assert data.timestamp.tolist() == [1001000, 1002000, 1003000]
+        assert data["accel.xyz"].shape == (3, 3)
+        assert data["accel.xyz"][2].tolist() == [2.0, 0.5, -1.0]
+        assert data["gyro[1].xyz"][1].tolist() == [4.0, 5.0, 6.0]
+        assert data["raw"][2].tolist() == [2, -2, 2, 3]
+        assert data["name"].tolist() == [b"imu0", b"imu1", b"imu2"]
+        assert data["count"].tolist() == [0, 10, 20]
+
+
+def test_topic_instances(ulog_file):
+    with ULog(ulog_file) as log:
+        assert log.topics == [("sensor", 0), ("sensor", 1)]
+        assert log.data("sensor", 1)["count"].tolist() == [1000, 1010, 1020]
+        assert log.end_timestamp == 1003500
+        with pytest.raises(KeyError):
+            log.data("sensor", 2)
+
+
+def test_info_and_multi_info(ulog_file):
+    with ULog(ulog_file) as log:
+        assert log.start_timestamp == _START_US
+        assert log.info == {"sys_name": "PX4", "ver_sw_release": 0x010f0000}
+        assert log.info_multi == {"perf": ["part1part2", "other"]}
+
+
+def test_parameters(ulog_file):
+    with ULog(ulog_file) as log:
+        assert log.params == {"SYS_AUTOSTART": 4001, "MPC_XY_VEL_MAX": 12.5}
+        assert log.changed_params == [("SYS_AUTOSTART", 4002)]
+        assert log.default_params == {"MPC_XY_VEL_MAX": (1, 12.0)}
+
+
+def test_logged_strings_and_dropouts(ulog_file):
+    with ULog(ulog_file) as log:
+        assert log.logged_messages == [
+            (1001500, ord("6"), None, "Takeoff detected"),
+            (1002500, ord("4"), 3, "tagged")]
+        assert log.dropouts == [20]
+
+
+def test_truncated_tail_is_ignored():
+    complete = _ulog_bytes()
+    # A data message cut short, as after a power loss
+    tail = _message("D", struct.pack("<H", 7) + _sensor(1004000, 3))[:20]
+
+    with ULog(complete + tail) as log:
+        assert len(log.data("sensor")) == 3
+        assert log.dropouts == [20]
+
+
+def test_bytes_and_mmap_sources_match(ulog_file):
+    data = _ulog_bytes()
+
+    with ULog(ulog_file) as mapped, ULog(bytearray(data)) as in_memory:
+        assert mapped.topics == in_memory.topics
+        assert mapped.data("sensor").to_array().tobytes() == \
+            in_memory.data("sensor").to_array().tobytes()
+        assert mapped.params == in_memory.params
+
+
+def test_invalid_files_are_rejected(tmp_path):
+    empty = tmp_path / "empty.ulg"
+    empty.write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        ULog(str(empty))
+    with pytest.raises(ValueError):
+        ULog(b"not a ulog file at all")
+
+
+def test_missing_numpy_raises_import_error(monkeypatch):
+    monkeypatch.setattr(ulog, "np", None)
+
+    with pytest.raises(ImportError):
+        ULog(_ulog_bytes())